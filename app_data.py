@@ -0,0 +1,8 @@
+import os
+
+def data_path(filename):
+    # Per-user location for files the app keeps between sessions.
+    # SPEECH_TRANSLATOR_HOME overrides the default ~/.speech_translator
+    base = os.environ.get('SPEECH_TRANSLATOR_HOME') or os.path.join(os.path.expanduser('~'), '.speech_translator')
+    os.makedirs(base, exist_ok=True)
+    return os.path.join(base, filename)
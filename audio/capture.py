@@ -0,0 +1,435 @@
+import math
+import os
+import threading
+import time
+
+import numpy as np
+
+DEVICE_RATE = 44100
+BLOCK_SIZE = 1024
+
+# Set to "synthetic" (or "synthetic:<path.wav>") to run without a sound card
+AUDIO_SOURCE_ENV_VAR = 'SPEECH_TRANSLATOR_AUDIO'
+
+class RingBuffer:
+    def __init__(self, capacity, dtype=np.float32):
+        # Single producer, any number of readers. The producer copies samples in
+        # and then advances the written counter; readers keep their own cursor
+        # and never block the producer. A reader that falls more than capacity
+        # samples behind skips ahead to the oldest data still in the buffer.
+        self.capacity = capacity
+        self.data = np.zeros(capacity, dtype=dtype)
+        self.written = 0
+
+    def write(self, samples):
+        count = len(samples)
+        if count >= self.capacity:
+            # Only the last capacity samples survive; they go where the
+            # written counter says they belong, wrapping like any other write
+            samples = samples[count - self.capacity:]
+            start = (self.written + count - self.capacity) % self.capacity
+            self.data[start:] = samples[:self.capacity - start]
+            self.data[:start] = samples[self.capacity - start:]
+            self.written += count
+            return
+        start = self.written % self.capacity
+        first = min(count, self.capacity - start)
+        self.data[start:start + first] = samples[:first]
+        if first < count:
+            self.data[:count - first] = samples[first:]
+        # Publish only after the samples are in place
+        self.written += count
+
+    def reader(self, latest=True):
+        return RingReader(self, self.written if latest else max(0, self.written - self.capacity))
+
+class RingReader:
+    def __init__(self, ring, position):
+        self.ring = ring
+        self.position = position
+        self.overruns = 0
+
+    def available(self):
+        return self.ring.written - self.position
+
+    def read_into(self, out):
+        # Copy up to len(out) of the oldest unread samples into out and return
+        # how many were copied. Never blocks.
+        ring = self.ring
+        written = ring.written
+        if written - self.position > ring.capacity:
+            self.overruns += 1
+            self.position = written - ring.capacity
+        count = min(len(out), written - self.position)
+        if count <= 0:
+            return 0
+        start = self.position % ring.capacity
+        first = min(count, ring.capacity - start)
+        out[:first] = ring.data[start:start + first]
+        if first < count:
+            out[first:count] = ring.data[:count - first]
+        # If the producer lapped us while copying, the copy is torn; drop it
+        if ring.written - self.position > ring.capacity:
+            self.overruns += 1
+            self.position = ring.written - ring.capacity
+            return 0
+        self.position += count
+        return count
+
+    def read(self, count, timeout=None, poll_interval=0.005):
+        # Blocking read of exactly count samples; returns fewer only on timeout
+        out = np.empty(count, dtype=self.ring.data.dtype)
+        filled = 0
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while filled < count:
+            filled += self.read_into(out[filled:])
+            if filled < count:
+                if deadline is not None and time.monotonic() >= deadline:
+                    return out[:filled]
+                time.sleep(poll_interval)
+        return out
+
+    def skip_to_latest(self):
+        self.position = self.ring.written
+
+class Resampler:
+    def __init__(self, source_rate, target_rate, zero_crossings=8, block_size=BLOCK_SIZE):
+        # Streaming polyphase resampler. With the rate ratio reduced to
+        # up/down, output k falls (k * down) % up / up of the way past input
+        # sample (k * down) // up, so there are only up distinct filters and
+        # the pattern of filters and input windows repeats every up outputs.
+        # The filters are windowed sincs low-passing at 90% of the lower
+        # Nyquist frequency, so content above half the target rate is removed
+        # instead of folding back into speech. The input the next block's
+        # filters reach back into is kept across blocks, so block boundaries
+        # stay continuous.
+        common = math.gcd(int(source_rate), int(target_rate))
+        self.up = int(target_rate) // common
+        self.down = int(source_rate) // common
+        cutoff = 0.45 * min(1.0, self.up / self.down)  # cycles per input sample
+        half_width = int(np.ceil(zero_crossings / (2 * cutoff)))
+        self.offsets = np.arange(1 - half_width, half_width + 1)
+        distance = (np.arange(self.up) / self.up)[:, None] - self.offsets[None, :]
+        # Kaiser window evaluated at each tap's distance from the output
+        taper = np.i0(8.0 * np.sqrt(np.clip(1 - (distance / half_width) ** 2, 0, None))) / np.i0(8.0)
+        bank = 2 * cutoff * np.sinc(2 * cutoff * distance) * taper
+        self.bank = (bank / bank.sum(axis=1, keepdims=True)).astype(np.float32)
+        # The working buffer holds the kept input followed by the new block.
+        # origin is where the current period's first input sample sits in it
+        # and phase is the next output's index within the period; output
+        # starts at the first input sample.
+        self.keep = 2 * half_width
+        self.origin = self.keep
+        self.phase = 0
+        self.extended = np.zeros(self.keep, dtype=np.float32)
+        self._allocate(block_size)
+
+    def _allocate(self, block_size):
+        # Every buffer process() works in, sized for blocks of up to
+        # block_size samples, so the capture thread does not allocate
+        self.block_size = block_size
+        extended = np.zeros(self.keep + block_size, dtype=np.float32)
+        extended[:self.keep] = self.extended[:self.keep]
+        self.extended = extended
+        outputs = block_size * self.up // self.down + 2
+        # Row k: input indices, relative to origin, and filter of output k
+        # of a period, for one period plus the most outputs one block makes
+        k = np.arange(self.up + outputs)
+        self.windows_at = (k * self.down // self.up)[:, None] + self.offsets[None, :]
+        self.filters_at = self.bank[k * self.down % self.up]
+        self.indices = np.empty((outputs, len(self.offsets)), dtype=np.intp)
+        self.windows = np.empty((outputs, len(self.offsets)), dtype=np.float32)
+        self.output = np.empty(outputs, dtype=np.float32)
+
+    def process(self, samples):
+        # Returns a view of an internal buffer, valid until the next call
+        if self.up == self.down:
+            return samples
+        n = len(samples)
+        if n > self.block_size:
+            self._allocate(n)
+        keep = self.keep
+        total = keep + n
+        self.extended[keep:total] = samples
+        # Outputs whose window ends by the last sample of the block
+        limit = total - 1 - self.offsets[-1] - self.origin
+        phase = self.phase
+        count = max(0, ((limit + 1) * self.up - 1) // self.down - phase + 1) if limit >= 0 else 0
+        if count:
+            indices = self.indices[:count]
+            windows = self.windows[:count]
+            np.add(self.windows_at[phase:phase + count], self.origin, out=indices)
+            np.take(self.extended, indices, out=windows, mode='clip')
+            np.multiply(windows, self.filters_at[phase:phase + count], out=windows)
+            windows.sum(axis=1, out=self.output[:count])
+        periods, self.phase = divmod(phase + count, self.up)
+        # Slide the input the next outputs still need to the front
+        self.extended[:keep] = self.extended[n:total]
+        self.origin += periods * self.down - n
+        return self.output[:count]
+
+class Tap:
+    def __init__(self, source_rate, rate, dtype, seconds):
+        # One converted copy of the capture stream. Every reader that asks for
+        # the same rate and format shares it, so conversion happens once.
+        # readers counts them, so the last one to go can remove the tap.
+        self.rate = rate
+        self.dtype = np.dtype(dtype)
+        self.resampler = Resampler(source_rate, rate)
+        self.ring = RingBuffer(int(rate * seconds), dtype=self.dtype)
+        self.readers = 0
+        self._allocate(BLOCK_SIZE * rate // source_rate + 2)
+
+    def _allocate(self, count):
+        # Conversion buffers, so write() does not allocate per block
+        self.scaled = np.empty(count, dtype=np.float32)
+        self.converted = np.empty(count, dtype=self.dtype)
+
+    def write(self, samples):
+        resampled = self.resampler.process(samples)
+        count = len(resampled)
+        if count > len(self.converted):
+            self._allocate(count)
+        converted = self.converted[:count]
+        if self.dtype == np.int16:
+            scaled = self.scaled[:count]
+            np.multiply(resampled, 32767.0, out=scaled)
+            np.clip(scaled, -32768, 32767, out=scaled)
+            np.copyto(converted, scaled, casting='unsafe')
+        elif resampled.dtype != self.dtype:
+            np.copyto(converted, resampled, casting='unsafe')
+        else:
+            converted = resampled
+        self.ring.write(converted)
+
+class CaptureService:
+    def __init__(self, source, rate=DEVICE_RATE, buffer_seconds=10.0):
+        # Owns the only input stream. Consumers call acquire()/release() around
+        # their use and read from their own RingReader at their own pace; the
+        # stream is open while at least one consumer holds it.
+        self.source = source
+        self.rate = rate
+        self.buffer_seconds = buffer_seconds
+        self.ring = RingBuffer(int(rate * buffer_seconds))
+        self.taps = {}
+        # What the capture thread iterates; replaced, never mutated, so it
+        # needs no lock and no copy per block
+        self.active_taps = ()
+        self.lock = threading.Lock()
+        self.users = 0
+        self.listeners = []
+
+    def reader(self, rate=None, dtype=np.float32, latest=True):
+        # Native float32 frames by default, or a converted tap for consumers
+        # such as the recognizer that want e.g. 16 kHz int16
+        rate = rate or self.rate
+        if rate == self.rate and np.dtype(dtype) == np.float32:
+            return self.ring.reader(latest)
+        key = (rate, np.dtype(dtype).str)
+        with self.lock:
+            tap = self.taps.get(key)
+            if tap is None:
+                tap = self.taps[key] = Tap(self.rate, rate, dtype, self.buffer_seconds)
+                self.active_taps = tuple(self.taps.values())
+            tap.readers += 1
+        return tap.ring.reader(latest)
+
+    def remove_reader(self, reader):
+        # Give back a reader from reader(); a tap stops converting once its
+        # last reader is removed. Native readers need no removing.
+        with self.lock:
+            for key, tap in self.taps.items():
+                if tap.ring is reader.ring:
+                    tap.readers -= 1
+                    if tap.readers <= 0:
+                        del self.taps[key]
+                        self.active_taps = tuple(self.taps.values())
+                    return
+
+    def add_listener(self, callback):
+        # Called with every raw block on the capture thread; keep it cheap
+        self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def acquire(self):
+        with self.lock:
+            # Count the user only once the stream is open, so a failed start
+            # is retried by the next acquire()
+            if self.users == 0:
+                self.source.start(self._on_block)
+            self.users += 1
+
+    def release(self):
+        with self.lock:
+            self.users = max(0, self.users - 1)
+            if self.users == 0:
+                self.source.stop()
+
+    def device_name(self):
+        return self.source.device_name()
+
+    @property
+    def running(self):
+        return self.users > 0
+
+    def _on_block(self, samples):
+        # Runs on the capture thread for every block from the source
+        self.ring.write(samples)
+        for tap in self.active_taps:
+            tap.write(samples)
+        for listener in list(self.listeners):
+            listener(samples)
+
+    def close(self):
+        with self.lock:
+            if self.users:
+                self.source.stop()
+            self.users = 0
+            self.source.close()
+
+class PyAudioSource:
+    def __init__(self, rate=DEVICE_RATE, block_size=BLOCK_SIZE, device_index=None):
+        self.rate = rate
+        self.block_size = block_size
+        self.device_index = device_index
+        self.pa = None
+        self.stream = None
+        # device_name() is first called from the startup preload thread and
+        # may race the first start(); only one of them may create PyAudio
+        self.pa_lock = threading.Lock()
+
+    def _pyaudio(self):
+        with self.pa_lock:
+            if self.pa is None:
+                import pyaudio
+                self.pa = pyaudio.PyAudio()
+            return self.pa
+
+    def device_name(self):
+        # Used to key per-device settings such as the noise floor
+        pa = self._pyaudio()
+        if self.device_index is None:
+            info = pa.get_default_input_device_info()
+        else:
+            info = pa.get_device_info_by_index(self.device_index)
+        return info.get('name', 'default')
+
+    def start(self, on_block):
+        import pyaudio
+        pa = self._pyaudio()
+
+        def callback(in_data, frame_count, time_info, status):
+            on_block(np.frombuffer(in_data, dtype=np.float32))
+            return (None, pyaudio.paContinue)
+
+        self.stream = pa.open(
+            format=pyaudio.paFloat32,
+            channels=1,
+            rate=self.rate,
+            input=True,
+            input_device_index=self.device_index,
+            frames_per_buffer=self.block_size,
+            stream_callback=callback
+        )
+        self.stream.start_stream()
+
+    def stop(self):
+        if self.stream:
+            self.stream.stop_stream()
+            self.stream.close()
+            self.stream = None
+
+    def close(self):
+        self.stop()
+        with self.pa_lock:
+            if self.pa is not None:
+                self.pa.terminate()
+                self.pa = None
+
+class SyntheticSource:
+    def __init__(self, rate=DEVICE_RATE, block_size=BLOCK_SIZE, signal=None, realtime=True):
+        # Plays signal (float32 samples, looped) or, by default, a pattern of
+        # one second of tone bursts followed by one second of quiet noise, from
+        # a background thread at the device rate. Lets the whole capture path
+        # run without a sound card.
+        self.rate = rate
+        self.block_size = block_size
+        self.signal = signal if signal is not None else self.default_signal(rate)
+        self.realtime = realtime
+        self.thread = None
+        self.stop_event = threading.Event()
+
+    @staticmethod
+    def default_signal(rate, seconds=2.0, seed=0):
+        rng = np.random.default_rng(seed)
+        t = np.arange(int(rate * seconds)) / rate
+        signal = 0.002 * rng.standard_normal(len(t))
+        speech = t < seconds / 2
+        signal[speech] += 0.3 * np.sin(2 * np.pi * 220 * t[speech]) * (0.5 + 0.5 * np.sin(2 * np.pi * 3 * t[speech]))
+        return signal.astype(np.float32)
+
+    @classmethod
+    def from_wav(cls, path, **kwargs):
+        import wave
+        with wave.open(path, 'rb') as handle:
+            rate = handle.getframerate()
+            channels = handle.getnchannels()
+            width = handle.getsampwidth()
+            frames = handle.readframes(handle.getnframes())
+        if width != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported")
+        samples = np.frombuffer(frames, dtype=np.int16).astype(np.float32) / 32768.0
+        if channels > 1:
+            samples = samples.reshape(-1, channels).mean(axis=1).astype(np.float32)
+        return cls(rate=rate, signal=samples, **kwargs)
+
+    def device_name(self):
+        return 'synthetic'
+
+    def start(self, on_block):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, args=(on_block,), daemon=True)
+        self.thread.start()
+
+    def _run(self, on_block):
+        position = 0
+        block_seconds = self.block_size / self.rate
+        next_time = time.monotonic()
+        while not self.stop_event.is_set():
+            end = position + self.block_size
+            block = np.take(self.signal, np.arange(position, end), mode='wrap')
+            position = end % len(self.signal)
+            on_block(block)
+            if self.realtime:
+                next_time += block_seconds
+                time.sleep(max(0.0, next_time - time.monotonic()))
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        self.stop()
+
+_default_service = None
+_default_lock = threading.Lock()
+
+def default_service():
+    # The process-wide capture service shared by the visualizer and recognizer
+    global _default_service
+    with _default_lock:
+        if _default_service is None:
+            setting = os.environ.get(AUDIO_SOURCE_ENV_VAR, '')
+            if setting.startswith('synthetic:'):
+                source = SyntheticSource.from_wav(setting.split(':', 1)[1])
+            elif setting == 'synthetic':
+                source = SyntheticSource()
+            else:
+                source = PyAudioSource()
+            _default_service = CaptureService(source, rate=source.rate)
+        return _default_service
@@ -0,0 +1,55 @@
+import numpy as np
+import speech_recognition as sr
+
+from audio.capture import default_service
+
+RECOGNIZER_RATE = 16000
+
+class ListenCancelled(Exception):
+    # Raised out of a blocking read when the listening job is cancelled
+    pass
+
+class SharedMicrophone(sr.AudioSource):
+    def __init__(self, service=None, sample_rate=RECOGNIZER_RATE, chunk_size=1024, cancel_event=None):
+        # Drop-in replacement for sr.Microphone that reads 16-bit mono audio
+        # from the shared capture service instead of opening its own stream.
+        # Setting cancel_event makes a blocked listen() raise ListenCancelled.
+        self.service = service or default_service()
+        self.cancel_event = cancel_event
+        self.SAMPLE_RATE = sample_rate
+        self.SAMPLE_WIDTH = 2
+        self.CHUNK = chunk_size
+        self.stream = None
+
+    def __enter__(self):
+        self.service.acquire()
+        self.stream = _ReaderStream(self.service.reader(self.SAMPLE_RATE, np.int16), self.cancel_event)
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.service.remove_reader(self.stream.reader)
+        self.stream = None
+        self.service.release()
+
+class _ReaderStream:
+    def __init__(self, reader, cancel_event=None):
+        self.reader = reader
+        self.cancel_event = cancel_event
+
+    def read(self, size):
+        # speech_recognition reads whole chunks of frames as bytes. Wait in
+        # short slices so a cancelled job does not stay blocked here.
+        if self.cancel_event is None:
+            return self.reader.read(size).tobytes()
+        chunks = []
+        needed = size
+        while needed:
+            if self.cancel_event.is_set():
+                raise ListenCancelled()
+            chunk = self.reader.read(needed, timeout=0.1)
+            chunks.append(chunk)
+            needed -= len(chunk)
+        return b''.join(chunk.tobytes() for chunk in chunks)
+
+    def close(self):
+        pass
@@ -0,0 +1,134 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+class NoiseFloorEstimator:
+    def __init__(self, alpha=0.2, ratio=1.5, minimum=50.0, window=200, update_every=16):
+        # Running estimate of the background energy, in the same RMS units as
+        # speech_recognition's energy_threshold (16-bit sample scale).
+        # Block energies go into a short window; every update_every blocks the
+        # 20th percentile of that window (speech rarely fills 80% of a few
+        # seconds) is folded into an exponential moving average. The speech
+        # threshold is the floor times ratio, like sr's dynamic_energy_ratio.
+        self.alpha = alpha
+        self.ratio = ratio
+        self.minimum = minimum
+        self.update_every = update_every
+        self.energies = deque(maxlen=window)
+        self.pending = 0
+        self.floor = None
+        self.lock = threading.Lock()
+
+    def add_block(self, samples):
+        # samples are float32 in [-1, 1]; called on the capture thread
+        energy = float(np.sqrt(np.dot(samples, samples) / max(len(samples), 1))) * 32768.0
+        with self.lock:
+            self.energies.append(energy)
+            self.pending += 1
+            if self.pending < self.update_every:
+                return
+            self.pending = 0
+            estimate = float(np.percentile(self.energies, 20))
+            if self.floor is None:
+                self.floor = estimate
+            else:
+                self.floor += self.alpha * (estimate - self.floor)
+
+    def calibrate(self, floor):
+        # Replace the estimate outright, e.g. after a full recalibration
+        with self.lock:
+            self.floor = floor
+            self.energies.clear()
+            self.pending = 0
+
+    def reset(self):
+        # Forget the estimate and the energies behind it, e.g. when the input
+        # device changes and nothing is known about the new one
+        self.calibrate(None)
+
+    @property
+    def ready(self):
+        return self.floor is not None
+
+    @property
+    def threshold(self):
+        if self.floor is None:
+            return None
+        return max(self.minimum, self.floor * self.ratio)
+
+class NoiseFloorStore:
+    def __init__(self, path):
+        # Last known noise floor per input device, kept between sessions
+        self.path = path
+        try:
+            with open(path, encoding='utf-8') as handle:
+                self.devices = json.load(handle)
+        except (OSError, ValueError):
+            self.devices = {}
+        if not isinstance(self.devices, dict):
+            self.devices = {}
+
+    def get(self, device):
+        # An entry of any other shape than {'floor': <positive number>, ...},
+        # e.g. from a hand-edited file, counts as missing
+        entry = self.devices.get(device)
+        if not isinstance(entry, dict):
+            return None
+        floor = entry.get('floor')
+        if isinstance(floor, bool) or not isinstance(floor, (int, float)) or not 0 < floor < float('inf'):
+            return None
+        return float(floor)
+
+    def put(self, device, floor):
+        self.devices[device] = {'floor': floor, 'updated': time.time()}
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(self.devices, handle, indent=2)
+        os.replace(tmp_path, self.path)
+
+class NoiseFloorMonitor:
+    def __init__(self, capture, store):
+        # Feeds every captured block into a NoiseFloorEstimator in the
+        # background, so a threshold is ready the moment listening starts.
+        # The estimate is stored per input device.
+        self.capture = capture
+        self.store = store
+        self.estimator = NoiseFloorEstimator()
+        self.device = None
+        self.recalibrate_requested = False
+        capture.add_listener(self.estimator.add_block)
+
+    def select_device(self, device):
+        # Returns True if a usable estimate exists for this device. Switching
+        # devices drops the old estimate in favour of the new device's one.
+        if device != self.device:
+            self.device = device
+            floor = self.store.get(device)
+            if floor is None:
+                self.estimator.reset()
+            else:
+                self.estimator.calibrate(floor)
+        return self.estimator.ready and not self.recalibrate_requested
+
+    def request_recalibration(self):
+        self.recalibrate_requested = True
+
+    def calibrated(self, threshold):
+        # Seed the estimate from a full calibration's energy threshold
+        self.estimator.calibrate(threshold / self.estimator.ratio)
+        self.recalibrate_requested = False
+
+    @property
+    def threshold(self):
+        return self.estimator.threshold
+
+    def save(self):
+        if self.device is not None and self.estimator.ready:
+            self.store.put(self.device, self.estimator.floor)
+            self.store.save()
@@ -0,0 +1,118 @@
+import numpy as np
+
+class SpectrumAnalyzer:
+    def __init__(self, sample_rate=44100, fft_size=2048, num_bands=64,
+                 min_freq=40.0, max_freq=16000.0, floor_db=-80.0, ceiling_db=0.0,
+                 attack=0.6, decay=0.15):
+        # Every array the hot path touches is allocated here, once. push() and
+        # compute() only write into these buffers, so running them on the audio
+        # thread creates no garbage and cannot trigger GC pauses.
+        self.sample_rate = sample_rate
+        self.fft_size = fft_size
+        self.num_bands = num_bands
+        self.floor_db = floor_db
+        self.db_scale = 100.0 / (ceiling_db - floor_db)
+        self.attack = attack
+        self.decay = decay
+
+        # Ring buffer of the most recent fft_size samples
+        self.ring = np.zeros(fft_size, dtype=np.float32)
+        self.write_pos = 0
+
+        # FFT input, output and the per-bin magnitudes. The FFT runs in double
+        # precision because a float32 input makes rfft allocate a converted copy.
+        self.window = np.hanning(fft_size)
+        self.frame = np.zeros(fft_size)
+        self.spectrum = np.zeros(fft_size // 2 + 1, dtype=np.complex128)
+        self.magnitude = np.zeros(fft_size // 2 + 1)
+
+        # Band levels (0-100) after log binning, and the smoothed output
+        self.band_matrix = self._band_matrix(min_freq, max_freq)
+        self.bands = np.zeros(num_bands)
+        self.levels = np.zeros(num_bands)
+        self.delta = np.zeros(num_bands)
+        self.coefficients = np.zeros(num_bands)
+        self.rising = np.zeros(num_bands, dtype=bool)
+        # Per-band smoothing constants, kept as arrays so the ufuncs below do
+        # not have to box Python floats on every call
+        self.attack_minus_decay = np.full(num_bands, attack - decay)
+        self.decay_coefficients = np.full(num_bands, decay)
+        self.epsilon = np.full(num_bands, 1e-10)
+
+        # NumPy 2 lets rfft write into a preallocated output; older versions
+        # always allocate, which still works, just not garbage-free
+        try:
+            np.fft.rfft(self.frame, out=self.spectrum)
+            self.rfft_in_place = True
+        except TypeError:
+            self.rfft_in_place = False
+
+    def _band_matrix(self, min_freq, max_freq):
+        # Averaging weights from FFT bins to log-spaced bands, folded together
+        # with the window gain so a full-scale sine reads as about 0 dB. Binning
+        # is then a single matrix-vector product into a preallocated output.
+        bins = self.fft_size // 2 + 1
+        max_freq = min(max_freq, self.sample_rate / 2)
+        edges = np.geomspace(min_freq, max_freq, self.num_bands + 1)
+        edge_bins = np.round(edges * self.fft_size / self.sample_rate).astype(int)
+        gain = self.window.sum() / 2
+        matrix = np.zeros((self.num_bands, bins))
+        for band in range(self.num_bands):
+            lo = min(edge_bins[band], bins - 1)
+            hi = min(max(edge_bins[band + 1], lo + 1), bins)
+            matrix[band, lo:hi] = 1.0 / ((hi - lo) * gain)
+        return matrix
+
+    def push(self, samples):
+        # Copy new samples into the ring buffer, wrapping at the end
+        count = len(samples)
+        if count >= self.fft_size:
+            self.ring[:] = samples[count - self.fft_size:]
+            self.write_pos = 0
+            return
+        first = min(count, self.fft_size - self.write_pos)
+        self.ring[self.write_pos:self.write_pos + first] = samples[:first]
+        if first < count:
+            self.ring[:count - first] = samples[first:]
+        self.write_pos = (self.write_pos + count) % self.fft_size
+
+    def compute(self):
+        # Unroll the ring into chronological order and apply the window
+        tail = self.fft_size - self.write_pos
+        self.frame[:tail] = self.ring[self.write_pos:]
+        self.frame[tail:] = self.ring[:self.write_pos]
+        np.multiply(self.frame, self.window, out=self.frame)
+
+        if self.rfft_in_place:
+            np.fft.rfft(self.frame, out=self.spectrum)
+        else:
+            self.spectrum[:] = np.fft.rfft(self.frame)
+        np.abs(self.spectrum, out=self.magnitude)
+
+        # Log-spaced bands in dB, mapped onto 0-100
+        bands = self.bands
+        np.dot(self.band_matrix, self.magnitude, out=bands)
+        np.maximum(bands, self.epsilon, out=bands)
+        np.log10(bands, out=bands)
+        bands *= 20.0
+        bands -= self.floor_db
+        bands *= self.db_scale
+        np.clip(bands, 0.0, 100.0, out=bands)
+
+        # Attack/decay smoothing: rise quickly, fall slowly
+        np.subtract(bands, self.levels, out=self.delta)
+        np.greater(self.delta, 0.0, out=self.rising)
+        np.multiply(self.rising, self.attack_minus_decay, out=self.coefficients)
+        np.add(self.coefficients, self.decay_coefficients, out=self.coefficients)
+        np.multiply(self.delta, self.coefficients, out=self.delta)
+        np.add(self.levels, self.delta, out=self.levels)
+        return self.levels
+
+    def process(self, samples):
+        self.push(samples)
+        return self.compute()
+
+    def reset(self):
+        self.ring.fill(0.0)
+        self.levels.fill(0.0)
+        self.write_pos = 0
@@ -0,0 +1,79 @@
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from audio.vad import EnergyVAD, Segmenter
+
+class StreamingTranscriber:
+    def __init__(self, recognize, translate, on_partial, on_error=None,
+                 sample_rate=16000, frame_ms=30, threshold=300.0,
+                 end_silence_s=2.0, max_workers=2):
+        # Cuts live audio into segments at pauses and recognizes and translates
+        # each segment while the speaker keeps talking. recognize takes
+        # (pcm_bytes, sample_rate, sample_width) and returns text or None;
+        # translate returns (translation, analysis). on_partial receives the
+        # English and Malay text so far, in speaking order, after each segment.
+        self.recognize = recognize
+        self.translate = translate
+        self.on_partial = on_partial
+        self.on_error = on_error
+        self.sample_rate = sample_rate
+        self.vad = EnergyVAD(sample_rate=sample_rate, frame_ms=frame_ms, threshold=threshold)
+        self.segmenter = Segmenter(self.vad)
+        self.end_silence_s = end_silence_s
+        self.max_workers = max_workers
+        self.english = []
+        self.malay = []
+
+    def run(self, reader, stop_event=None):
+        # Read 16-bit frames from a capture RingReader until the speaker has
+        # been quiet for end_silence_s after talking, or stop_event is set
+        frame_size = self.vad.frame_size
+        pending = deque()
+        spoken = False
+        last_activity = time.monotonic()
+        self.segmenter.reset()
+        self.english, self.malay = [], []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while stop_event is None or not stop_event.is_set():
+                frame = reader.read(frame_size, timeout=0.5)
+                if len(frame) == frame_size:
+                    segment = self.segmenter.feed(frame)
+                    if segment is not None:
+                        pending.append(executor.submit(self._recognize_segment, segment))
+                    if self.segmenter.in_speech:
+                        spoken = True
+                        last_activity = time.monotonic()
+                self._deliver(pending, wait=False)
+                if (spoken and not self.segmenter.in_speech and not pending
+                        and time.monotonic() - last_activity > self.end_silence_s):
+                    break
+
+            segment = self.segmenter.flush()
+            if segment is not None:
+                pending.append(executor.submit(self._recognize_segment, segment))
+            self._deliver(pending, wait=True)
+
+        return ' '.join(self.english), ' '.join(self.malay)
+
+    def _recognize_segment(self, segment):
+        return self.recognize(segment.tobytes(), self.sample_rate, 2)
+
+    def _deliver(self, pending, wait):
+        # Hand results on strictly in speaking order, even when a later
+        # segment finishes recognition before an earlier one
+        while pending and (wait or pending[0].done()):
+            future = pending.popleft()
+            try:
+                text = future.result()
+            except Exception as error:
+                if self.on_error is not None:
+                    self.on_error(error)
+                continue
+            if not text:
+                continue
+            translation, analysis = self.translate(text)
+            self.english.append(text)
+            self.malay.append(translation)
+            self.on_partial(' '.join(self.english), ' '.join(self.malay), analysis or {})
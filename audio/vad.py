@@ -0,0 +1,82 @@
+import numpy as np
+
+class EnergyVAD:
+    def __init__(self, sample_rate=16000, frame_ms=30, threshold=300.0, zcr_noise=0.25):
+        # Frame-level voice activity detection on 16-bit mono audio. A frame is
+        # speech when its RMS energy is over threshold (the same scale as
+        # speech_recognition's energy_threshold). Frames that are only just over
+        # it but cross zero very often are treated as hiss rather than voice.
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.threshold = threshold
+        self.zcr_noise = zcr_noise
+
+    def features(self, frame):
+        samples = frame.astype(np.float64)
+        energy = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+        signs = np.signbit(frame)
+        zcr = float(np.count_nonzero(signs[1:] != signs[:-1])) / max(len(frame) - 1, 1)
+        return energy, zcr
+
+    def is_speech(self, frame):
+        energy, zcr = self.features(frame)
+        if energy <= self.threshold:
+            return False
+        return not (zcr > self.zcr_noise and energy < 2 * self.threshold)
+
+class Segmenter:
+    def __init__(self, vad, hangover_ms=300, preroll_ms=150, min_speech_ms=120, max_segment_s=8.0):
+        # Turns a stream of fixed-size frames into speech segments. A segment
+        # starts at the first speech frame (plus a little pre-roll so onsets
+        # are not clipped) and is cut after hangover_ms of non-speech, so
+        # segments end at the pauses between phrases. Very long stretches of
+        # speech are cut at max_segment_s so partial results keep flowing.
+        self.vad = vad
+        frame_ms = 1000.0 * vad.frame_size / vad.sample_rate
+        self.hangover_frames = max(1, int(hangover_ms / frame_ms))
+        self.preroll_frames = int(preroll_ms / frame_ms)
+        self.min_speech_frames = max(1, int(min_speech_ms / frame_ms))
+        self.max_frames = int(max_segment_s * 1000 / frame_ms)
+        self.reset()
+
+    def reset(self):
+        self.preroll = []
+        self.frames = []
+        self.speech_frames = 0
+        self.silent_run = 0
+        self.in_speech = False
+
+    def feed(self, frame):
+        # Add one frame; returns a finished segment (int16 array) or None
+        speech = self.vad.is_speech(frame)
+        if not self.in_speech:
+            if speech:
+                self.in_speech = True
+                self.frames = self.preroll + [frame]
+                self.preroll = []
+                self.speech_frames = 1
+                self.silent_run = 0
+            else:
+                self.preroll.append(frame)
+                if len(self.preroll) > self.preroll_frames:
+                    self.preroll.pop(0)
+            return None
+
+        self.frames.append(frame)
+        if speech:
+            self.speech_frames += 1
+            self.silent_run = 0
+        else:
+            self.silent_run += 1
+
+        if self.silent_run >= self.hangover_frames or len(self.frames) >= self.max_frames:
+            return self.flush()
+        return None
+
+    def flush(self):
+        # Close the current segment, if it had enough speech to be worth sending
+        frames, speech_frames = self.frames, self.speech_frames
+        self.reset()
+        if not frames or speech_frames < self.min_speech_frames:
+            return None
+        return np.concatenate(frames)
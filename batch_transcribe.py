@@ -0,0 +1,247 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import speech_recognition as sr
+
+# No PyQt5 or pyaudio here: files are decoded with sr.AudioFile, so this runs
+# on headless machines
+from language_processing.translator import translate_and_analyze
+from recognition.backends import BACKEND_ENV_VAR, PcmAudio, RecognitionError, UnrecognizedSpeech, make_backend
+from recognition.pool import RecognitionPool
+
+AUDIO_EXTENSIONS = ('.wav', '.flac', '.aif', '.aiff')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Transcribe and translate recorded audio files in batch, without the GUI")
+    parser.add_argument('inputs', nargs='+',
+                        help="audio files, directories to search, or @list.txt files with one path per line")
+    parser.add_argument('-o', '--output', required=True,
+                        help="JSONL output; also the checkpoint an interrupted run resumes from")
+    parser.add_argument('--overwrite', action='store_true',
+                        help="start over instead of resuming from the output file")
+    parser.add_argument('--retry-errors', action='store_true',
+                        help="when resuming, redo files that failed last time")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="decoder processes")
+    parser.add_argument('--recognizer', default=os.environ.get(BACKEND_ENV_VAR, 'google'),
+                        help="recognizer backend: google, or fake for the offline stand-in")
+    parser.add_argument('--language', default='en-US', help="recognition language (google)")
+    parser.add_argument('--recognition-workers', type=int, default=8,
+                        help="recognition requests in flight at once")
+    parser.add_argument('--deadline', type=float, default=30.0,
+                        help="seconds a recognition request may take, retries included")
+    parser.add_argument('--max-pending', type=int, default=0,
+                        help="files decoded or recognized at once (default: 4 per recognition worker)")
+    parser.add_argument('--progress', type=float, default=5.0,
+                        help="seconds between progress reports on stderr; 0 disables")
+    return parser.parse_args(argv)
+
+def find_audio_files(inputs):
+    # Directories are searched recursively; sorted so reruns see the same order
+    for item in inputs:
+        if item.startswith('@'):
+            with open(item[1:], encoding='utf-8') as handle:
+                for line in handle:
+                    if line.strip():
+                        yield line.strip()
+        elif os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+def load_checkpoint(path, retry_errors):
+    # Paths already in the output. A record cut short by an interrupted write
+    # is dropped from the file so appending starts on a clean line, and with
+    # retry_errors so are the records of files that failed.
+    done = set()
+    if not os.path.exists(path):
+        return done
+    kept = []
+    dropped = False
+    with open(path, 'rb') as handle:
+        for line in handle:
+            try:
+                record = json.loads(line) if line.endswith(b'\n') else None
+            except ValueError:
+                record = None
+            if record is None:
+                dropped = True
+                break
+            if retry_errors and record.get('error'):
+                dropped = True
+                continue
+            kept.append(line)
+            done.add(record['path'])
+    if dropped:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as handle:
+            handle.writelines(kept)
+        os.replace(tmp_path, path)
+    return done
+
+def decode_file(path):
+    # Runs in a worker process: read the whole file as 16-bit PCM
+    started = time.perf_counter()
+    try:
+        with sr.AudioFile(path) as source:
+            audio = sr.Recognizer().record(source)
+        frame_data = audio.get_raw_data(convert_width=2)
+        return frame_data, audio.sample_rate, None, time.perf_counter() - started
+    except Exception as error:
+        return None, None, f"decode failed: {error}", time.perf_counter() - started
+
+class FileJob:
+    def __init__(self, path):
+        # One file on its way through decoding, recognition and translation
+        self.path = path
+        self.started = time.perf_counter()
+        self.ready = threading.Event()
+        self.recognition = None
+        self.recognition_started = None
+        self.record = {'path': path}
+        self.timings = {}
+
+    def decoded(self, result, recognition):
+        # Called on the pool's result thread as soon as decoding finishes, so
+        # recognition starts without waiting for earlier files
+        try:
+            frame_data, sample_rate, error, seconds = result
+            self.timings['decode'] = seconds * 1000
+            if error is not None:
+                self.record['error'] = error
+            else:
+                self.record['audio_seconds'] = len(frame_data) / (2 * sample_rate)
+                self.recognition_started = time.perf_counter()
+                self.recognition = recognition.submit(PcmAudio(frame_data, sample_rate, 2))
+                self.recognition.add_done_callback(self.recognized)
+        except Exception as error:
+            # A corrupt header (sample rate 0) or a pool that is shutting
+            # down fails this file only
+            self.recognition = None
+            self.record['error'] = f"recognition not started: {error}"
+        finally:
+            # finish() waits on this; it must be set whatever happened
+            self.ready.set()
+
+    def recognized(self, future):
+        self.timings['recognize'] = (time.perf_counter() - self.recognition_started) * 1000
+
+    def decode_failed(self, error):
+        self.record['error'] = f"decode failed: {error}"
+        self.ready.set()
+
+    def finish(self):
+        # Wait for recognition, translate, and return the output record
+        self.ready.wait()
+        if self.recognition is not None:
+            try:
+                english = self.recognition.result()
+            except UnrecognizedSpeech:
+                english = ''
+            except RecognitionError as error:
+                english = None
+                self.record['error'] = f"recognition failed: {error}"
+            except Exception as error:
+                # Anything else from the backend or the pool is a failed
+                # recognition of this file, not the end of the batch
+                english = None
+                self.record['error'] = f"recognition failed: {error}"
+            # The done callback can run just after result() returns
+            self.timings.setdefault('recognize', (time.perf_counter() - self.recognition_started) * 1000)
+
+            if english is not None:
+                translate_started = time.perf_counter()
+                malay, analysis = translate_and_analyze(english)
+                self.timings['translate'] = (time.perf_counter() - translate_started) * 1000
+                self.record.update({'english': english, 'malay': malay, 'analysis': analysis})
+
+        self.timings['total'] = (time.perf_counter() - self.started) * 1000
+        self.record['timings_ms'] = {name: round(value, 3) for name, value in self.timings.items()}
+        return self.record
+
+class Progress:
+    def __init__(self, interval, total, stream=sys.stderr):
+        self.interval = interval
+        self.total = total
+        self.stream = stream
+        self.files = 0
+        self.errors = 0
+        self.audio_seconds = 0.0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def add(self, record):
+        self.files += 1
+        self.errors += 1 if record.get('error') else 0
+        self.audio_seconds += record.get('audio_seconds', 0.0)
+        if self.interval <= 0:
+            return
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now)
+
+    def report(self, now=None, final=False):
+        now = now or time.perf_counter()
+        elapsed = max(now - self.started, 1e-9)
+        prefix = "done" if final else "progress"
+        self.stream.write(f"{prefix}: {self.files}/{self.total} files, {self.errors} errors, "
+                          f"{elapsed:.1f}s ({self.files / elapsed:.1f} files/s, "
+                          f"{self.audio_seconds / elapsed:.1f}x real time)\n")
+        self.stream.flush()
+
+def run(args):
+    if args.overwrite and os.path.exists(args.output):
+        os.remove(args.output)
+    done = load_checkpoint(args.output, args.retry_errors)
+    todo = [path for path in dict.fromkeys(find_audio_files(args.inputs)) if path not in done]
+    if done:
+        sys.stderr.write(f"resuming: {len(done)} files already done, {len(todo)} to go\n")
+
+    options = {'language': args.language} if args.recognizer == 'google' else {}
+    recognition = RecognitionPool(make_backend(args.recognizer, **options),
+                                  max_workers=args.recognition_workers,
+                                  max_in_flight=args.recognition_workers, deadline=args.deadline)
+    max_pending = args.max_pending or args.recognition_workers * 4
+    progress = Progress(args.progress, len(todo))
+
+    # Results are written in input order from a bounded window of files in
+    # flight; each line is flushed as written, so the output is the checkpoint
+    with open(args.output, 'a', encoding='utf-8') as out, multiprocessing.Pool(args.workers) as pool:
+        pending = collections.deque()
+
+        def write(job):
+            record = job.finish()
+            out.write(json.dumps(record, ensure_ascii=False) + '\n')
+            out.flush()
+            progress.add(record)
+
+        try:
+            for path in todo:
+                if len(pending) >= max_pending:
+                    write(pending.popleft())
+                job = FileJob(path)
+                pool.apply_async(decode_file, (path,),
+                                 callback=lambda result, job=job: job.decoded(result, recognition),
+                                 error_callback=job.decode_failed)
+                pending.append(job)
+            while pending:
+                write(pending.popleft())
+        finally:
+            recognition.shutdown()
+
+    progress.report(final=True)
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,177 @@
+import argparse
+import collections
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+# Only the translation core is imported here: no PyQt5, pyaudio or
+# speech_recognition, so this runs on headless machines
+from language_processing import translator
+from language_processing.translator import translate_batch
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Translate English text to Malay in batch, without the GUI")
+    parser.add_argument('inputs', nargs='*', default=['-'],
+                        help="input files, or - for stdin (default)")
+    parser.add_argument('-o', '--output', default='-',
+                        help="output file, or - for stdout (default)")
+    parser.add_argument('-f', '--format', choices=['auto', 'text', 'jsonl'], default='auto',
+                        help="input format; auto treats lines starting with { as JSON")
+    parser.add_argument('--field', default='text',
+                        help="JSONL field holding the English text (default: text)")
+    parser.add_argument('--output-format', choices=['text', 'jsonl'], default='jsonl',
+                        help="write one translation per line, or one JSON object per line")
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes; 1 translates in this process")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="lines sent to a worker at a time")
+    parser.add_argument('--max-pending', type=int, default=0,
+                        help="chunks in flight at once (default: 4 per worker)")
+    parser.add_argument('--lexicon', default=None,
+                        help="compiled lexicon to use on top of the built-in word bank")
+    parser.add_argument('--progress', type=float, default=5.0,
+                        help="seconds between throughput reports on stderr; 0 disables")
+    return parser.parse_args(argv)
+
+def read_lines(paths):
+    # Stream lines from every input in turn without reading whole files
+    for path in paths:
+        if path == '-':
+            for line in sys.stdin:
+                yield line
+        else:
+            with open(path, encoding='utf-8') as handle:
+                for line in handle:
+                    yield line
+
+def read_chunks(lines, chunk_size):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def decode_line(line, input_format, field):
+    # (record, text) for one input line; record is None for plain text.
+    # Raises ValueError for a line that is not a usable JSON record.
+    if input_format == 'jsonl' or (input_format == 'auto' and line.lstrip().startswith('{')):
+        record = json.loads(line)
+        if not isinstance(record, dict):
+            raise ValueError("record is not a JSON object")
+        text = record.get(field) or ''
+        if not isinstance(text, str):
+            raise ValueError(f"field {field!r} is not a string")
+        return record, text
+    return None, line
+
+def translate_chunk(lines, first_line, input_format, field, output_format):
+    # Runs in a worker process: decode, translate and encode a chunk so only
+    # plain strings cross the process boundary. first_line is the input line
+    # number of lines[0], for error records.
+    records = []
+    texts = []
+    errors = {}
+    for number, line in enumerate(lines, first_line):
+        line = line.rstrip('\r\n')
+        try:
+            record, text = decode_line(line, input_format, field)
+        except ValueError as error:
+            # One bad line must not end a run over millions; it gets an error
+            # record in its place and translation carries on
+            errors[len(records)] = {'line': number, 'error': str(error)}
+            record, text = None, ''
+        records.append(record)
+        texts.append(text)
+
+    output = []
+    for index, (record, text, (malay, analysis)) in enumerate(zip(records, texts, translate_batch(texts))):
+        if index in errors:
+            # An empty line keeps text output aligned with the input
+            output.append('' if output_format == 'text' else json.dumps(errors[index], ensure_ascii=False))
+            continue
+        if output_format == 'text':
+            output.append(malay.replace('\n', ' '))
+            continue
+        if record is None:
+            record = {field: text}
+        record['malay'] = malay
+        record['analysis'] = analysis
+        output.append(json.dumps(record, ensure_ascii=False))
+    return output
+
+class Throughput:
+    def __init__(self, interval, stream=sys.stderr):
+        self.interval = interval
+        self.stream = stream
+        self.lines = 0
+        self.started = time.perf_counter()
+        self.last_report = self.started
+
+    def add(self, count):
+        self.lines += count
+        if self.interval <= 0:
+            return
+        now = time.perf_counter()
+        if now - self.last_report >= self.interval:
+            self.last_report = now
+            self.report(now)
+
+    def report(self, now=None, final=False):
+        now = now or time.perf_counter()
+        elapsed = max(now - self.started, 1e-9)
+        prefix = "done" if final else "progress"
+        self.stream.write(f"{prefix}: {self.lines} lines in {elapsed:.2f}s "
+                          f"({self.lines / elapsed:.0f} lines/s)\n")
+        self.stream.flush()
+
+def run(args):
+    if args.lexicon:
+        # Workers started with spawn re-import the translator and pick the
+        # lexicon up from the environment; forked workers share the mapping
+        os.environ[translator.LEXICON_ENV_VAR] = args.lexicon
+        translator.load_lexicon(args.lexicon)
+
+    chunks = read_chunks(read_lines(args.inputs), args.chunk_size)
+    options = (args.format, args.field, args.output_format)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    throughput = Throughput(args.progress)
+
+    def write(results):
+        if results:
+            out.write('\n'.join(results))
+            out.write('\n')
+        throughput.add(len(results))
+
+    try:
+        if args.workers <= 1:
+            for index, chunk in enumerate(chunks):
+                write(translate_chunk(chunk, index * args.chunk_size + 1, *options))
+        else:
+            # Keep a bounded window of chunks in flight and collect them in
+            # submission order, so output order matches input order and memory
+            # does not grow with the size of the input
+            max_pending = args.max_pending or args.workers * 4
+            pending = collections.deque()
+            with multiprocessing.Pool(args.workers) as pool:
+                for index, chunk in enumerate(chunks):
+                    if len(pending) >= max_pending:
+                        write(pending.popleft().get())
+                    pending.append(pool.apply_async(translate_chunk, (chunk, index * args.chunk_size + 1) + options))
+                while pending:
+                    write(pending.popleft().get())
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        else:
+            out.flush()
+
+    throughput.report(final=True)
+
+if __name__ == "__main__":
+    run(parse_args())
@@ -0,0 +1,91 @@
+import argparse
+import random
+import time
+
+from language_processing.cfg import CATEGORY_TABLE, NO_CATEGORIES, RULES, TERMINALS
+from language_processing.earley import EarleyParser, fill_tree
+from language_processing.tokenizer import TOKENIZER
+
+# Run from the repository root:
+#   python -m benchmarks.bench_cfg_parse
+# Times the Earley chart parser on long dictation-style utterances, with the
+# parse memo cleared before every call (cold) and left in place (warm). The
+# app's grammar only derives single short sentences, so the benchmark parses
+# against it plus one recursive rule, D -> S | D and S, and the utterances are
+# clauses the grammar accepts joined by "and". Chart items per parse and the
+# share of utterances accepted are printed next to the timings; a run whose
+# utterances are rejected early would show a tiny chart and 0% accepted.
+
+DISCOURSE_RULES = dict(RULES, D=(('S',), ('D', 'CONJ', 'S')))
+
+def make_clause(rng):
+    # One sentence the grammar accepts: NP VP with every alternative in use
+    def words(category):
+        return [rng.choice(sorted(TERMINALS[category]))]
+    subject = rng.choice([words('DET') + words('N'), words('PRO'), words('N')])
+    predicate = rng.choice([words('V'), words('V') + words('DET') + words('N'),
+                            words('V') + words('PRO'), words('V') + words('ADJ')])
+    return subject + predicate
+
+def make_utterances(length, count, rng):
+    utterances = []
+    for _ in range(count):
+        tokens = make_clause(rng)
+        while len(tokens) < length:
+            tokens += ['and'] + make_clause(rng)
+        utterances.append(tokens)
+    return utterances
+
+def categories(tokens):
+    table = CATEGORY_TABLE
+    found = []
+    for token, token_id in zip(tokens, TOKENIZER.ids(tokens)):
+        found.append(frozenset(['CONJ']) if token == 'and'
+                     else table[token_id] if token_id < len(table) else NO_CATEGORIES)
+    return found
+
+def time_parses(parser, utterances, cold):
+    started = time.perf_counter()
+    for tokens, cats in utterances:
+        if cold:
+            parser.memo.clear()
+        template = parser.parse(cats)
+        if template is not None:
+            fill_tree(template, tokens)
+    return (time.perf_counter() - started) / len(utterances)
+
+def chart_size(parser, utterances):
+    # Mean chart items per cold parse and the share of utterances accepted
+    items = 0
+    accepted = 0
+    for tokens, cats in utterances:
+        parser.memo.clear()
+        accepted += parser.parse(cats) is not None
+        items += sum(len(column) for column in parser.local.chart[:len(cats) + 1])
+    return items / len(utterances), accepted / len(utterances)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CFG chart parser")
+    parser.add_argument('--lengths', default='5,50,100,150,200',
+                        help="comma-separated utterance lengths in tokens (clauses are added until reached)")
+    parser.add_argument('--count', type=int, default=500, help="utterances per length")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    earley = EarleyParser(DISCOURSE_RULES, start='D')
+    print(f"{'tokens':>8} {'chart items':>12} {'accepted':>9} {'cold us/parse':>15} "
+          f"{'warm us/parse':>15} {'cold us/token':>15} {'items/token':>12}")
+    for length in (int(value) for value in args.lengths.split(',')):
+        utterances = [(tokens, categories(tokens)) for tokens in make_utterances(length, args.count, rng)]
+        tokens_per = sum(len(tokens) for tokens, _ in utterances) / len(utterances)
+        items, accepted = chart_size(earley, utterances)
+        cold = time_parses(earley, utterances, cold=True)
+        # Same utterances again with the memo left in place
+        time_parses(earley, utterances, cold=False)
+        warm = time_parses(earley, utterances, cold=False)
+        print(f"{tokens_per:>8.0f} {items:>12.0f} {accepted:>9.0%} {cold * 1e6:>15.1f} "
+              f"{warm * 1e6:>15.1f} {cold * 1e6 / tokens_per:>15.2f} {items / tokens_per:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+import argparse
+import random
+import time
+import tracemalloc
+
+from language_processing.fuzzy import FuzzyIndex, edit_distance
+
+# Run from the repository root:
+#   python -m benchmarks.bench_fuzzy
+#   python -m benchmarks.bench_fuzzy --sizes 1000,10000,100000 --max-distance 2
+# Builds the fuzzy-correction index over synthetic vocabularies of growing
+# size and times lookups of misspelled words. Lookup cost follows the number
+# of vocabulary words within the distance limit of the query, and that grows
+# with the vocabulary: a denser vocabulary leaves more real words near any
+# misspelling, and each of them is a candidate to verify and return. The
+# matches column shows it, and lookup time grows with it; a linear scan,
+# timed for the smaller sizes, grows with the size itself. The build is
+# timed untraced; its memory comes from a second, traced build.
+
+LETTERS = 'etaoinshrdlcumwfgypbvkjxqz'
+
+# Pieces of English-looking words. Real vocabularies are built from syllables
+# and suffixes, so near neighbours are far rarer than among random strings
+# of the same length, which fill the short end of the space almost solidly.
+ONSETS = ('', 'b', 'bl', 'br', 'c', 'ch', 'cl', 'cr', 'd', 'dr', 'f', 'fl', 'fr', 'g', 'gl', 'gr', 'h',
+          'j', 'k', 'l', 'm', 'n', 'p', 'pl', 'pr', 'qu', 'r', 's', 'sh', 'sk', 'sl', 'sp', 'st', 'str',
+          't', 'th', 'tr', 'v', 'w', 'wh', 'y', 'z')
+VOWELS = ('a', 'e', 'i', 'o', 'u', 'ai', 'ea', 'ee', 'oo', 'ou', 'ie', 'oa', 'y')
+CODAS = ('', '', 'b', 'ck', 'd', 'f', 'g', 'k', 'l', 'll', 'm', 'n', 'nd', 'ng', 'nk', 'nt', 'p', 'r',
+         'rd', 'rt', 's', 'ss', 'st', 't', 'th', 'x', 'ch', 'sh')
+SUFFIXES = ('', '', '', '', 's', 'ed', 'ing', 'er', 'ly', 'tion', 'ness', 'ment', 'able')
+
+def make_word(rng):
+    syllables = rng.choices((1, 2, 3, 4), (3, 4, 2, 1))[0]
+    return ''.join(rng.choice(ONSETS) + rng.choice(VOWELS) + rng.choice(CODAS)
+                   for _ in range(syllables)) + rng.choice(SUFFIXES)
+
+def make_vocabulary(size, rng):
+    words = set()
+    while len(words) < size:
+        word = make_word(rng)
+        if 3 <= len(word) <= 14:
+            words.add(word)
+    return sorted(words)
+
+def load_vocabulary(path, size, rng):
+    # Lowercase alphabetic words from a word list, one per line
+    with open(path, encoding='utf-8', errors='ignore') as handle:
+        words = sorted({line.strip().lower() for line in handle if line.strip().isalpha()})
+    return sorted(rng.sample(words, size)) if size < len(words) else words
+
+def misspell(word, edits, rng):
+    letters = list(word)
+    for _ in range(edits):
+        i = rng.randrange(len(letters))
+        operation = rng.randrange(4)
+        if operation == 0:
+            letters.insert(i, rng.choice(LETTERS))
+        elif operation == 1 and len(letters) > 1:
+            del letters[i]
+        elif operation == 2:
+            letters[i] = rng.choice(LETTERS)
+        elif i + 1 < len(letters):
+            letters[i], letters[i + 1] = letters[i + 1], letters[i]
+    return ''.join(letters)
+
+def linear_lookup(index, vocabulary, word):
+    limit = index.distance_limit(len(word))
+    return [candidate for candidate in vocabulary if edit_distance(word, candidate, limit) <= limit]
+
+def time_per_query(func, queries):
+    started = time.perf_counter()
+    for query in queries:
+        func(query)
+    return (time.perf_counter() - started) / len(queries)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark fuzzy word lookup against vocabulary size")
+    parser.add_argument('--sizes', default='100,1000,10000,100000', help="comma-separated vocabulary sizes")
+    parser.add_argument('--max-distance', type=int, default=2)
+    parser.add_argument('--queries', type=int, default=2000, help="misspelled lookups per size")
+    parser.add_argument('--linear-up-to', type=int, default=10000,
+                        help="also time a linear scan for vocabularies up to this size")
+    parser.add_argument('--words', help="word list to sample vocabularies from, e.g. /usr/share/dict/words, "
+                                           "instead of made-up words")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'words':>8} {'deletes':>9} {'build s':>8} {'index MiB':>10} "
+          f"{'lookup us':>10} {'matches':>8} {'hit rate':>9} {'linear us':>10}")
+    for size in (int(value) for value in args.sizes.split(',')):
+        vocabulary = load_vocabulary(args.words, size, rng) if args.words else make_vocabulary(size, rng)
+        started = time.perf_counter()
+        index = FuzzyIndex(vocabulary, max_distance=args.max_distance)
+        build = time.perf_counter() - started
+        del index
+        tracemalloc.start()
+        index = FuzzyIndex(vocabulary, max_distance=args.max_distance)
+        memory = tracemalloc.get_traced_memory()[0] / (1 << 20)
+        tracemalloc.stop()
+
+        targets = [rng.choice(vocabulary) for _ in range(args.queries)]
+        queries = [misspell(word, rng.randint(1, args.max_distance), rng) for word in targets]
+        lookup = time_per_query(index.lookup, queries)
+        results = [index.lookup(query) for query in queries]
+        matches = sum(len(found) for found in results) / len(queries)
+        hits = sum(any(candidate == target for candidate, _, _ in found)
+                   for found, target in zip(results, targets))
+        linear = ''
+        if size <= args.linear_up_to:
+            sample = queries[:max(args.queries * 100 // size, 20)]
+            linear = f"{time_per_query(lambda query: linear_lookup(index, vocabulary, query), sample) * 1e6:.1f}"
+        print(f"{size:>8} {len(index.deletes):>9} {build:>8.2f} {memory:>10.1f} "
+              f"{lookup * 1e6:>10.1f} {matches:>8.1f} {hits / len(queries):>9.1%} {linear:>10}")
+
+if __name__ == "__main__":
+    main()
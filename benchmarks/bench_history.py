@@ -0,0 +1,115 @@
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+# The history view renders offscreen, so no display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from PyQt5.QtCore import QModelIndex
+from PyQt5.QtWidgets import QApplication
+
+from history import HistoryStore
+from ui.history_view import HistoryModel, HistoryView
+from word_bank import WORD_BANK
+
+# Run from the repository root:
+#   python -m benchmarks.bench_history
+#   python -m benchmarks.bench_history --entries 100000 --page-size 256
+# Fills a fresh history database with synthetic translations through the
+# batched writer, then scrolls the history view over it from top to bottom
+# and back and runs full-text searches. Reports the time per scroll step and per
+# search, and the model's memory, which should stay flat as rows scroll by.
+
+SEARCHES = ('kawan', 'good morn', 'terima kasih buku', 'sedih besar kecil', 'zzzz')
+
+def make_entries(count, rng):
+    phrases = list(WORD_BANK.items())
+    entries = []
+    for _ in range(count):
+        chosen = rng.sample(phrases, rng.randint(2, 6))
+        entries.append((' '.join(english for english, _ in chosen), ' '.join(malay for _, malay in chosen)))
+    return entries
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95)] * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the translation history store and list model")
+    parser.add_argument('--entries', type=int, default=100000)
+    parser.add_argument('--page-size', type=int, default=256)
+    parser.add_argument('--step', type=int, default=40, help="rows per scroll step")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    app = QApplication([])
+    rng = random.Random(args.seed)
+    entries = make_entries(args.entries, rng)
+    with tempfile.TemporaryDirectory() as directory:
+        store = HistoryStore(os.path.join(directory, 'history.sqlite3'))
+        started = time.perf_counter()
+        for english, malay in entries:
+            store.add(english, malay)
+        queued = time.perf_counter() - started
+        store.flush()
+        stored = time.perf_counter() - started
+        print(f"insert: {args.entries} entries queued in {queued * 1000:.0f} ms "
+              f"({queued / args.entries * 1e6:.2f} us each on the caller), "
+              f"stored in {stored:.2f} s ({args.entries / stored:.0f}/s)")
+
+        started = time.perf_counter()
+        model = HistoryModel(store, page_size=args.page_size)
+        view = HistoryView()
+        view.resize(400, 600)
+        view.setModel(model)
+        view.show()
+        app.processEvents()
+        print(f"open: first page shown in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+        # Scroll down to the last row a step at a time, fetching pages as the
+        # view reaches them, then back up with memory traced
+        rows = list(range(0, args.entries, args.step))
+        steps = []
+        for row in rows:
+            started = time.perf_counter()
+            while row >= model.rowCount() and model.canFetchMore(QModelIndex()):
+                model.fetchMore(QModelIndex())
+            view.scrollTo(model.index(row))
+            view.viewport().repaint()
+            steps.append(time.perf_counter() - started)
+        down50, down95 = percentiles(steps)
+        steps = []
+        memory = []
+        tracemalloc.start()
+        for row in rows[::-1]:
+            started = time.perf_counter()
+            view.scrollTo(model.index(row))
+            view.viewport().repaint()
+            steps.append(time.perf_counter() - started)
+            memory.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        up50, up95 = percentiles(steps)
+        print(f"scroll: {len(rows)} steps each way over {model.rowCount()} rows; "
+              f"down p50 {down50:.2f} ms, p95 {down95:.2f} ms; up p50 {up50:.2f} ms, p95 {up95:.2f} ms")
+        print(f"memory: {memory[0] / 1024:.0f} KiB traced after the first step up, {max(memory) / 1024:.0f} KiB "
+              f"at most; {len(model.pages)} pages, {len(model.cache)} cached")
+
+        for text in SEARCHES:
+            timings = []
+            for _ in range(5):
+                model.set_search('')
+                started = time.perf_counter()
+                model.set_search(text)
+                view.viewport().repaint()
+                timings.append(time.perf_counter() - started)
+            print(f"search {text!r:>13}: {min(timings) * 1000:6.2f} ms, first page {model.rowCount()} rows")
+
+        view.close()
+        store.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import argparse
+import os
+import time
+from concurrent.futures import wait
+
+from recognition.backends import FakeBackend, PcmAudio, RecognitionError
+from recognition.pool import RecognitionPool
+
+# Run from the repository root:
+#   python -m benchmarks.bench_recognition_pool
+# Load-tests RecognitionPool against the local FakeBackend (no network), with
+# and without hedged requests, and reports throughput and tail latency.
+
+def make_clips(count, seconds=1.0, rate=16000):
+    # Distinct non-silent clips so the fake backend returns varied transcripts
+    return [PcmAudio(os.urandom(int(seconds * rate) * 2), rate) for _ in range(count)]
+
+def run(pool, clips):
+    started = time.perf_counter()
+    futures = [pool.submit(clip) for clip in clips]
+    wait(futures)
+    elapsed = time.perf_counter() - started
+    errors = sum(1 for future in futures if isinstance(future.exception(), RecognitionError))
+    return elapsed, errors
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the recognition pool offline")
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=16)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--tail-rate', type=float, default=0.05)
+    parser.add_argument('--tail-latency', type=float, default=1.0)
+    parser.add_argument('--failure-rate', type=float, default=0.02)
+    parser.add_argument('--hedge-after', type=float, default=0.15)
+    parser.add_argument('--deadline', type=float, default=3.0)
+    args = parser.parse_args()
+
+    clips = make_clips(args.requests)
+    print(f"{'mode':>10} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7} {'hedges':>7} {'retries':>8}")
+    for mode, hedge_after in (('plain', None), ('hedged', args.hedge_after)):
+        backend = FakeBackend(latency=args.latency, tail_rate=args.tail_rate,
+                              tail_latency=args.tail_latency, failure_rate=args.failure_rate)
+        pool = RecognitionPool(backend, max_workers=args.workers, max_in_flight=args.workers,
+                               deadline=args.deadline, hedge_after=hedge_after)
+        elapsed, errors = run(pool, clips)
+        stats = pool.stats()
+        pool.shutdown()
+        print(f"{mode:>10} {len(clips) / elapsed:>8.1f} {stats['p50'] * 1000:>8.0f} {stats['p95'] * 1000:>8.0f} "
+              f"{stats['p99'] * 1000:>8.0f} {errors:>7} {stats['hedges']:>7} {stats['retries']:>8}")
+
+if __name__ == "__main__":
+    main()
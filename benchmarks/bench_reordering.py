@@ -0,0 +1,85 @@
+import argparse
+import random
+import time
+
+from language_processing.reordering import DEFAULT_RULES, RuleEngine, parse_rule
+
+# Run from the repository root:
+#   python -m benchmarks.bench_reordering
+#   python -m benchmarks.bench_reordering --rules 10,100,1000,10000 --length 40
+# Times the compiled reordering automaton against applying the same rules one
+# at a time, as rule sets grow. Random rules over a synthetic tag set are
+# added to the built-in ones; both paths must pick the same rewrites.
+
+TAGS = ('PRO', 'ART', 'POSS', 'DEM', 'V', 'ADJ', 'N', 'X') + tuple(f"T{i}" for i in range(24))
+
+def make_rules(count, rng):
+    rules = list(DEFAULT_RULES[:count])
+    patterns = {parse_rule(rule)[0] for rule in rules}
+    while len(rules) < count:
+        pattern = tuple(rng.choice(TAGS) for _ in range(rng.randint(2, 5)))
+        if pattern in patterns:
+            continue
+        patterns.add(pattern)
+        rewrite = list(pattern)
+        rng.shuffle(rewrite)
+        rules.append(f"{' '.join(pattern)} -> {' '.join(rewrite)}")
+    return rules
+
+def naive_order(rules, tags):
+    # One scan of the sentence per rule, then the same leftmost-longest choice
+    best = {}
+    n = len(tags)
+    for pattern, order in rules:
+        length = len(pattern)
+        for start in range(n - length + 1):
+            if tuple(tags[start:start + length]) == pattern and len(best.get(start, ())) < length:
+                best[start] = order
+    if not best:
+        return None
+    positions = []
+    i = 0
+    while i < n:
+        order = best.get(i)
+        if order is None:
+            positions.append(i)
+            i += 1
+        else:
+            positions.extend(i + offset for offset in order)
+            i += len(order)
+    return positions
+
+def time_per_sentence(func, sentences):
+    started = time.perf_counter()
+    for tags in sentences:
+        func(tags)
+    return (time.perf_counter() - started) / len(sentences)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the reordering rule engine against rule count")
+    parser.add_argument('--rules', default='9,100,1000,5000', help="comma-separated rule counts")
+    parser.add_argument('--length', type=int, default=20, help="tags per sentence")
+    parser.add_argument('--count', type=int, default=500, help="sentences per rule count")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # Mostly real tags so the built-in rules fire too
+    weights = [4] * 8 + [1] * (len(TAGS) - 8)
+    sentences = [rng.choices(TAGS, weights, k=args.length) for _ in range(args.count)]
+    print(f"{'rules':>7} {'states':>8} {'compile ms':>11} {'compiled us/sent':>17} {'per-rule us/sent':>17}")
+    for count in (int(value) for value in args.rules.split(',')):
+        rules = make_rules(count, rng)
+        started = time.perf_counter()
+        engine = RuleEngine(rules)
+        compile_ms = (time.perf_counter() - started) * 1000
+        parsed = [parse_rule(rule) for rule in rules]
+        for tags in sentences:
+            assert engine.order(tags) == naive_order(parsed, tags)
+        compiled = time_per_sentence(engine.order, sentences)
+        naive = time_per_sentence(lambda tags: naive_order(parsed, tags), sentences)
+        print(f"{count:>7} {len(engine.transitions):>8} {compile_ms:>11.1f} "
+              f"{compiled * 1e6:>17.2f} {naive * 1e6:>17.2f}")
+
+if __name__ == "__main__":
+    main()
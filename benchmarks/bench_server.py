@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+from translation_server import MessageReader, encode_frame
+
+# Run from the repository root:
+#   python translation_server.py &
+#   python -m benchmarks.bench_server --connections 64 --duration 10
+#   python -m benchmarks.bench_server --ws --connections 16 --window 32
+# Load-tests the translation service on localhost over HTTP keep-alive
+# connections or WebSockets and reports throughput and latency percentiles.
+# --spawn starts a server for the run and stops it afterwards.
+
+SENTENCES = ["i eat rice", "you drink water", "hello", "good morning", "what is your name",
+             "he reads a book", "we like cats", "they see the house", "she writes a letter"]
+
+def make_text(rng):
+    # Repeats plus some never-seen sentences, so both cache hits and misses show
+    if rng.random() < 0.5:
+        return rng.choice(SENTENCES)
+    return f"{rng.choice(SENTENCES)} number {rng.randrange(1 << 30)}"
+
+async def http_client(host, port, path, deadline, latencies, errors, rng):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            body = json.dumps({'text': make_text(rng)}).encode('utf-8')
+            started = time.perf_counter()
+            writer.write((f"POST {path} HTTP/1.1\r\nHost: {host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode('latin-1') + body)
+            await writer.drain()
+            head = await reader.readuntil(b'\r\n\r\n')
+            length = 0
+            for line in head.decode('latin-1').split('\r\n')[1:]:
+                if line.lower().startswith('content-length:'):
+                    length = int(line.split(':', 1)[1])
+            await reader.readexactly(length)
+            if not head.startswith(b'HTTP/1.1 200'):
+                errors.append(head.split(b'\r\n', 1)[0])
+                continue
+            latencies.append(time.perf_counter() - started)
+    finally:
+        writer.close()
+
+async def ws_client(host, port, op, window, deadline, latencies, errors, rng):
+    # Keeps up to window messages outstanding on one WebSocket
+    reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode('ascii')
+    writer.write((f"GET /ws HTTP/1.1\r\nHost: {host}\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                  f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode('latin-1'))
+    await writer.drain()
+    head = await reader.readuntil(b'\r\n\r\n')
+    if not head.startswith(b'HTTP/1.1 101'):
+        errors.append(head.split(b'\r\n', 1)[0])
+        writer.close()
+        return
+
+    messages = MessageReader(reader)
+    sent = {}
+    next_id = 0
+    try:
+        while time.perf_counter() < deadline or sent:
+            while len(sent) < window and time.perf_counter() < deadline:
+                message = json.dumps({'id': next_id, 'op': op, 'text': make_text(rng)}).encode('utf-8')
+                sent[next_id] = time.perf_counter()
+                writer.write(encode_frame(0x1, message, mask=os.urandom(4)))
+                next_id += 1
+            await writer.drain()
+            _, payload = await messages.read()
+            reply = json.loads(payload)
+            started = sent.pop(reply['id'], None)
+            if started is not None:
+                latencies.append(time.perf_counter() - started)
+        writer.write(encode_frame(0x8, b'\x03\xe8', mask=os.urandom(4)))
+        await writer.drain()
+    finally:
+        writer.close()
+
+def percentile(values, q):
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+async def run(args):
+    rng = random.Random(args.seed)
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + args.duration
+    if args.ws:
+        clients = [ws_client(args.host, args.port, args.op, args.window, deadline, latencies, errors,
+                             random.Random(rng.random())) for _ in range(args.connections)]
+    else:
+        clients = [http_client(args.host, args.port, f"/{args.op}", deadline, latencies, errors,
+                               random.Random(rng.random())) for _ in range(args.connections)]
+    started = time.perf_counter()
+    await asyncio.gather(*clients)
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    mode = f"WebSocket, window {args.window}" if args.ws else "HTTP keep-alive"
+    print(f"{mode}, {args.connections} connections, {elapsed:.1f}s")
+    print(f"  requests: {len(latencies)}  errors: {len(errors)}  throughput: {len(latencies) / elapsed:.0f} req/s")
+    if latencies:
+        print(f"  latency ms: p50 {percentile(latencies, 0.50) * 1000:.2f}  "
+              f"p95 {percentile(latencies, 0.95) * 1000:.2f}  p99 {percentile(latencies, 0.99) * 1000:.2f}  "
+              f"max {latencies[-1] * 1000:.2f}")
+
+async def wait_for_server(host, port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the translation service on localhost")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--connections', type=int, default=32)
+    parser.add_argument('--duration', type=float, default=10.0, help="seconds")
+    parser.add_argument('--op', choices=['translate', 'analyze'], default='translate')
+    parser.add_argument('--ws', action='store_true', help="use the WebSocket endpoint")
+    parser.add_argument('--window', type=int, default=16, help="outstanding messages per WebSocket")
+    parser.add_argument('--spawn', action='store_true', help="start a server for the run")
+    parser.add_argument('--server-args', default='', help="extra arguments for a spawned server")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = subprocess.Popen([sys.executable, 'translation_server.py', '--host', args.host,
+                                   '--port', str(args.port)] + args.server_args.split())
+    try:
+        if server is not None:
+            asyncio.run(wait_for_server(args.host, args.port))
+        asyncio.run(run(args))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+if __name__ == "__main__":
+    main()
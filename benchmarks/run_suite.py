@@ -0,0 +1,219 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+# The paint benchmarks render offscreen, so no display is needed
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+
+from word_bank import WORD_BANK
+from language_processing import translator
+from language_processing.cfg import CFG
+from language_processing.dfa import DFA
+from language_processing.rescoring import rescore
+
+# Run from the repository root:
+#   python -m benchmarks.run_suite --save-baseline baseline.json   (once, on this machine)
+#   python -m benchmarks.run_suite --baseline baseline.json        (after a change)
+# Times the translation core over synthetic corpora and the visualizer's audio
+# and paint paths offscreen, with no microphone or network. Compared with a
+# baseline, the run exits with status 1 if any case got slower, allocates
+# more or renders frames more slowly than the tolerance allows. Baselines are
+# machine-specific, so none is checked in.
+
+BASELINE_VERSION = 1
+
+SENTENCE_LENGTHS = (4, 12, 32)
+EXTRA_VOCABULARY = (0, 10000)
+
+def make_corpus(length, extra_vocabulary, count, rng):
+    # Sentences of word bank words mixed with made-up out-of-vocabulary words;
+    # half of them open with a pronoun and verb so they reach the full parse
+    words = sorted(word for phrase in WORD_BANK for word in phrase.split())
+    unknown = [f"word{i}" for i in range(extra_vocabulary)]
+    vocabulary = words + unknown
+    sentences = []
+    for i in range(count):
+        head = ['i', rng.choice(['eat', 'see', 'like', 'want'])] if i % 2 == 0 else []
+        tail = [rng.choice(vocabulary) for _ in range(max(length - len(head), 0))]
+        sentences.append(' '.join(head + tail))
+    return sentences
+
+def measure(func, items, repeats, setup=None):
+    # Best of repeats for speed; one extra traced pass for allocations
+    best = float('inf')
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        started = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - started)
+
+    if setup is not None:
+        setup()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for item in items:
+        func(item)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'ops_per_sec': len(items) / best, 'peak_bytes': peak - baseline}
+
+def core_cases(count, repeats, rng):
+    cfg = CFG()
+    dfa = DFA()
+    for length in SENTENCE_LENGTHS:
+        for extra in EXTRA_VOCABULARY:
+            sentences = make_corpus(length, extra, count, rng)
+            token_lists = [sentence.split() for sentence in sentences]
+            structures = [cfg.parse(tokens)['structure'] for tokens in token_lists]
+            suffix = f"len{length}_vocab+{extra}"
+
+            def clear_memo():
+                cfg.parser.memo.clear()
+
+            # The translation cache is cleared before each pass so every call
+            # does the full tokenize, parse, validate and translate work
+            yield f"translate_to_malay/{suffix}", measure(
+                translator.translate_to_malay, sentences, repeats, setup=translator.TRANSLATION_CACHE.clear)
+            yield f"analyze_text/{suffix}", measure(
+                translator.analyze_text, sentences, repeats, setup=translator.TRANSLATION_CACHE.clear)
+            yield f"cfg_parse/{suffix}", measure(cfg.parse, token_lists, repeats, setup=clear_memo)
+            yield f"dfa_process/{suffix}", measure(dfa.process, structures, repeats)
+
+    sentences = make_corpus(12, 0, count, rng)
+    translator.TRANSLATION_CACHE.clear()
+    for sentence in sentences:
+        translator.translate_to_malay(sentence)
+    yield "translate_to_malay/cached", measure(translator.translate_to_malay, sentences, repeats)
+
+    # N-best rescoring of ten recognizer hypotheses per utterance, uncached;
+    # the budget is under a millisecond per utterance
+    hypotheses = [[(sentence, None) for sentence in sentences[i:i + 10]] for i in range(0, len(sentences), 10)]
+    yield "rescore/10_hypotheses", measure(rescore, hypotheses, repeats, setup=translator.TRANSLATION_CACHE.clear)
+
+def ui_cases(frames, repeats):
+    from PyQt5.QtWidgets import QApplication
+    from audio.capture import CaptureService, SyntheticSource
+    from ui.audio_visualizer import AudioVisualizerDialog
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    capture = CaptureService(SyntheticSource(realtime=False))
+    dialog = AudioVisualizerDialog(capture=capture)
+    dialog.timer.stop()
+
+    # Synthetic microphone blocks: a swept tone over noise, as float32
+    rng = np.random.default_rng(0)
+    rate = capture.rate
+    blocks = []
+    for i in range(frames):
+        t = np.arange(1024) / rate
+        tone = 0.3 * np.sin(2 * np.pi * (200 + 40 * i) * t)
+        blocks.append((tone + 0.05 * rng.standard_normal(1024)).astype(np.float32))
+
+    yield "visualizer_process_audio", measure(dialog.process_audio, blocks, repeats)
+
+    # Frame times for a full synchronous repaint of the dialog while listening
+    dialog.show()
+    app.processEvents()
+    dialog.is_listening = True
+
+    def render(block):
+        dialog.process_audio(block)
+        dialog.repaint()
+
+    result = measure(render, blocks, repeats)
+    frame_times = []
+    for block in blocks:
+        started = time.perf_counter()
+        render(block)
+        frame_times.append(time.perf_counter() - started)
+    frame_times.sort()
+    result['frame_p50_ms'] = frame_times[len(frame_times) // 2] * 1000
+    result['frame_p95_ms'] = frame_times[int(len(frame_times) * 0.95)] * 1000
+    yield "visualizer_paint", result
+
+    dialog.is_listening = False
+    dialog.close()
+    capture.close()
+
+def compare(results, baseline, tolerance, alloc_slack):
+    # Returns a list of regression messages
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+            regressions.append(f"{name}: {result['ops_per_sec']:.0f} ops/s, baseline {base['ops_per_sec']:.0f}")
+        if result['peak_bytes'] > base['peak_bytes'] * (1 + tolerance) + alloc_slack:
+            regressions.append(f"{name}: peak {result['peak_bytes']} bytes allocated, baseline {base['peak_bytes']}")
+        if 'frame_p95_ms' in base and result['frame_p95_ms'] > base['frame_p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 frame {result['frame_p95_ms']:.2f} ms, baseline {base['frame_p95_ms']:.2f}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the benchmark suite and compare with a baseline")
+    parser.add_argument('--baseline', help="baseline JSON to compare against")
+    parser.add_argument('--save-baseline', metavar='PATH', help="write this run's results as a baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="allowed relative slowdown or allocation growth (default: 0.25)")
+    parser.add_argument('--alloc-slack', type=int, default=4096,
+                        help="allocation growth in bytes always allowed (default: 4096)")
+    parser.add_argument('--count', type=int, default=300, help="sentences per corpus")
+    parser.add_argument('--frames', type=int, default=200, help="audio blocks and frames per UI case")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--filter', default='', help="only run cases whose name contains this")
+    parser.add_argument('--no-ui', action='store_true', help="skip the Qt cases")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    cases = core_cases(args.count, args.repeats, rng)
+    results = {}
+    print(f"{'case':<40} {'ops/s':>12} {'peak KiB':>10} {'frame p50/p95 ms':>18}")
+
+    def run_cases(cases):
+        for name, result in cases:
+            if args.filter not in name:
+                continue
+            results[name] = result
+            frames = ''
+            if 'frame_p50_ms' in result:
+                frames = f"{result['frame_p50_ms']:.2f}/{result['frame_p95_ms']:.2f}"
+            print(f"{name:<40} {result['ops_per_sec']:>12.0f} {result['peak_bytes'] / 1024:>10.1f} {frames:>18}")
+
+    run_cases(cases)
+    if not args.no_ui:
+        run_cases(ui_cases(args.frames, args.repeats))
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as handle:
+            json.dump({'version': BASELINE_VERSION, 'python': platform.python_version(),
+                       'machine': platform.platform(), 'cases': results}, handle, indent=2)
+        print(f"Baseline written to {args.save_baseline}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        if baseline.get('version') != BASELINE_VERSION:
+            sys.exit(f"{args.baseline}: unsupported baseline version")
+        if baseline.get('machine') != platform.platform():
+            print(f"warning: baseline was recorded on {baseline.get('machine')}", file=sys.stderr)
+        regressions = compare(results, baseline['cases'], args.tolerance, args.alloc_slack)
+        if regressions:
+            print("REGRESSIONS:", file=sys.stderr)
+            for message in regressions:
+                print(f"  {message}", file=sys.stderr)
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+import queue
+import sqlite3
+import threading
+import time
+
+# Every translation the app shows, kept in SQLite so a long session costs
+# disk rather than memory. Entries are only ever appended. One writer thread
+# owns the write connection and commits queued entries in batches; readers
+# each get their own connection, and in WAL mode they never wait for it.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    english TEXT NOT NULL,
+    malay TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    english, malay, content='history', content_rowid='id', tokenize='unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS history_indexed AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts(rowid, english, malay) VALUES (new.id, new.english, new.malay);
+END;
+"""
+
+COLUMNS = "history.id, history.created, history.english, history.malay, history.source"
+
+# Queued in place of an entry to make the writer thread exit
+_STOP = object()
+
+def search_query(text):
+    # FTS5 query matching entries that contain every word of text, the last
+    # one as a prefix so results follow the user's typing. Words are quoted,
+    # so FTS5 operators and punctuation in text are matched literally.
+    # Returns None when text has no words.
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+class HistoryStore:
+    def __init__(self, path, batch_size=256, flush_interval=0.2, on_commit=None):
+        # on_commit(count) is called on the writer thread after each batch
+        # is committed. flush_interval is how long the writer waits for more
+        # entries before committing a partial batch.
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_commit = on_commit
+
+        connection = self._connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.executescript(SCHEMA)
+        connection.commit()
+        self.writer_connection = connection
+
+        self.readers = threading.local()
+        self.reader_connections = []
+        self.lock = threading.Lock()
+        self.entries = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name='history-writer', daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        # Connections are only ever used by one thread at a time, but close()
+        # runs on another thread, hence check_same_thread=False
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        # With WAL a commit only needs to reach the log; a crash can lose the
+        # last batches but never corrupts the file
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _reader(self):
+        connection = getattr(self.readers, 'connection', None)
+        if connection is None:
+            connection = self._connect()
+            self.readers.connection = connection
+            with self.lock:
+                self.reader_connections.append(connection)
+        return connection
+
+    def add(self, english, malay, source='text', created=None):
+        # Queue an entry and return at once; the writer thread stores it
+        self.entries.put((created if created is not None else time.time(), english, malay, source))
+
+    def flush(self):
+        # Wait until everything added so far is committed
+        self.entries.join()
+
+    def _write_loop(self):
+        while True:
+            entry = self.entries.get()
+            batch = []
+            stopping = entry is _STOP
+            if not stopping:
+                batch.append(entry)
+                # Gather what else arrives in the next moment into the same
+                # transaction; one commit per utterance would cost an fsync each
+                deadline = time.monotonic() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    try:
+                        entry = self.entries.get(timeout=max(deadline - time.monotonic(), 0))
+                    except queue.Empty:
+                        break
+                    if entry is _STOP:
+                        stopping = True
+                        break
+                    batch.append(entry)
+            if batch:
+                with self.writer_connection:
+                    self.writer_connection.executemany(
+                        "INSERT INTO history (created, english, malay, source) VALUES (?, ?, ?, ?)", batch)
+            for _ in range(len(batch) + stopping):
+                self.entries.task_done()
+            if batch and self.on_commit is not None:
+                self.on_commit(len(batch))
+            if stopping:
+                return
+
+    def page(self, before=None, limit=256, search=None):
+        # Up to limit entries older than id before (all entries if before is
+        # None), newest first, as (id, created, english, malay, source).
+        # search is a query from search_query(). Walking by id rather than
+        # by OFFSET keeps every page as fast as the first.
+        where = []
+        params = []
+        if search is not None:
+            table = "history_fts JOIN history ON history.id = history_fts.rowid"
+            where.append("history_fts MATCH ?")
+            params.append(search)
+            key = "history_fts.rowid"
+        else:
+            table = "history"
+            key = "history.id"
+        if before is not None:
+            where.append(f"{key} < ?")
+            params.append(before)
+        sql = f"SELECT {COLUMNS} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {key} DESC LIMIT ?"
+        params.append(limit)
+        return self._reader().execute(sql, params).fetchall()
+
+    def newer(self, after, search=None):
+        # Every entry with an id above after, newest first
+        if search is not None:
+            sql = (f"SELECT {COLUMNS} FROM history_fts JOIN history ON history.id = history_fts.rowid"
+                   " WHERE history_fts MATCH ? AND history_fts.rowid > ? ORDER BY history_fts.rowid DESC")
+            params = (search, after)
+        else:
+            sql = f"SELECT {COLUMNS} FROM history WHERE id > ? ORDER BY id DESC"
+            params = (after,)
+        return self._reader().execute(sql, params).fetchall()
+
+    def last_id(self):
+        return self._reader().execute("SELECT max(id) FROM history").fetchone()[0] or 0
+
+    def __len__(self):
+        return self._reader().execute("SELECT count(*) FROM history").fetchone()[0]
+
+    def close(self):
+        # Commit what is queued and close every connection
+        if self.writer.is_alive():
+            self.entries.put(_STOP)
+            self.writer.join()
+        self.writer_connection.close()
+        with self.lock:
+            for connection in self.reader_connections:
+                connection.close()
+            self.reader_connections = []
+        self.readers = threading.local()
@@ -0,0 +1,207 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# SPEECH_TRANSLATOR_METRICS=1 turns timing on; unset, empty, 0, false, no or
+# off leave it off. When it is off, stage() hands back one shared no-op
+# context manager, so instrumented code pays for a function call and nothing
+# else.
+METRICS_ENV_VAR = 'SPEECH_TRANSLATOR_METRICS'
+
+# Where to write the metrics when the app exits: *.prom for Prometheus text
+# format, anything else for JSON
+METRICS_FILE_ENV_VAR = 'SPEECH_TRANSLATOR_METRICS_FILE'
+
+# Histogram bucket upper bounds in nanoseconds: 4 per decade from 1 us to 100 s
+BUCKET_BOUNDS_NS = [int(1000 * 10 ** (i / 4)) for i in range(33)]
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS_NS) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.min_ns = None
+        self.max_ns = None
+
+    def observe(self, duration_ns):
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS_NS, duration_ns)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        if self.min_ns is None or duration_ns < self.min_ns:
+            self.min_ns = duration_ns
+        if self.max_ns is None or duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def quantile(self, q):
+        # Estimated by linear interpolation inside the bucket holding the
+        # q-th observation, kept within the observed range; returns nanoseconds
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = max(BUCKET_BOUNDS_NS[i - 1] if i > 0 else 0, self.min_ns)
+                upper = min(BUCKET_BOUNDS_NS[i] if i < len(BUCKET_BOUNDS_NS) else self.max_ns, self.max_ns)
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max_ns
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+_NULL_STAGE = _NullStage()
+
+class _Stage:
+    def __init__(self, metrics, name, trace):
+        self.metrics = metrics
+        self.name = name
+        self.trace = trace
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = time.perf_counter_ns()
+        self.metrics.observe(self.name, end - self.start)
+        if self.trace is not None:
+            self.trace.stages.append((self.name, self.start, end))
+        return False
+
+class _AttachedTrace:
+    def __init__(self, metrics, trace):
+        self.metrics = metrics
+        self.trace = trace
+
+    def __enter__(self):
+        self.previous = getattr(self.metrics.local, 'trace', None)
+        self.metrics.local.trace = self.trace
+        return self.trace
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.local.trace = self.previous
+        return False
+
+class UtteranceTrace:
+    def __init__(self, metrics):
+        # Timestamps of every stage one utterance went through. While the
+        # trace is open, stages timed on the same thread are recorded in it.
+        self.metrics = metrics
+        self.stages = []
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        self.metrics.local.trace = self
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.local.trace = None
+        self.metrics.observe('utterance', time.perf_counter_ns() - self.started)
+        self.metrics.finished_trace(self)
+        return False
+
+    def to_dict(self):
+        # Stages timed on other threads can finish out of order
+        return {
+            'stages': [{'stage': name, 'start_ms': (start - self.started) / 1e6,
+                        'duration_ms': (end - start) / 1e6}
+                       for name, start, end in sorted(self.stages, key=lambda stage: stage[1])]
+        }
+
+class Metrics:
+    def __init__(self, enabled=False, keep_traces=100):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.histograms = {}
+        self.traces = deque(maxlen=keep_traces)
+        self.local = threading.local()
+
+    def stage(self, name):
+        # Time a block of code: with METRICS.stage('cfg_parse'): ...
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, getattr(self.local, 'trace', None))
+
+    def utterance(self):
+        # Group the stages of one utterance: with METRICS.utterance(): ...
+        if not self.enabled:
+            return _NULL_STAGE
+        return UtteranceTrace(self)
+
+    def current_trace(self):
+        # The utterance trace open on this thread, if any, to hand to the
+        # threads doing part of the utterance's work
+        return getattr(self.local, 'trace', None)
+
+    def attach(self, trace):
+        # Record this thread's stages in trace, an utterance opened on another
+        # thread: with METRICS.attach(trace): ...
+        if not self.enabled or trace is None:
+            return _NULL_STAGE
+        return _AttachedTrace(self, trace)
+
+    def observe(self, name, duration_ns):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(duration_ns)
+
+    def finished_trace(self, trace):
+        with self.lock:
+            self.traces.append(trace)
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+            self.traces.clear()
+
+    def summary(self):
+        # {stage: {count, mean_ms, p50_ms, p95_ms, p99_ms}}
+        with self.lock:
+            items = sorted(self.histograms.items())
+            result = {}
+            for name, histogram in items:
+                result[name] = {
+                    'count': histogram.count,
+                    'mean_ms': histogram.total_ns / histogram.count / 1e6,
+                    'p50_ms': histogram.quantile(0.50) / 1e6,
+                    'p95_ms': histogram.quantile(0.95) / 1e6,
+                    'p99_ms': histogram.quantile(0.99) / 1e6
+                }
+            return result
+
+    def to_json(self):
+        with self.lock:
+            traces = [trace.to_dict() for trace in self.traces]
+        return json.dumps({'stages': self.summary(), 'recent_utterances': traces}, indent=2)
+
+    def to_prometheus(self, prefix='speech_translator'):
+        name = f"{prefix}_stage_duration_seconds"
+        lines = [f"# HELP {name} Time spent in each pipeline stage",
+                 f"# TYPE {name} histogram"]
+        with self.lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(BUCKET_BOUNDS_NS, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'{name}_bucket{{stage="{stage}",le="{bound / 1e9:g}"}} {cumulative}')
+                lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.total_ns / 1e9:.9f}')
+                lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self, path):
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(text)
+
+METRICS = Metrics(enabled=os.environ.get(METRICS_ENV_VAR, '').strip().lower() not in ('', '0', 'false', 'no', 'off'))
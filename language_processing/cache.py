@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+# Bump whenever the shape of a translation or its analysis changes, so files
+# saved by an older version are not served as if they were current
+CACHE_FORMAT_VERSION = 4
+
+def copy_analysis(value):
+    # Copy of an analysis down to its dicts and lists. Everything else in it
+    # is immutable (strings, numbers, the tuple parse tree) and is shared,
+    # which keeps a hit far cheaper than copy.deepcopy.
+    if isinstance(value, dict):
+        return {key: copy_analysis(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [copy_analysis(item) for item in value]
+    return value
+
+class TranslationCache:
+    def __init__(self, max_size=4096, fingerprint=None):
+        # Bounded LRU map from normalized input to (translation, analysis).
+        # Case and whitespace are folded out of the key by the caller so
+        # repeated utterances share one entry. A max_size of 0 disables caching.
+        # Values are copied in and out, so callers may modify what they get
+        # without changing what the next hit returns.
+        self.max_size = max_size
+        self.fingerprint = fingerprint
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return value[0], copy_analysis(value[1])
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        value = (value[0], copy_analysis(value[1]))
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def resize(self, max_size):
+        with self.lock:
+            self.max_size = max_size
+            while len(self.entries) > max(max_size, 0):
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def set_fingerprint(self, fingerprint):
+        # Entries computed against a different word bank are stale
+        if fingerprint != self.fingerprint:
+            self.clear()
+            self.fingerprint = fingerprint
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self.entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+    def save(self, path):
+        # Written to a temporary file first so a crash never leaves a torn cache
+        with self.lock:
+            data = {
+                'version': CACHE_FORMAT_VERSION,
+                'fingerprint': self.fingerprint,
+                'entries': [[key, value[0], value[1]] for key, value in self.entries.items()]
+            }
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as handle:
+            json.dump(data, handle, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        # Returns the number of entries loaded. Missing, unreadable or stale
+        # files (different format or word bank) are ignored, and so are
+        # truncated or hand-edited ones: the cache just starts empty.
+        try:
+            with open(path, encoding='utf-8') as handle:
+                data = json.load(handle)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as error:
+            sys.stderr.write(f"translation cache {path} not loaded: {error}\n")
+            return 0
+        if not isinstance(data, dict):
+            sys.stderr.write(f"translation cache {path} not loaded: not a JSON object\n")
+            return 0
+        if data.get('version') != CACHE_FORMAT_VERSION or data.get('fingerprint') != self.fingerprint:
+            return 0
+        entries = []
+        try:
+            for key, translation, analysis in data.get('entries', []):
+                if not (isinstance(key, str) and isinstance(translation, str) and isinstance(analysis, dict)):
+                    raise ValueError("malformed entry")
+                entries.append((key, (translation, analysis)))
+        except (TypeError, ValueError) as error:
+            sys.stderr.write(f"translation cache {path} not loaded: {error}\n")
+            return 0
+        for key, value in entries:
+            self.put(key, value)
+        return len(entries)
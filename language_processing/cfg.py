@@ -1,42 +1,144 @@
+from language_processing.earley import EarleyParser, fill_tree
+from language_processing.phrase_index import PhraseIndex
+from language_processing.tokenizer import TOKENIZER, VOCABULARY
+
+GREETINGS = ['hello', 'good morning', 'good afternoon', 'good evening']
+
+# Compiled once per process and shared by every CFG instance
+GREETING_INDEX = PhraseIndex({greeting: 'greeting' for greeting in GREETINGS})
+
+# Define production rules for a simple English sentence structure
+RULES = {
+    'S': (('NP', 'VP'),),                      # Sentence → Noun Phrase + Verb Phrase
+    'NP': (('DET', 'N'), ('PRO',), ('N',),     # Noun Phrase → Determiner + Noun, Pronoun, or bare Noun,
+           ('DET', 'ADJ', 'N'), ('ADJ', 'N')), # optionally with an Adjective before the Noun
+    'VP': (('V',), ('V', 'NP'), ('V', 'ADJ'))  # Verb Phrase → Verb, Verb + Noun Phrase, or Verb + Adjective
+}
+
+# Utterances that are not sentences but still translate on their own, such
+# as "my book" or "your big house": Phrase → Noun Phrase or Adjective
+PHRASE_RULES = dict(RULES, P=(('NP',), ('ADJ',)))
+
+# Define terminal categories
+TERMINALS = {
+    'DET': frozenset(['the', 'a', 'my', 'your', 'this', 'that']),
+    'N': frozenset(['water', 'food', 'friend', 'car', 'house', 'book', 'money', 'love', 'help']),
+    'PRO': frozenset(['i', 'you', 'he', 'she', 'it', 'we', 'they']),
+    'V': frozenset(['is', 'am', 'are', 'want', 'need', 'like', 'love', 'have', 'see']),
+    'ADJ': frozenset(['good', 'bad', 'happy', 'sad', 'big', 'small'])
+}
+
+QUESTION_WORDS = frozenset(['what', 'who', 'where', 'when', 'how', 'why'])
+QUESTION_IDS = frozenset(VOCABULARY.intern(word) for word in QUESTION_WORDS)
+
+NO_CATEGORIES = frozenset()
+
+# Inverted index from a word to every terminal category it belongs to, as a
+# list indexed by vocabulary id. Words interned after this point are not
+# terminals, so ids past the end have no categories.
+CATEGORY_TABLE = [NO_CATEGORIES] * len(VOCABULARY)
+for _category, _words in TERMINALS.items():
+    for _word in _words:
+        _token_id = VOCABULARY.intern(_word)
+        CATEGORY_TABLE.extend([NO_CATEGORIES] * (_token_id + 1 - len(CATEGORY_TABLE)))
+        CATEGORY_TABLE[_token_id] = CATEGORY_TABLE[_token_id] | {_category}
+
+# Chart parsers over RULES and PHRASE_RULES, shared by every CFG instance
+PARSER = EarleyParser(RULES)
+PHRASE_PARSER = EarleyParser(PHRASE_RULES, start='P')
+
 class CFG:
-    def __init__(self):
-        # Define production rules for a simple English sentence structure
-        self.rules = {
-            'S': [['NP', 'VP']],                     # Sentence → Noun Phrase + Verb Phrase
-            'NP': [['DET', 'N'], ['PRO']],           # Noun Phrase → Determiner + Noun, or Pronoun
-            'VP': [['V'], ['V', 'NP'], ['V', 'ADJ']] # Verb Phrase → Verb, Verb + Noun Phrase, or Verb + Adjective
-        }
+    def __init__(self, lexicon=None):
+        # The grammar tables are built once per process and shared by every instance
+        self.rules = RULES
+        self.terminals = TERMINALS
         
-        # Define terminal categories
-        self.terminals = {
-            'DET': ['the', 'a', 'my', 'your', 'this', 'that'],
-            'N': ['water', 'food', 'friend', 'car', 'house', 'book', 'money', 'love', 'help'],
-            'PRO': ['i', 'you', 'he', 'she', 'it', 'we', 'they'],
-            'V': ['is', 'am', 'are', 'want', 'need', 'like', 'love', 'have', 'see'],
-            'ADJ': ['good', 'bad', 'happy', 'sad', 'big', 'small']
-        }
+        # Optional compiled lexicon whose category column extends the terminals
+        self.lexicon = lexicon
+        self.parser = PARSER
+        self.phrase_parser = PHRASE_PARSER
     
-    def parse(self, tokens):
+    def categories(self, token, token_id=None):
+        # Every terminal category of a token, from the built-in terminals and
+        # the compiled lexicon if one is loaded
+        if token_id is None:
+            token_id = VOCABULARY.lookup(token)
+        found = CATEGORY_TABLE[token_id] if token_id < len(CATEGORY_TABLE) else NO_CATEGORIES
+        if self.lexicon is not None:
+            extra = self.lexicon.categories(token)
+            if extra:
+                found = found | frozenset(extra)
+        return found
+    
+    def is_category(self, token, category, token_id=None):
+        return category in self.categories(token, token_id)
+    
+    def _normalize(self, tokens, ids):
+        # Callers that tokenized with TOKENIZER pass the ids along; anything
+        # else is lowercased and looked up here, once
+        if ids is None:
+            tokens = [token.lower() for token in tokens]
+            ids = TOKENIZER.ids(tokens)
+        return tokens, ids
+    
+    def parse_tree(self, tokens, ids=None, parser=None):
+        # Full chart parse of the token sequence against RULES, or against
+        # parser's rules if given. Returns a nested (label, children...)
+        # tuple tree, or None if no parse exists.
+        tokens, ids = self._normalize(tokens, ids)
+        table = CATEGORY_TABLE
+        size = len(table)
+        if self.lexicon is None:
+            categories = [table[token_id] if token_id < size else NO_CATEGORIES for token_id in ids]
+        else:
+            categories = [self.categories(token, token_id) for token, token_id in zip(tokens, ids)]
+        template = (parser or self.parser).parse(categories)
+        if template is None:
+            return None
+        return fill_tree(template, tokens)
+    
+    def parse(self, tokens, ids=None):
         # Simple parsing to identify sentence components
-        result = {'structure': [], 'type': 'unknown'}
+        result = {'structure': [], 'type': 'unknown', 'tree': None}
+        tokens, ids = self._normalize(tokens, ids)
         
-        # Check for greeting patterns
-        if any(greeting in ' '.join(tokens).lower() for greeting in ['hello', 'good morning', 'good afternoon', 'good evening']):
+        # Check for greeting patterns anywhere in the token stream
+        if GREETING_INDEX.contains_phrase(ids):
             result['type'] = 'greeting'
             result['structure'] = ['greeting']
             return result
             
         # Check for question patterns
-        if tokens and tokens[0].lower() in ['what', 'who', 'where', 'when', 'how', 'why']:
+        if ids and ids[0] in QUESTION_IDS:
             result['type'] = 'question'
             result['structure'] = ['question_word', 'rest']
             return result
             
-        # Check for basic subject-verb pattern
+        # Check for a full sentence according to the grammar rules
+        tree = self.parse_tree(tokens, ids)
+        if tree is not None:
+            # S → NP VP, and the VP has a second child when there is an object
+            verb_phrase = tree[2]
+            result['type'] = 'statement'
+            result['structure'] = ['subject', 'verb'] + (['object'] if len(verb_phrase) > 2 else [])
+            result['tree'] = tree
+            return result
+        
+        # A noun phrase or adjective on its own; the tree is the phrase
+        # without the P node, so it reads like the same phrase in a sentence
+        tree = self.parse_tree(tokens, ids, self.phrase_parser)
+        if tree is not None:
+            result['type'] = 'phrase'
+            result['structure'] = ['phrase']
+            result['tree'] = tree[1]
+            return result
+        
+        # Fall back to the basic subject-verb pattern for longer sentences
+        # the grammar does not cover
         if len(tokens) >= 2:
-            if tokens[0].lower() in self.terminals['PRO'] and tokens[1].lower() in self.terminals['V']:
+            if self.is_category(tokens[0], 'PRO', ids[0]) and self.is_category(tokens[1], 'V', ids[1]):
                 result['type'] = 'statement'
                 result['structure'] = ['subject', 'verb', 'object']
                 return result
         
-        return result
\ No newline at end of file
+        return result
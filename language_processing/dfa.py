@@ -1,55 +1,168 @@
+# Define states for our simple DFA
+STATES = {
+    'start': 0,
+    'greeting': 1,
+    'subject': 2,
+    'verb': 3,
+    'object': 4,
+    'question': 5,
+    'end': 6,
+    'phrase': 7
+}
+
+# Define transition function
+TRANSITIONS = {
+    # From start state
+    (STATES['start'], 'greeting'): STATES['greeting'],
+    (STATES['start'], 'subject'): STATES['subject'],
+    (STATES['start'], 'question_word'): STATES['question'],
+    (STATES['start'], 'phrase'): STATES['phrase'],
+    
+    # From greeting state
+    (STATES['greeting'], 'end'): STATES['end'],
+    
+    # From phrase state
+    (STATES['phrase'], 'end'): STATES['end'],
+    
+    # From subject state
+    (STATES['subject'], 'verb'): STATES['verb'],
+    
+    # From verb state
+    (STATES['verb'], 'object'): STATES['object'],
+    (STATES['verb'], 'end'): STATES['end'],
+    
+    # From object state
+    (STATES['object'], 'end'): STATES['end'],
+    
+    # From question state
+    (STATES['question'], 'rest'): STATES['end']
+}
+
+# Define accepting states
+ACCEPTING_STATES = frozenset([STATES['end'], STATES['greeting'], STATES['phrase'], STATES['object'], STATES['verb']])
+
+# Intern every symbol used by the transition function to an integer.
+# Symbols the DFA has never seen all share the UNKNOWN_SYMBOL id, and PAD_SYMBOL
+# leaves the state unchanged so batches of different lengths can be padded.
+SYMBOLS = {}
+for _state, _symbol in TRANSITIONS:
+    SYMBOLS.setdefault(_symbol, len(SYMBOLS))
+UNKNOWN_SYMBOL = len(SYMBOLS)
+PAD_SYMBOL = UNKNOWN_SYMBOL + 1
+NUM_SYMBOLS = PAD_SYMBOL + 1
+
+def _complete_table():
+    # One row per state, one column per symbol id. Missing transitions are
+    # resolved here instead of on every call: if there is no transition for a
+    # symbol, fall through to the 'end' transition, otherwise stay put.
+    table = []
+    for state in range(len(STATES)):
+        fallback = TRANSITIONS.get((state, 'end'), state)
+        row = [fallback] * NUM_SYMBOLS
+        for symbol, symbol_id in SYMBOLS.items():
+            row[symbol_id] = TRANSITIONS.get((state, symbol), fallback)
+        row[PAD_SYMBOL] = state
+        table.append(row)
+    return table
+
+def _minimize(table, accepting, start):
+    # Drop unreachable states, then merge equivalent ones by Moore partition
+    # refinement. Returns the new table, accepting flags and start state with
+    # states renumbered so the start state is 0.
+    reachable = [start]
+    seen = {start}
+    for state in reachable:
+        for target in table[state]:
+            if target not in seen:
+                seen.add(target)
+                reachable.append(target)
+
+    block = {state: int(state in accepting) for state in reachable}
+    while True:
+        signatures = {}
+        refined = {}
+        for state in reachable:
+            signature = (block[state],) + tuple(block[target] for target in table[state])
+            refined[state] = signatures.setdefault(signature, len(signatures))
+        if len(signatures) == len(set(block.values())):
+            break
+        block = refined
+
+    # Renumber blocks in discovery order from the start state
+    order = {}
+    for state in reachable:
+        order.setdefault(block[state], len(order))
+    representative = {}
+    for state in reachable:
+        representative.setdefault(order[block[state]], state)
+
+    new_table = []
+    new_accepting = []
+    for new_state in range(len(order)):
+        state = representative[new_state]
+        new_table.append(tuple(order[block[target]] for target in table[state]))
+        new_accepting.append(state in accepting)
+    return tuple(new_table), tuple(new_accepting), order[block[start]]
+
+TABLE, ACCEPTING, START = _minimize(_complete_table(), ACCEPTING_STATES, STATES['start'])
+
+# Dense NumPy copy of TABLE for process_batch, built on first use so that
+# importing the translator does not pull in NumPy
+_DENSE = None
+
+def _dense_tables():
+    global _DENSE
+    if _DENSE is None:
+        import numpy as np
+        _DENSE = (np.array(TABLE, dtype=np.int8), np.array(ACCEPTING, dtype=bool))
+    return _DENSE
+
+def encode(input_symbols):
+    return [SYMBOLS.get(symbol, UNKNOWN_SYMBOL) for symbol in input_symbols]
+
+def encode_batch(sequences):
+    # Pack symbol sequences into one padded (batch, length) int8 array
+    import numpy as np
+    length = max((len(sequence) for sequence in sequences), default=0)
+    batch = np.full((len(sequences), length), PAD_SYMBOL, dtype=np.int8)
+    for row, sequence in enumerate(sequences):
+        batch[row, :len(sequence)] = encode(sequence)
+    return batch
+
 class DFA:
     def __init__(self):
-        # Define states for our simple DFA
-        self.states = {
-            'start': 0,
-            'greeting': 1,
-            'subject': 2,
-            'verb': 3,
-            'object': 4,
-            'question': 5,
-            'end': 6
-        }
-        
-        # Current state
-        self.current_state = self.states['start']
-        
-        # Define transition function
-        self.transitions = {
-            # From start state
-            (self.states['start'], 'greeting'): self.states['greeting'],
-            (self.states['start'], 'subject'): self.states['subject'],
-            (self.states['start'], 'question_word'): self.states['question'],
-            
-            # From greeting state
-            (self.states['greeting'], 'end'): self.states['end'],
-            
-            # From subject state
-            (self.states['subject'], 'verb'): self.states['verb'],
-            
-            # From verb state
-            (self.states['verb'], 'object'): self.states['object'],
-            (self.states['verb'], 'end'): self.states['end'],
-            
-            # From object state
-            (self.states['object'], 'end'): self.states['end'],
-            
-            # From question state
-            (self.states['question'], 'rest'): self.states['end']
-        }
-        
-        # Define accepting states
-        self.accepting_states = [self.states['end'], self.states['greeting'], self.states['object'], self.states['verb']]
+        # The tables are built once per process and shared by every instance.
+        # states/transitions describe the automaton as written; table is the
+        # minimized, complete transition table actually executed.
+        self.states = STATES
+        self.transitions = TRANSITIONS
+        self.accepting_states = ACCEPTING_STATES
+        self.symbols = SYMBOLS
+        self.table = TABLE
+        self.accepting = ACCEPTING
+        self.start = START
     
     def process(self, input_symbols):
-        self.current_state = self.states['start']
+        # The state is kept local so a single DFA can be shared between threads
+        state = self.start
+        table = self.table
+        symbols = self.symbols
         
         for symbol in input_symbols:
-            if (self.current_state, symbol) in self.transitions:
-                self.current_state = self.transitions[(self.current_state, symbol)]
-            else:
-                # If no valid transition, try to go to end
-                if (self.current_state, 'end') in self.transitions:
-                    self.current_state = self.transitions[(self.current_state, 'end')]
+            state = table[state][symbols.get(symbol, UNKNOWN_SYMBOL)]
         
-        return self.current_state in self.accepting_states
\ No newline at end of file
+        return self.accepting[state]
+    
+    def process_batch(self, sequences):
+        # Validate many structure sequences at once. Takes a list of symbol
+        # sequences or an already padded array from encode_batch, and returns
+        # a NumPy bool array with one result per sequence.
+        table, accepting = _dense_tables()
+        import numpy as np
+        if not isinstance(sequences, np.ndarray):
+            sequences = encode_batch(sequences)
+        states = np.full(sequences.shape[0], self.start, dtype=np.int8)
+        # One vectorized gather per column instead of one step per symbol
+        for column in sequences.T:
+            states = table[states, column]
+        return accepting[states]
@@ -0,0 +1,133 @@
+import threading
+from collections import OrderedDict
+
+class EarleyParser:
+    def __init__(self, rules, start='S', memo_size=1024):
+        # Number the productions once; chart items are (production, dot, origin)
+        # tuples of ints so they hash and compare cheaply
+        self.start = start
+        self.productions = []
+        self.by_lhs = {}
+        for lhs, alternatives in rules.items():
+            for rhs in alternatives:
+                self.by_lhs.setdefault(lhs, []).append(len(self.productions))
+                self.productions.append((lhs, tuple(rhs)))
+        self.nonterminals = frozenset(self.by_lhs)
+
+        # Parse tables are memoized on the category sequence, which is all the
+        # parser looks at, so different sentences with the same shape share one
+        self.memo = OrderedDict()
+        self.memo_size = memo_size
+        self.memo_lock = threading.Lock()
+
+        # Each thread reuses its own chart between calls instead of
+        # allocating a new one per parse
+        self.local = threading.local()
+
+    def _chart(self, size):
+        chart = getattr(self.local, 'chart', None)
+        if chart is None:
+            chart = self.local.chart = []
+        while len(chart) < size:
+            chart.append({})
+        for column in chart[:size]:
+            column.clear()
+        return chart
+
+    def parse(self, categories):
+        # categories holds one collection of terminal categories per token.
+        # Returns a tree template whose leaves are token positions, or None.
+        key = tuple(categories)
+        with self.memo_lock:
+            if key in self.memo:
+                self.memo.move_to_end(key)
+                return self.memo[key]
+        tree = self._parse(key)
+        with self.memo_lock:
+            self.memo[key] = tree
+            if len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        return tree
+
+    def _parse(self, categories):
+        n = len(categories)
+        if n == 0:
+            return None
+        productions = self.productions
+        nonterminals = self.nonterminals
+        # chart[k] maps each item ending at k to the back pointer that built it:
+        # (previous item, position it ended at, child), where child is a token
+        # position for a scanned terminal or a (completed item, end) pair
+        chart = self._chart(n + 1)
+
+        for prod in self.by_lhs[self.start]:
+            chart[0][(prod, 0, 0)] = None
+
+        for k in range(n + 1):
+            column = chart[k]
+            agenda = list(column)
+            while agenda:
+                item = agenda.pop()
+                prod, dot, origin = item
+                lhs, rhs = productions[prod]
+                if dot < len(rhs):
+                    symbol = rhs[dot]
+                    if symbol in nonterminals:
+                        # Predict
+                        for next_prod in self.by_lhs[symbol]:
+                            predicted = (next_prod, 0, k)
+                            if predicted not in column:
+                                column[predicted] = None
+                                agenda.append(predicted)
+                        # A nonterminal already completed at k with origin k
+                        # cannot happen without empty rules, which we do not have
+                    elif k < n and symbol in categories[k]:
+                        # Scan
+                        scanned = (prod, dot + 1, origin)
+                        if scanned not in chart[k + 1]:
+                            chart[k + 1][scanned] = (item, k, k)
+                else:
+                    # Complete
+                    for waiting in list(chart[origin]):
+                        w_prod, w_dot, w_origin = waiting
+                        w_rhs = productions[w_prod][1]
+                        if w_dot < len(w_rhs) and w_rhs[w_dot] == lhs:
+                            advanced = (w_prod, w_dot + 1, w_origin)
+                            if advanced not in column:
+                                column[advanced] = (waiting, origin, (item, k))
+                                agenda.append(advanced)
+
+        for prod in self.by_lhs[self.start]:
+            done = (prod, len(productions[prod][1]), 0)
+            if done in chart[n]:
+                return self._build(chart, done, n)
+        return None
+
+    def _build(self, chart, item, end):
+        # Follow back pointers from a completed item to a nested tuple tree:
+        # (label, child, ...) for nonterminals and (category, position) leaves
+        prod = item[0]
+        lhs, rhs = self.productions[prod]
+        children = []
+        while item[1] > 0:
+            previous, previous_end, child = chart[end][item]
+            symbol = rhs[item[1] - 1]
+            if isinstance(child, tuple):
+                children.append(self._build(chart, child[0], child[1]))
+            else:
+                children.append((symbol, child))
+            item, end = previous, previous_end
+        children.reverse()
+        return (lhs,) + tuple(children)
+
+def fill_tree(template, tokens):
+    # Replace the token positions in a memoized tree template with the words
+    if len(template) == 2 and isinstance(template[1], int):
+        return (template[0], tokens[template[1]])
+    return (template[0],) + tuple(fill_tree(child, tokens) for child in template[1:])
+
+def format_tree(tree):
+    # Bracketed form for display, e.g. (S (NP (PRO i)) (VP (V am)))
+    if len(tree) == 2 and isinstance(tree[1], str):
+        return f"({tree[0]} {tree[1]})"
+    return f"({tree[0]} " + ' '.join(format_tree(child) for child in tree[1:]) + ")"
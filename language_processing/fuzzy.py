@@ -0,0 +1,193 @@
+import threading
+from collections import OrderedDict
+
+def letter_mask(word):
+    # One bit per distinct character. An insertion or deletion changes at
+    # most one bit and a substitution at most two, so words within distance
+    # d differ in at most 2 * d bits; a swap changes none.
+    mask = 0
+    for letter in word:
+        mask |= 1 << (ord(letter) & 63)
+    return mask
+
+def edit_distance(a, b, limit):
+    # Optimal string alignment distance: insertions, deletions, substitutions
+    # and swaps of two neighbouring letters ("freind") each cost 1. Returns
+    # limit + 1 as soon as the distance must exceed limit. Computed with
+    # Hyyro's bit-parallel algorithm: a whole column of the distance table
+    # is one integer, so each letter of b costs a few integer operations.
+    if a == b:
+        return 0
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > limit:
+        return limit + 1
+    # A shared prefix or suffix never changes the distance
+    start = 0
+    while start < len(a) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(a) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    a = a[start:len(a) - end]
+    b = b[start:len(b) - end]
+    if not a:
+        return min(len(b), limit + 1)
+
+    # Bit i of matches[letter] is set where a[i] is that letter
+    matches = {}
+    for i, letter in enumerate(a):
+        matches[letter] = matches.get(letter, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    # Vertical deltas of the current column, +1 and -1, and the diagonal
+    # zero-delta bits and match vector of the previous column
+    positive = full
+    negative = 0
+    zero = 0
+    previous_match = 0
+    distance = len(a)
+    remaining = len(b)
+    for letter in b:
+        match = matches.get(letter, 0)
+        swapped = ((~zero & match) << 1) & previous_match
+        zero = (((match & positive) + positive) ^ positive) | match | negative | swapped
+        up = negative | ~(zero | positive)
+        down = positive & zero
+        if up & last:
+            distance += 1
+        elif down & last:
+            distance -= 1
+        up = ((up << 1) | 1) & full
+        down = (down << 1) & full
+        positive = down | (~(zero | up) & full)
+        negative = up & zero
+        previous_match = match
+        remaining -= 1
+        # Each letter left can lower the distance by at most one
+        if distance - remaining > limit:
+            return limit + 1
+    return distance if distance <= limit else limit + 1
+
+class FuzzyIndex:
+    def __init__(self, words=(), max_distance=2, prefix_length=7, min_length=4, memo_size=4096):
+        # SymSpell index: every string reachable from a word by deleting up to
+        # max_distance letters maps to the words it came from. A misspelling
+        # and the word it should be share such a delete, so a lookup only
+        # generates the deletes of the query and checks the few words filed
+        # under them, however large the vocabulary is. Only the first
+        # prefix_length letters are indexed, which bounds the deletes per word.
+        # Words shorter than min_length are never corrected, and words of up
+        # to four letters only by one edit: short words are too close to each
+        # other ("cat", "car") to correct safely.
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        self.min_length = min_length
+        # word -> letter_mask(word), a cheap filter before edit_distance
+        self.words = {}
+        self.deletes = {}
+
+        # Unknown words come back in sentence after sentence, so corrections
+        # are memoized; adding words clears the memo
+        self.memo = OrderedDict()
+        self.memo_size = memo_size
+        self.memo_lock = threading.Lock()
+        for word in words:
+            self.add(word)
+
+    def distance_limit(self, length):
+        if length < self.min_length:
+            return 0
+        return min(self.max_distance, 1) if length <= 4 else self.max_distance
+
+    def _deletes(self, word, distance):
+        # word and every string made by deleting up to distance of its
+        # letters, one letter at a time from the previous level
+        found = {word}
+        level = [word]
+        for _ in range(distance):
+            next_level = []
+            for item in level:
+                if len(item) <= 1:
+                    continue
+                for i in range(len(item)):
+                    delete = item[:i] + item[i + 1:]
+                    if delete not in found:
+                        found.add(delete)
+                        next_level.append(delete)
+            level = next_level
+        return found
+
+    def add(self, word):
+        if word in self.words:
+            return
+        self.words[word] = letter_mask(word)
+        with self.memo_lock:
+            self.memo.clear()
+        prefix = word[:self.prefix_length]
+        for delete in self._deletes(prefix, self.max_distance):
+            filed = self.deletes.get(delete)
+            if filed is None:
+                # Most deletes belong to one word; a bare string saves a list
+                self.deletes[delete] = word
+            elif isinstance(filed, str):
+                self.deletes[delete] = [filed, word]
+            else:
+                filed.append(word)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.words
+
+    def lookup(self, word, max_distance=None):
+        # [(candidate, distance, score)] for every indexed word within the
+        # distance limit for word's length, closest first. score is
+        # 1 - distance / length of the longer word, so 1.0 is an exact match.
+        limit = self.distance_limit(len(word))
+        if max_distance is not None:
+            limit = min(limit, max_distance)
+        if word in self.words:
+            return [(word, 0, 1.0)]
+        if limit == 0:
+            return []
+
+        seen = set()
+        found = []
+        words = self.words
+        mask = letter_mask(word)
+        bits = 2 * limit
+        for delete in self._deletes(word[:self.prefix_length], limit):
+            filed = self.deletes.get(delete)
+            if filed is None:
+                continue
+            for candidate in (filed,) if isinstance(filed, str) else filed:
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                if abs(len(candidate) - len(word)) > limit or (words[candidate] ^ mask).bit_count() > bits:
+                    continue
+                distance = edit_distance(word, candidate, limit)
+                if distance <= limit:
+                    score = 1 - distance / max(len(word), len(candidate))
+                    found.append((candidate, distance, round(score, 3)))
+        found.sort(key=lambda item: (item[1], -item[2], item[0]))
+        return found
+
+    def correct(self, word):
+        # The single closest word, or None when nothing is close enough or
+        # two words are equally close
+        with self.memo_lock:
+            if word in self.memo:
+                self.memo.move_to_end(word)
+                return self.memo[word]
+        found = self.lookup(word)
+        best = None
+        if found and (len(found) == 1 or found[1][1] > found[0][1]):
+            best = found[0]
+        with self.memo_lock:
+            self.memo[word] = best
+            if len(self.memo) > self.memo_size:
+                self.memo.popitem(last=False)
+        return best
@@ -0,0 +1,111 @@
+import bisect
+import re
+
+# A sentence runs up to ., ! or ? (kept as its terminator) or the end of a line
+SENTENCE_PATTERN = re.compile(r'[^.!?\n]+([.!?]*)')
+
+def split_sentences(text, offset=0):
+    # [(sentence, terminator, start, end)] with surrounding whitespace removed
+    # from the sentence and blank stretches skipped. start and end are the
+    # offsets of the match in text, plus offset.
+    sentences = []
+    for match in SENTENCE_PATTERN.finditer(text):
+        terminator = match.group(1)
+        body = match.group(0)[:len(match.group(0)) - len(terminator)].strip()
+        if body:
+            sentences.append((body, terminator, match.start() + offset, match.end() + offset))
+    return sentences
+
+class IncrementalTranslator:
+    def __init__(self, translate):
+        # Keeps the translation of a document sentence by sentence, so after
+        # an edit only the sentences around the edit are split and translated
+        # again. translate takes a sentence and returns (translation, analysis).
+        self.translate = translate
+        self.reset()
+
+    def reset(self):
+        self.sentences = []
+        self.starts = []
+        self.ends = []
+        self.results = []
+        self.length = 0
+        self.synced = False
+        self.pending = None
+
+    def note_edit(self, position, removed, added):
+        # Record an edit as reported by QTextDocument.contentsChange. Edits
+        # made between two refreshes merge into one changed range, kept as
+        # (start, end before the edits, end after the edits).
+        if self.pending is None:
+            self.pending = (position, position + removed, position + added)
+            return
+        start, old_end, new_end = self.pending
+        if position + removed > new_end:
+            old_end += position + removed - new_end
+            new_end = position + added
+        else:
+            new_end += added - removed
+        self.pending = (min(start, position), old_end, new_end)
+
+    def refresh(self, read, length):
+        # Bring the translation up to date with the edits noted since the last
+        # refresh. read(start, end) returns that stretch of the current text
+        # and length is its current size. Returns the same as update().
+        pending, self.pending = self.pending, None
+        if not self.synced:
+            return self.update(read(0, length))
+        if pending is None:
+            return len(self.sentences), 0, []
+        start, old_end, new_end = pending
+        delta = new_end - old_end
+        if old_end > self.length or new_end > length or self.length + delta != length:
+            # The edits do not add up; start over from the whole text
+            return self.update(read(0, length))
+
+        # Split again from the end of the sentence before the one touching the
+        # edit to the start of the sentence after the one touching it, since
+        # an edit can merge or split its neighbours
+        count = len(self.sentences)
+        first = max(bisect.bisect_left(self.ends, start) - 1, 0)
+        last = min(bisect.bisect_right(self.starts, old_end) + 1, count)
+        window_start = self.ends[first - 1] if first > 0 else 0
+        window_end = self.starts[last] + delta if last < count else length
+
+        self.starts[last:] = [offset + delta for offset in self.starts[last:]]
+        self.ends[last:] = [offset + delta for offset in self.ends[last:]]
+        self.length = length
+        return self._splice(first, last, split_sentences(read(window_start, window_end), window_start))
+
+    def update(self, text):
+        # Translate the whole text, reusing earlier results for sentences that
+        # did not change. Returns (first, removed, results): the removed
+        # sentences starting at index first were replaced by the new results.
+        self.pending = None
+        self.length = len(text)
+        self.synced = True
+        return self._splice(0, len(self.sentences), split_sentences(text))
+
+    def _splice(self, first, last, new):
+        old = self.sentences[first:last]
+        limit = min(len(old), len(new))
+        prefix = 0
+        while prefix < limit and old[prefix] == new[prefix][:2]:
+            prefix += 1
+        suffix = 0
+        while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix][:2]:
+            suffix += 1
+
+        results = [self.translate(body) for body, _, _, _ in new[prefix:len(new) - suffix]]
+        self.sentences[first:last] = [(body, terminator) for body, terminator, _, _ in new]
+        self.starts[first:last] = [start for _, _, start, _ in new]
+        self.ends[first:last] = [end for _, _, _, end in new]
+        self.results[first + prefix:last - suffix] = results
+        return first + prefix, len(old) - prefix - suffix, results
+
+    def line(self, index):
+        # Translation of one sentence, ended the way the English one was
+        return self.results[index][0] + self.sentences[index][1]
+
+    def lines(self):
+        return [self.line(index) for index in range(len(self.sentences))]
@@ -0,0 +1,145 @@
+import csv
+import mmap
+import os
+import struct
+import sys
+
+# Compiled lexicon file layout (little-endian):
+#   header:  magic, entry count, longest phrase in tokens, offset of the data blob
+#   index:   one fixed-size record per entry, sorted by UTF-8 key bytes:
+#            offset into the data blob, key length, value length, category length
+#   data:    key, value and category bytes of every entry, back to back
+# Lookups binary-search the index straight out of the mapped file, so opening a
+# lexicon costs the same for 20 entries as for 200k, and the pages are shared
+# by every process that maps the same file.
+MAGIC = b'STTLEX01'
+HEADER = struct.Struct('<8sIIQ')
+RECORD = struct.Struct('<IHHB')
+
+class LexiconFormatError(ValueError):
+    pass
+
+def read_source(path):
+    # Yield (english, malay, category) rows from a TSV or CSV lexicon.
+    # The category column is optional; blank lines and # comments are skipped.
+    delimiter = ',' if path.lower().endswith('.csv') else '\t'
+    with open(path, encoding='utf-8', newline='') as handle:
+        for row in csv.reader(handle, delimiter=delimiter):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            if len(row) < 2:
+                raise LexiconFormatError(f"{path}: expected at least two columns, got {row!r}")
+            english = ' '.join(row[0].lower().split())
+            category = row[2].strip() if len(row) > 2 else ''
+            yield english, row[1].strip(), category
+
+def compile_lexicon(source_path, output_path):
+    # Build the binary lexicon from a TSV/CSV source. Later rows override
+    # earlier ones with the same English key. Returns the number of entries.
+    entries = {}
+    for english, malay, category in read_source(source_path):
+        entries[english.encode('utf-8')] = (malay.encode('utf-8'), category.encode('utf-8'))
+
+    keys = sorted(entries)
+    max_tokens = max((len(key.split()) for key in keys), default=0)
+    index = bytearray()
+    data = bytearray()
+    for key in keys:
+        value, category = entries[key]
+        if len(key) > 0xFFFF or len(value) > 0xFFFF or len(category) > 0xFF:
+            raise LexiconFormatError(f"{source_path}: entry too long: {key[:40]!r}")
+        index += RECORD.pack(len(data), len(key), len(value), len(category))
+        data += key + value + category
+
+    data_offset = HEADER.size + len(index)
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as handle:
+        handle.write(HEADER.pack(MAGIC, len(keys), max_tokens, data_offset))
+        handle.write(index)
+        handle.write(data)
+    os.replace(tmp_path, output_path)
+    return len(keys)
+
+class MappedLexicon:
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            stat = os.fstat(handle.fileno())
+            if stat.st_size < HEADER.size:
+                raise LexiconFormatError(f"{path}: file too small to be a lexicon")
+            self.data = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.count, self.max_tokens, self.data_offset = HEADER.unpack_from(self.data, 0)
+        if magic != MAGIC:
+            self.data.close()
+            raise LexiconFormatError(f"{path}: not a compiled lexicon")
+        # Identifies this exact build of the file for cache invalidation
+        self.fingerprint = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _record(self, i):
+        offset, key_len, value_len, category_len = RECORD.unpack_from(self.data, HEADER.size + i * RECORD.size)
+        start = self.data_offset + offset
+        return start, key_len, value_len, category_len
+
+    def _key(self, i):
+        start, key_len, _, _ = self._record(i)
+        return self.data[start:start + key_len]
+
+    def _find(self, key):
+        # Binary search over the sorted index; returns the record index or -1
+        target = key.encode('utf-8')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self._key(lo) == target:
+            return lo
+        return -1
+
+    def get(self, key, default=None):
+        i = self._find(key)
+        if i < 0:
+            return default
+        start, key_len, value_len, _ = self._record(i)
+        start += key_len
+        return self.data[start:start + value_len].decode('utf-8')
+
+    def categories(self, key):
+        # Grammar categories recorded for a word, e.g. 'N' or 'N|V'
+        i = self._find(key)
+        if i < 0:
+            return ()
+        start, key_len, value_len, category_len = self._record(i)
+        if not category_len:
+            return ()
+        start += key_len + value_len
+        return tuple(self.data[start:start + category_len].decode('utf-8').split('|'))
+
+    def items(self):
+        for i in range(self.count):
+            start, key_len, value_len, _ = self._record(i)
+            key = self.data[start:start + key_len].decode('utf-8')
+            yield key, self.data[start + key_len:start + key_len + value_len].decode('utf-8')
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __len__(self):
+        return self.count
+
+    def close(self):
+        self.data.close()
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        sys.stderr.write("usage: python -m language_processing.lexicon SOURCE.tsv|SOURCE.csv OUTPUT.lex\n")
+        return 2
+    count = compile_lexicon(argv[0], argv[1])
+    print(f"Compiled {count} entries into {argv[1]}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+from language_processing.tokenizer import TOKENIZER
+
+class PhraseIndex:
+    def __init__(self, phrases, store=None, tokenizer=TOKENIZER):
+        # Token-level trie over vocabulary ids: each node maps the id of the
+        # next token to a child node. The translation for a complete phrase is
+        # stored under the _END key. Phrase words are added to the vocabulary;
+        # unknown tokens all share one id that no phrase uses.
+        self.tokenizer = tokenizer
+        self.root = {}
+        self.max_tokens = 0
+        self.size = 0
+        for phrase, value in phrases.items():
+            self.add(phrase, value)
+        
+        # Optional large lexicon (see lexicon.MappedLexicon) consulted before
+        # the in-memory phrases, which then only act as a fallback
+        self.store = store
+
+    _END = object()
+
+    def add(self, phrase, value):
+        ids = self.tokenizer.intern(phrase)
+        if not ids:
+            return
+        node = self.root
+        for token_id in ids:
+            node = node.setdefault(token_id, {})
+        if self._END not in node:
+            self.size += 1
+        node[self._END] = value
+        self.max_tokens = max(self.max_tokens, len(ids))
+
+    def longest_match(self, ids, start=0, tokens=None):
+        # Walk the trie from ids[start] and remember the deepest complete
+        # phrase seen. Returns (end, value), or (start, None) if nothing matches.
+        # tokens, the token strings for ids, are needed to consult a store.
+        node = self.root
+        end, value = start, None
+        for i in range(start, len(ids)):
+            node = node.get(ids[i])
+            if node is None:
+                break
+            if self._END in node:
+                end, value = i + 1, node[self._END]
+        
+        if self.store is not None and tokens is not None:
+            # Probe the store from its longest phrase length down; a store
+            # entry wins over an in-memory phrase of the same length
+            longest = min(self.store.max_tokens, len(tokens) - start)
+            for length in range(longest, end - start - 1 if value is not None else 0, -1):
+                stored = self.store.get(' '.join(tokens[start:start + length]))
+                if stored is not None:
+                    return start + length, stored
+        return end, value
+
+    def segment(self, ids, tokens=None):
+        # Greedy longest-match over the whole token stream in one pass.
+        # Unmatched tokens come back as single-token segments with value None.
+        segments = []
+        i = 0
+        n = len(ids)
+        if self.store is not None and tokens is not None:
+            while i < n:
+                end, value = self.longest_match(ids, i, tokens)
+                if value is None:
+                    end = i + 1
+                segments.append((i, end, value))
+                i = end
+            return segments
+
+        # Without a store the trie walk is inlined; this runs for every
+        # translated sentence
+        root = self.root
+        end_key = self._END
+        while i < n:
+            node = root.get(ids[i])
+            end, value = i + 1, None
+            j = i + 1
+            while node is not None:
+                if end_key in node:
+                    end, value = j, node[end_key]
+                if j == n:
+                    break
+                node = node.get(ids[j])
+                j += 1
+            segments.append((i, end, value))
+            i = end
+        return segments
+
+    def contains_phrase(self, ids, tokens=None):
+        # True if any phrase of the index occurs anywhere in the token stream
+        for i in range(len(ids)):
+            if self.longest_match(ids, i, tokens)[1] is not None:
+                return True
+        return False
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, phrase):
+        tokens, ids = self.tokenizer.tokenize(phrase)
+        return bool(ids) and self.longest_match(ids, 0, tokens)[0] == len(ids)
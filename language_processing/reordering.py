@@ -0,0 +1,181 @@
+import hashlib
+
+from language_processing.cfg import CATEGORY_TABLE, NO_CATEGORIES
+from language_processing.tokenizer import VOCABULARY
+
+# Determiners split by how Malay orders them: articles stay in front of the
+# noun, possessives and demonstratives follow it ("my book" -> "buku saya")
+REFINED_TAGS = {
+    'the': 'ART', 'a': 'ART',
+    'my': 'POSS', 'your': 'POSS',
+    'this': 'DEM', 'that': 'DEM'
+}
+
+# Tag for unknown words and multi-word phrases; no rule mentions it
+OTHER_TAG = 'X'
+
+# Without a parse tree, a word in several categories ("love" is N and V)
+# takes the first one in this order
+TAG_PRIORITY = ('PRO', 'DET', 'V', 'ADJ', 'N')
+
+# One tag per vocabulary id, derived from the grammar's category table
+TAG_TABLE = []
+for _token_id, _categories in enumerate(CATEGORY_TABLE):
+    _tag = next((category for category in TAG_PRIORITY if category in _categories), OTHER_TAG)
+    if _tag == 'DET':
+        _tag = REFINED_TAGS.get(VOCABULARY.word(_token_id), 'DET')
+    TAG_TABLE.append(_tag)
+
+# English to Malay word order, as "pattern -> rewrite" over tags. The rewrite
+# lists the same tags in output order; a tag that occurs twice keeps the
+# relative order of its occurrences.
+DEFAULT_RULES = (
+    'ADJ N -> N ADJ',                  # big book -> buku besar
+    'POSS N -> N POSS',                # my book -> buku saya
+    'DEM N -> N DEM',                  # this book -> buku ini
+    'POSS ADJ N -> N ADJ POSS',        # my big book -> buku besar saya
+    'DEM ADJ N -> N ADJ DEM',          # this big book -> buku besar ini
+    'ART ADJ N -> ART N ADJ',          # the big book -> the buku besar
+    'ADJ ADJ N -> N ADJ ADJ',
+    'POSS ADJ ADJ N -> N ADJ ADJ POSS',
+    'DEM ADJ ADJ N -> N ADJ ADJ DEM'
+)
+
+def parse_rule(rule):
+    # "POSS N -> N POSS" -> (('POSS', 'N'), (1, 0)): the pattern and the
+    # pattern positions in output order
+    left, arrow, right = rule.partition('->')
+    pattern = tuple(left.split())
+    rewrite = right.split()
+    if not arrow or not pattern or sorted(pattern) != sorted(rewrite):
+        raise ValueError(f"bad reordering rule {rule!r}: the rewrite must rearrange the pattern")
+    unused = list(range(len(pattern)))
+    order = []
+    for tag in rewrite:
+        position = next(position for position in unused if pattern[position] == tag)
+        unused.remove(position)
+        order.append(position)
+    return pattern, tuple(order)
+
+def tree_tags(tree, tags=None):
+    # Terminal categories of a parse tree's leaves, left to right
+    if tags is None:
+        tags = []
+    if len(tree) == 2 and isinstance(tree[1], str):
+        tags.append(REFINED_TAGS.get(tree[1], 'DET') if tree[0] == 'DET' else tree[0])
+    else:
+        for child in tree[1:]:
+            tree_tags(child, tags)
+    return tags
+
+def tag_tokens(tokens, ids, categories=None, tree=None):
+    # One tag per token: the parse tree's category where there is a tree,
+    # otherwise the table's. categories(token, token_id), when given, replaces
+    # the table, e.g. to take a compiled lexicon's categories into account.
+    if tree is not None:
+        return tree_tags(tree)
+    if categories is None:
+        size = len(TAG_TABLE)
+        return [TAG_TABLE[token_id] if token_id < size else OTHER_TAG for token_id in ids]
+    tags = []
+    for token, token_id in zip(tokens, ids):
+        found = categories(token, token_id) or NO_CATEGORIES
+        tag = next((category for category in TAG_PRIORITY if category in found), OTHER_TAG)
+        tags.append(REFINED_TAGS.get(token, 'DET') if tag == 'DET' else tag)
+    return tags
+
+class RuleEngine:
+    def __init__(self, rules=DEFAULT_RULES):
+        # All rule patterns compiled into one Aho-Corasick automaton over tag
+        # ids, with the failure links folded into a complete transition table,
+        # so matching every rule costs one table lookup per tag
+        self.rules = tuple(rules)
+        self.tag_ids = {}
+        patterns = {}
+        for rule in self.rules:
+            pattern, order = parse_rule(rule)
+            if pattern in patterns:
+                raise ValueError(f"duplicate reordering rule for {' '.join(pattern)!r}")
+            patterns[pattern] = order
+            for tag in pattern:
+                self.tag_ids.setdefault(tag, len(self.tag_ids))
+        # Every tag no rule mentions shares the last id
+        self.other_id = len(self.tag_ids)
+        size = self.other_id + 1
+
+        # Trie of the patterns; outputs[state] holds the (length, order) of
+        # every rule that ends in that state, directly or through a suffix
+        children = [{}]
+        outputs = [()]
+        for pattern, order in patterns.items():
+            state = 0
+            for tag in pattern:
+                tag_id = self.tag_ids[tag]
+                if tag_id not in children[state]:
+                    children[state][tag_id] = len(children)
+                    children.append({})
+                    outputs.append(())
+                state = children[state][tag_id]
+            outputs[state] = ((len(pattern), order),)
+
+        # Breadth-first over the trie: a state's missing transitions are those
+        # of its failure state, which is always shallower and so already done
+        transitions = [None] * len(children)
+        transitions[0] = [children[0].get(tag_id, 0) for tag_id in range(size)]
+        queue = [(child, 0) for child in children[0].values()]
+        for state, failure in queue:
+            outputs[state] = outputs[state] + outputs[failure]
+            row = list(transitions[failure])
+            for tag_id, child in children[state].items():
+                row[tag_id] = child
+                queue.append((child, transitions[failure][tag_id]))
+            transitions[state] = row
+        self.transitions = transitions
+        self.outputs = outputs
+
+        digest = hashlib.sha1('\n'.join(self.rules).encode('utf-8'))
+        self.fingerprint = digest.hexdigest()
+
+    def __len__(self):
+        return len(self.rules)
+
+    def order(self, tags):
+        # Output order of positions 0..len(tags)-1 after applying the rules,
+        # or None if no rule matches. Where matches overlap the leftmost wins,
+        # and the longest of those starting at the same place.
+        tag_ids = self.tag_ids
+        other = self.other_id
+        transitions = self.transitions
+        outputs = self.outputs
+        best = None
+        state = 0
+        for end, tag in enumerate(tags, 1):
+            state = transitions[state][tag_ids.get(tag, other)]
+            for length, order in outputs[state]:
+                if best is None:
+                    best = {}
+                start = end - length
+                if len(best.get(start, ())) < length:
+                    best[start] = order
+        if best is None:
+            return None
+
+        positions = []
+        i = 0
+        n = len(tags)
+        while i < n:
+            order = best.get(i)
+            if order is None:
+                positions.append(i)
+                i += 1
+            else:
+                positions.extend(i + offset for offset in order)
+                i += len(order)
+        return positions
+
+    def apply(self, items, tags):
+        # items rearranged according to their tags
+        positions = self.order(tags)
+        if positions is None:
+            return items
+        return [items[position] for position in positions]
@@ -0,0 +1,58 @@
+from language_processing.translator import UNRECOGNIZED_STRUCTURE, translate_batch
+
+# How much each signal adds to a hypothesis score, which ranges from 0 to 1.
+# Validity outweighs the other two together, so a transcript that translates
+# always ranks above one that does not.
+WEIGHTS = {'valid': 0.6, 'coverage': 0.25, 'confidence': 0.15}
+
+# Recognizers usually report a confidence for the first hypothesis only;
+# each one after it is taken to be this much less likely than the one before
+RANK_DECAY = 0.8
+
+def fill_confidences(confidences):
+    # Known confidences as given, missing ones decayed from the nearest known
+    # one above, or from 1.0 at the top
+    filled = []
+    previous = 1.0 / RANK_DECAY
+    for confidence in confidences:
+        previous = confidence if confidence is not None else previous * RANK_DECAY
+        filled.append(previous)
+    return filled
+
+def rescore(hypotheses, translate=translate_batch):
+    # Translate and analyze every recognizer hypothesis in one batch and rank
+    # them by grammar validity, word bank coverage and recognizer confidence.
+    # hypotheses is [(transcript, confidence)] in the recognizer's order, as
+    # returned by RecognizerBackend.recognize_all. Returns a list of dicts
+    # with text, malay, analysis, confidence, rank (the recognizer's order)
+    # and score, best first; ties keep the recognizer's order.
+    texts = []
+    confidences = []
+    for text, confidence in hypotheses:
+        if text and text.strip():
+            texts.append(text)
+            confidences.append(confidence)
+    if not texts:
+        return []
+
+    # Alternatives often differ only in case or punctuation; the translation
+    # cache answers the repeats
+    results = translate(texts)
+    ranked = []
+    for rank, (text, confidence, (malay, analysis)) in enumerate(
+            zip(texts, fill_confidences(confidences), results)):
+        # Valid when the translator accepts it: the grammar and DFA pass it,
+        # or a single word bank phrase ("thank you") covers all of it
+        valid = bool(analysis) and malay != UNRECOGNIZED_STRUCTURE
+        coverage = analysis.get('coverage', 0.0) if analysis else 0.0
+        score = (WEIGHTS['valid'] * valid + WEIGHTS['coverage'] * coverage
+                 + WEIGHTS['confidence'] * confidence)
+        ranked.append({'text': text, 'malay': malay, 'analysis': analysis,
+                       'confidence': round(confidence, 3), 'rank': rank, 'score': round(score, 4)})
+    ranked.sort(key=lambda item: (-item['score'], item['rank']))
+    return ranked
+
+def best_hypothesis(hypotheses, translate=translate_batch):
+    # (best, ranked) with best the top of rescore()'s list, or None
+    ranked = rescore(hypotheses, translate)
+    return (ranked[0] if ranked else None), ranked
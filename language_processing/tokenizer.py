@@ -0,0 +1,82 @@
+import re
+import threading
+
+# A token is a run of letters or digits, optionally joined by an apostrophe or
+# hyphen ("what's", "e-mail"). Everything else, punctuation included, only
+# separates tokens.
+TOKEN_PATTERN = re.compile(r"[^\W_]+(?:['’-][^\W_]+)*")
+
+# Id shared by every token the vocabulary does not know
+UNKNOWN_ID = 0
+
+class Vocabulary:
+    def __init__(self, words=()):
+        # Interns token strings to small dense integer ids, so tables keyed
+        # on tokens can be lists indexed by id. Ids are never reassigned.
+        # Only words the grammar or a word bank knows are interned; anything
+        # else maps to UNKNOWN_ID, so user input cannot grow the vocabulary.
+        self.ids = {}
+        self.words = [None]
+        self.lock = threading.Lock()
+        for word in words:
+            self.intern(word)
+
+    def intern(self, word):
+        token_id = self.ids.get(word)
+        if token_id is None:
+            with self.lock:
+                token_id = self.ids.get(word)
+                if token_id is None:
+                    token_id = len(self.words)
+                    self.words.append(word)
+                    self.ids[word] = token_id
+        return token_id
+
+    def lookup(self, word):
+        return self.ids.get(word, UNKNOWN_ID)
+
+    def word(self, token_id):
+        return self.words[token_id]
+
+    def __contains__(self, word):
+        return word in self.ids
+
+    def __len__(self):
+        return len(self.words)
+
+class Tokenizer:
+    def __init__(self, vocabulary):
+        self.vocabulary = vocabulary
+
+    def split(self, text):
+        # Lowercased tokens with punctuation removed. Most words are plain
+        # letters, which str.split already separates; only the rest go through
+        # the pattern.
+        tokens = []
+        for word in text.lower().split():
+            if word.isalnum():
+                tokens.append(word)
+            else:
+                tokens.extend(TOKEN_PATTERN.findall(word))
+        return tokens
+
+    def tokenize(self, text):
+        # Returns (tokens, ids): the normalized token strings, which are kept
+        # for output, and their vocabulary ids
+        tokens = self.split(text)
+        lookup = self.vocabulary.ids.get
+        return tokens, [lookup(token, UNKNOWN_ID) for token in tokens]
+
+    def ids(self, tokens):
+        # Ids for tokens that are already split and lowercased
+        lookup = self.vocabulary.ids.get
+        return [lookup(token, UNKNOWN_ID) for token in tokens]
+
+    def intern(self, text):
+        # Ids for a phrase that should be known, adding new words
+        return [self.vocabulary.intern(token) for token in self.split(text)]
+
+# The vocabulary and tokenizer shared by the word bank index, the grammar and
+# the translator
+VOCABULARY = Vocabulary()
+TOKENIZER = Tokenizer(VOCABULARY)
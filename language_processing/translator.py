@@ -1,61 +1,225 @@
+import hashlib
+import os
+
+from instrumentation import METRICS
 from word_bank import WORD_BANK
+from language_processing.cache import TranslationCache
 from language_processing.cfg import CFG
 from language_processing.dfa import DFA
+from language_processing.fuzzy import FuzzyIndex
+from language_processing.lexicon import MappedLexicon
+from language_processing.phrase_index import PhraseIndex
+from language_processing.reordering import OTHER_TAG, RuleEngine, tag_tokens
+from language_processing.tokenizer import TOKENIZER, UNKNOWN_ID, VOCABULARY
 
-def translate_to_malay(english_text):
+def word_bank_fingerprint(word_bank):
+    # Stable digest of the bank contents, used to tell stale cache entries apart
+    digest = hashlib.sha1()
+    for english, malay in sorted(word_bank.items()):
+        digest.update(english.encode('utf-8') + b'\t' + malay.encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+def _fingerprint(word_bank, lexicon):
+    # Everything a cached translation depends on: the word bank, the lexicon
+    # and the reordering rules
+    fingerprint = word_bank_fingerprint(word_bank) + ':' + REORDERING.fingerprint
+    if lexicon is not None:
+        fingerprint += ':' + lexicon.fingerprint
+    return fingerprint
+
+# Set this to the path of a compiled lexicon (see lexicon.py) to load it at import
+LEXICON_ENV_VAR = 'SPEECH_TRANSLATOR_LEXICON'
+
+# Compiled once from the word bank and shared by every call. The built-in
+# WORD_BANK stays as a small fallback behind any compiled lexicon.
+PHRASE_INDEX = PhraseIndex(WORD_BANK)
+ACTIVE_WORD_BANK = WORD_BANK
+LEXICON = None
+
+# Malay word order rules, compiled once
+REORDERING = RuleEngine()
+
+# Memoized results keyed on normalized input
+TRANSLATION_CACHE = TranslationCache(fingerprint=_fingerprint(WORD_BANK, None))
+
+# The grammar and automaton hold no per-call state, so one of each is enough
+_CFG = CFG()
+_DFA = DFA()
+
+# Near-miss corrections for words the recognizer got slightly wrong, over
+# every word the grammar and the word bank know
+FUZZY_INDEX = FuzzyIndex(VOCABULARY.words[1:])
+
+UNRECOGNIZED_STRUCTURE = "Cannot translate: unrecognized sentence structure"
+
+def load_word_bank(word_bank):
+    # Swap in a different word bank; cached results from the old one are dropped
+    global PHRASE_INDEX, ACTIVE_WORD_BANK, FUZZY_INDEX
+    PHRASE_INDEX = PhraseIndex(word_bank, store=LEXICON)
+    ACTIVE_WORD_BANK = word_bank
+    FUZZY_INDEX = FuzzyIndex(VOCABULARY.words[1:])
+    TRANSLATION_CACHE.set_fingerprint(_fingerprint(word_bank, LEXICON))
+
+def load_lexicon(path):
+    # Memory-map a compiled lexicon and route word bank and terminal lookups
+    # through it. Passing None goes back to the built-in word bank only.
+    global LEXICON, PHRASE_INDEX
+    lexicon = MappedLexicon(path) if path else None
+    PHRASE_INDEX = PhraseIndex(ACTIVE_WORD_BANK, store=lexicon)
+    _CFG.lexicon = lexicon
+    LEXICON = lexicon
+    TRANSLATION_CACHE.set_fingerprint(_fingerprint(ACTIVE_WORD_BANK, lexicon))
+    return lexicon
+
+if os.environ.get(LEXICON_ENV_VAR):
+    load_lexicon(os.environ[LEXICON_ENV_VAR])
+
+def configure_cache(max_size=None, path=None):
+    # Resize the translation cache and optionally warm it from a file written
+    # by save_cache(). Returns the number of entries loaded.
+    if max_size is not None:
+        TRANSLATION_CACHE.resize(max_size)
+    if path is not None:
+        return TRANSLATION_CACHE.load(path)
+    return 0
+
+def save_cache(path):
+    TRANSLATION_CACHE.save(path)
+
+def cache_stats():
+    return TRANSLATION_CACHE.stats()
+
+def translate_and_analyze(english_text):
+    # Tokenize, parse and validate once, and derive both the translation and
+    # the analysis from the same pass
     if not english_text:
-        return ""
-        
-    # Preprocess text
-    english_text = english_text.lower().strip()
+        return "", None
     
-    # First check if the full phrase is in our word bank
-    if english_text in WORD_BANK:
-        return WORD_BANK[english_text]
+    # Lowercase, strip punctuation and look up vocabulary ids in one pass
+    tokens, ids = TOKENIZER.tokenize(english_text)
     
-    # Tokenize the input
-    tokens = english_text.split()
+    # The result only depends on the normalized tokens, so that is the key
+    key = ' '.join(tokens)
+    cached = TRANSLATION_CACHE.get(key)
+    if cached is not None:
+        return cached
     
-    # Use CFG to parse the sentence structure
-    cfg = CFG()
-    parse_result = cfg.parse(tokens)
+    with METRICS.stage('translate'):
+        result = _translate_tokens(tokens, ids)
+    TRANSLATION_CACHE.put(key, result)
+    return result
+
+# Corrections scoring lower than this are only reported, never applied.
+# Score is 1 - distance / length, so one edit in a four-letter word ("hate",
+# "have") is not enough to rewrite it.
+MIN_CORRECTION_SCORE = 0.8
+
+def _correction_candidates(tokens, ids):
+    # The closest known word for each out-of-vocabulary word, if there is
+    # exactly one, as a list of correction dicts
+    candidates = []
+    for i, token_id in enumerate(ids):
+        token = tokens[i]
+        if token_id != UNKNOWN_ID or not token.isalpha():
+            continue
+        if LEXICON is not None and LEXICON.get(token) is not None:
+            continue
+        found = FUZZY_INDEX.correct(token)
+        if found is None:
+            continue
+        word, distance, score = found
+        candidates.append({'position': i, 'token': token, 'correction': word,
+                           'distance': distance, 'score': score, 'applied': False})
+    return candidates
+
+def _evaluate(tokens, ids):
+    # Parse, validate and segment the tokens. Returns (parse_result, valid,
+    # segments, coverage, translatable); translatable is what decides between
+    # a translation and UNRECOGNIZED_STRUCTURE.
+    with METRICS.stage('cfg_parse'):
+        parse_result = _CFG.parse(tokens, ids)
+    with METRICS.stage('dfa_process'):
+        is_valid = _DFA.process(parse_result['structure'])
+    
+    # Greedy longest-match of word bank phrases over the token stream
+    segments = PHRASE_INDEX.segment(ids, tokens)
+    
+    # Share of the tokens the word bank translates
+    covered = sum(end - start for start, end, value in segments if value is not None)
+    coverage = round(covered / len(tokens), 3) if tokens else 0.0
+    whole_phrase = len(segments) == 1 and segments[0][2] is not None
+    return parse_result, is_valid, segments, coverage, is_valid or whole_phrase
+
+def _translate_tokens(tokens, ids):
+    evaluation = _evaluate(tokens, ids)
+    
+    # Near-misses of known words may be recognition errors, but they may just
+    # as well be real words the word bank lacks ("hate" is not "have"). A
+    # correction is applied only if it scores high enough and makes the
+    # sentence translatable or raises coverage without breaking it; the
+    # others are only reported.
+    corrections = []
+    if UNKNOWN_ID in ids:
+        with METRICS.stage('correct'):
+            corrections = _correction_candidates(tokens, ids)
+            for correction in corrections:
+                if correction['score'] < MIN_CORRECTION_SCORE:
+                    continue
+                position = correction['position']
+                trial_tokens = tokens[:position] + [correction['correction']] + tokens[position + 1:]
+                trial_ids = ids[:position] + [VOCABULARY.lookup(correction['correction'])] + ids[position + 1:]
+                trial = _evaluate(trial_tokens, trial_ids)
+                translatable, trial_translatable = evaluation[4], trial[4]
+                if trial_translatable > translatable or (
+                        trial_translatable == translatable and trial[3] > evaluation[3]):
+                    tokens, ids, evaluation = trial_tokens, trial_ids, trial
+                    correction['applied'] = True
+    parse_result, is_valid, segments, coverage, _ = evaluation
+    
+    analysis = {
+        'tokens': tokens,
+        'structure': parse_result['structure'],
+        'type': parse_result['type'],
+        'tree': parse_result['tree'],
+        'valid': is_valid,
+        'corrections': corrections,
+        'coverage': coverage
+    }
     
-    # Use DFA to validate the sentence structure
-    dfa = DFA()
-    is_valid = dfa.process(parse_result['structure'])
+    # If a single word bank phrase covers the whole input, use it directly
+    if len(segments) == 1 and segments[0][2] is not None:
+        return segments[0][2], analysis
     
     if not is_valid:
-        return "Cannot translate: unrecognized sentence structure"
+        return UNRECOGNIZED_STRUCTURE, analysis
     
-    # Translate word by word
+    # Translate phrase by phrase
     translated_words = []
-    for word in tokens:
-        if word.lower() in WORD_BANK:
-            translated_words.append(WORD_BANK[word.lower()])
+    for start, end, value in segments:
+        if value is not None:
+            translated_words.append(value)
         else:
             # Keep untranslated words as they are
-            translated_words.append(word)
+            translated_words.append(tokens[start])
     
-    # Apply Malay grammar rules - this is a basic implementation
-    # In Malay, adjectives typically follow nouns (unlike English)
-    # This is a simplified approach and won't work for all cases
+    # Apply Malay word order, e.g. adjectives and possessives after the noun.
+    # Single words are tagged by their category; multi-word phrases move as
+    # one unit that no rule matches.
+    with METRICS.stage('reorder'):
+        categories = _CFG.categories if _CFG.lexicon is not None else None
+        tags = tag_tokens(tokens, ids, categories, parse_result['tree'])
+        segment_tags = [tags[start] if end - start == 1 else OTHER_TAG for start, end, _ in segments]
+        translated_words = REORDERING.apply(translated_words, segment_tags)
     result = ' '.join(translated_words)
     
-    return result
+    return result, analysis
+
+def translate_batch(texts):
+    # Translate and analyze many texts in one call, in input order
+    return [translate_and_analyze(text) for text in texts]
+
+def translate_to_malay(english_text):
+    return translate_and_analyze(english_text)[0]
 
 def analyze_text(english_text):
-    if not english_text:
-        return None
-        
-    tokens = english_text.split()
-    cfg = CFG()
-    parse_result = cfg.parse(tokens)
-    dfa = DFA()
-    is_valid = dfa.process(parse_result['structure'])
-    
-    return {
-        'tokens': tokens,
-        'structure': parse_result['structure'],
-        'type': parse_result['type'],
-        'valid': is_valid
-    }
\ No newline at end of file
+    return translate_and_analyze(english_text)[1]
@@ -1,11 +1,30 @@
 import sys
+import time
+
+# With --startup-timing the app prints how long each startup phase took,
+# counted from here, and quits once the speech stack has loaded
+STARTED = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
 from ui.main_window import TranslatorApp
 
+IMPORTED = time.perf_counter()
+
+def report_startup(phases):
+    previous = STARTED
+    for name, moment in phases:
+        sys.stderr.write(f"{name:<14} {(moment - STARTED) * 1000:8.1f} ms  (+{(moment - previous) * 1000:.1f})\n")
+        previous = moment
+    sys.stderr.flush()
+
 if __name__ == "__main__":
+    startup_timing = '--startup-timing' in sys.argv
+    if startup_timing:
+        sys.argv.remove('--startup-timing')
+
     app = QApplication(sys.argv)
     app.setStyle("Fusion")  # For consistent look across platforms
-    
+
     # Set application-wide stylesheet
     app.setStyleSheet("""
         QMainWindow, QDialog {
@@ -14,6 +33,19 @@ if __name__ == "__main__":
     """)
     print("Updating visualizer...")
     window = TranslatorApp()
+    constructed = time.perf_counter()
+
+    if startup_timing:
+        phases = [('imports', IMPORTED), ('window', constructed)]
+        window.first_painted.connect(lambda: phases.append(('first paint', time.perf_counter())))
+
+        def speech_loaded():
+            phases.append(('speech stack', time.perf_counter()))
+            report_startup(phases)
+            window.close()
+
+        window.speech_loaded.connect(speech_loaded)
+
     window.show()
-    
-    sys.exit(app.exec_())
\ No newline at end of file
+
+    sys.exit(app.exec_())
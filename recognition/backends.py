@@ -0,0 +1,168 @@
+import random
+import socket
+import threading
+import time
+import zlib
+
+class RecognitionError(Exception):
+    # A request failed in a way that may succeed if tried again
+    pass
+
+class UnrecognizedSpeech(RecognitionError):
+    # The backend answered, but found no speech it could transcribe
+    pass
+
+class RecognitionTimeout(RecognitionError):
+    pass
+
+def _timed_out(error):
+    # recognize_google turns a connect timeout into a RequestError raised
+    # while handling the URLError that wraps socket.timeout; a timeout
+    # waiting for or reading the response escapes as socket.timeout itself
+    cause = error.__cause__ or error.__context__
+    return isinstance(error, socket.timeout) or isinstance(getattr(cause, 'reason', cause), socket.timeout)
+
+class PcmAudio:
+    def __init__(self, frame_data, sample_rate, sample_width=2):
+        # Minimal stand-in for sr.AudioData, so backends that do not need
+        # speech_recognition can be driven without it
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+class RecognizerBackend:
+    name = 'base'
+
+    def recognize(self, audio):
+        # Return the transcript for audio (anything with frame_data,
+        # sample_rate and sample_width, e.g. sr.AudioData). Raise
+        # UnrecognizedSpeech if there is none and RecognitionError on failure.
+        raise NotImplementedError
+
+    def recognize_all(self, audio):
+        # Every hypothesis the backend has for audio, best first, as
+        # [(transcript, confidence)]; confidence is None where the backend
+        # gives none. Backends without alternatives return just the one.
+        return [(self.recognize(audio), None)]
+
+class GoogleBackend(RecognizerBackend):
+    name = 'google'
+
+    def __init__(self, language='en-US', timeout=5.0, recognizer=None):
+        import speech_recognition as sr
+        self.sr = sr
+        self.language = language
+        self.recognizer = recognizer or sr.Recognizer()
+        # Without this the request can hang for as long as the socket allows
+        self.recognizer.operation_timeout = timeout
+
+    def recognize(self, audio):
+        sr = self.sr
+        if not isinstance(audio, sr.AudioData):
+            audio = sr.AudioData(audio.frame_data, audio.sample_rate, audio.sample_width)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language)
+        except sr.UnknownValueError:
+            raise UnrecognizedSpeech("could not understand audio")
+        except (sr.RequestError, socket.timeout) as error:
+            if _timed_out(error):
+                raise RecognitionTimeout("recognition request timed out") from error
+            raise RecognitionError(str(error))
+
+    def recognize_all(self, audio):
+        # With show_all the raw response comes back: {'alternative':
+        # [{'transcript', 'confidence'}, ...]}, or an empty list when
+        # nothing was recognized. Usually only the first has a confidence.
+        sr = self.sr
+        if not isinstance(audio, sr.AudioData):
+            audio = sr.AudioData(audio.frame_data, audio.sample_rate, audio.sample_width)
+        try:
+            response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        except (sr.RequestError, socket.timeout) as error:
+            if _timed_out(error):
+                raise RecognitionTimeout("recognition request timed out") from error
+            raise RecognitionError(str(error))
+        alternatives = response.get('alternative', []) if isinstance(response, dict) else []
+        hypotheses = [(alternative['transcript'], alternative.get('confidence'))
+                      for alternative in alternatives if alternative.get('transcript')]
+        if not hypotheses:
+            raise UnrecognizedSpeech("could not understand audio")
+        return hypotheses
+
+class FakeBackend(RecognizerBackend):
+    name = 'fake'
+
+    DEFAULT_TRANSCRIPTS = [
+        "hello",
+        "good morning friend",
+        "thank you",
+        "how are you",
+        "i love you",
+        "i want water",
+        "my friend likes the book"
+    ]
+
+    def __init__(self, transcripts=None, latency=0.05, jitter=0.02,
+                 tail_rate=0.0, tail_latency=1.0, failure_rate=0.0, alternatives=3, seed=0):
+        # Local, deterministic stand-in for a network recognizer. The same
+        # audio always maps to the same transcript. Latency is base latency
+        # plus jitter, with a tail_rate fraction of calls taking tail_latency
+        # instead, and a failure_rate fraction failing, so pool behaviour
+        # (timeouts, retries, hedging) can be load-tested offline.
+        # recognize_all returns up to alternatives hypotheses: the transcript
+        # and the ones after it in the list.
+        self.transcripts = transcripts or self.DEFAULT_TRANSCRIPTS
+        self.latency = latency
+        self.jitter = jitter
+        self.tail_rate = tail_rate
+        self.tail_latency = tail_latency
+        self.failure_rate = failure_rate
+        self.alternatives = alternatives
+        self.seed = seed
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def recognize(self, audio):
+        return self.transcripts[self._transcribe(audio)]
+
+    def recognize_all(self, audio):
+        first = self._transcribe(audio)
+        count = min(self.alternatives, len(self.transcripts))
+        # Like Google, only the first hypothesis carries a confidence
+        return [(self.transcripts[(first + rank) % len(self.transcripts)], 0.9 if rank == 0 else None)
+                for rank in range(count)]
+
+    def _transcribe(self, audio):
+        # Index of the transcript for audio, after the simulated delay
+        digest = zlib.crc32(audio.frame_data)
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+        # Each call draws its own delay, so a hedged retry of the same audio
+        # can be fast when the first attempt landed in the tail
+        rng = random.Random(self.seed * 1000003 + call)
+        if rng.random() < self.tail_rate:
+            delay = self.tail_latency
+        else:
+            delay = max(0.0, self.latency + rng.uniform(-self.jitter, self.jitter))
+        time.sleep(delay)
+        if rng.random() < self.failure_rate:
+            raise RecognitionError("simulated backend failure")
+        if not audio.frame_data.strip(b"\x00"):
+            raise UnrecognizedSpeech("silence")
+        return digest % len(self.transcripts)
+
+BACKENDS = {
+    GoogleBackend.name: GoogleBackend,
+    FakeBackend.name: FakeBackend
+}
+
+# Selects the backend the app uses; "fake" runs without network access
+BACKEND_ENV_VAR = 'SPEECH_TRANSLATOR_RECOGNIZER'
+
+def make_backend(name='google', **options):
+    try:
+        backend_class = BACKENDS[name]
+    except KeyError:
+        raise ValueError(f"unknown recognizer backend {name!r}; choose from {', '.join(sorted(BACKENDS))}")
+    return backend_class(**options)
@@ -0,0 +1,123 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from recognition.backends import RecognitionError, RecognitionTimeout, UnrecognizedSpeech
+
+class RecognitionPool:
+    def __init__(self, backend, max_workers=4, max_in_flight=16, deadline=10.0,
+                 retries=2, backoff=0.2, hedge_after=None, latency_window=1000):
+        # Runs recognition requests concurrently against one backend.
+        # Each request gets:
+        #   deadline     - seconds until the request fails with RecognitionTimeout
+        #   retries      - extra attempts after a retryable RecognitionError
+        #   hedge_after  - seconds after which a second, parallel attempt is
+        #                  started if the first has not answered; the first
+        #                  answer wins (None disables hedging)
+        self.backend = backend
+        self.deadline = deadline
+        self.retries = retries
+        self.backoff = backoff
+        self.hedge_after = hedge_after
+        self.attempts = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='recognize')
+        self.requests = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix='recognize-request')
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=latency_window)
+        self.counters = {'requests': 0, 'attempts': 0, 'retries': 0, 'hedges': 0,
+                         'hedge_wins': 0, 'timeouts': 0, 'failures': 0}
+
+    def submit(self, audio, n_best=False):
+        # Returns a concurrent.futures.Future with the transcript, or with
+        # n_best the backend's [(transcript, confidence)] hypotheses
+        with self.lock:
+            self.counters['requests'] += 1
+        return self.requests.submit(self._run, audio, n_best)
+
+    def recognize(self, audio, n_best=False):
+        return self.submit(audio, n_best).result()
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def _launch(self, audio, in_flight, n_best, hedge=False):
+        self._count('attempts')
+        recognize = self.backend.recognize_all if n_best else self.backend.recognize
+        future = self.attempts.submit(recognize, audio)
+        in_flight[future] = hedge
+        return future
+
+    def _run(self, audio, n_best):
+        started = time.monotonic()
+        deadline_at = started + self.deadline
+        attempts_left = self.retries
+        in_flight = {}
+        self._launch(audio, in_flight, n_best)
+        hedge_at = started + self.hedge_after if self.hedge_after is not None else None
+        last_error = None
+
+        try:
+            while True:
+                now = time.monotonic()
+                if now >= deadline_at:
+                    self._count('timeouts')
+                    raise RecognitionTimeout(f"no answer within {self.deadline:.1f}s")
+                timeout = deadline_at - now
+                if hedge_at is not None:
+                    timeout = min(timeout, max(0.0, hedge_at - now))
+
+                if in_flight:
+                    done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+                else:
+                    done = ()
+
+                for future in done:
+                    hedge = in_flight.pop(future)
+                    try:
+                        text = future.result()
+                    except UnrecognizedSpeech:
+                        # The backend heard nothing; asking again will not help
+                        raise
+                    except RecognitionError as error:
+                        last_error = error
+                        continue
+                    if hedge:
+                        self._count('hedge_wins')
+                    with self.lock:
+                        self.latencies.append(time.monotonic() - started)
+                    return text
+
+                if hedge_at is not None and time.monotonic() >= hedge_at and in_flight:
+                    # The first attempt is slow: race a second one against it
+                    hedge_at = None
+                    if attempts_left > 0:
+                        attempts_left -= 1
+                        self._count('hedges')
+                        self._launch(audio, in_flight, n_best, hedge=True)
+
+                if not in_flight:
+                    if attempts_left <= 0:
+                        self._count('failures')
+                        raise last_error or RecognitionError("recognition failed")
+                    attempts_left -= 1
+                    self._count('retries')
+                    time.sleep(min(self.backoff, max(0.0, deadline_at - time.monotonic())))
+                    self._launch(audio, in_flight, n_best)
+        finally:
+            # Attempts that already started cannot be interrupted; the ones
+            # still queued are dropped
+            for future in in_flight:
+                future.cancel()
+
+    def stats(self):
+        with self.lock:
+            latencies = sorted(self.latencies)
+            stats = dict(self.counters)
+        for name, fraction in (('p50', 0.50), ('p95', 0.95), ('p99', 0.99)):
+            stats[name] = latencies[min(len(latencies) - 1, int(fraction * len(latencies)))] if latencies else None
+        return stats
+
+    def shutdown(self, wait=False):
+        self.requests.shutdown(wait=wait, cancel_futures=True)
+        self.attempts.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,38 @@
+import socket
+from urllib.error import URLError
+
+import pytest
+import speech_recognition as sr
+
+from recognition.backends import GoogleBackend, PcmAudio, RecognitionError, RecognitionTimeout
+
+class FailingRecognizer:
+    # Raises from recognize_google the way speech_recognition does
+    def __init__(self, reason):
+        self.reason = reason
+
+    def recognize_google(self, audio, **options):
+        if isinstance(self.reason, socket.timeout):
+            # Connect timeouts come wrapped; read timeouts escape as they are
+            if options.get('show_all'):
+                raise self.reason
+            try:
+                raise URLError(self.reason)
+            except URLError as error:
+                raise sr.RequestError(f"recognition connection failed: {error.reason}")
+        raise sr.RequestError(self.reason)
+
+AUDIO = PcmAudio(b'\x01\x00' * 1600, 16000)
+
+def test_timeouts_raise_recognition_timeout():
+    backend = GoogleBackend(recognizer=FailingRecognizer(socket.timeout('timed out')))
+    with pytest.raises(RecognitionTimeout):
+        backend.recognize(AUDIO)
+    with pytest.raises(RecognitionTimeout):
+        backend.recognize_all(AUDIO)
+
+def test_other_request_failures_are_not_timeouts():
+    backend = GoogleBackend(recognizer=FailingRecognizer("recognition request failed: Bad Request"))
+    with pytest.raises(RecognitionError) as raised:
+        backend.recognize(AUDIO)
+    assert not isinstance(raised.value, RecognitionTimeout)
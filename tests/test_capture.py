@@ -0,0 +1,65 @@
+import numpy as np
+
+from audio.capture import CaptureService, Resampler, RingBuffer, SyntheticSource
+
+def test_oversized_write_keeps_positions_aligned():
+    ring = RingBuffer(8)
+    reader = ring.reader(latest=False)
+    ring.write(np.arange(3, dtype=np.float32))
+    out = np.empty(3, dtype=np.float32)
+    assert reader.read_into(out) == 3
+
+    # More than capacity in one block, starting at a non-zero offset: only the
+    # last 8 samples survive and the reader sees them in order
+    ring.write(np.arange(3, 23, dtype=np.float32))
+    out = np.empty(8, dtype=np.float32)
+    assert reader.read_into(out) == 8
+    assert out.tolist() == list(range(15, 23))
+
+    # A small write after it lands right after the oversized block
+    ring.write(np.array([23, 24], dtype=np.float32))
+    out = np.empty(2, dtype=np.float32)
+    assert reader.read_into(out) == 2
+    assert out.tolist() == [23, 24]
+    late = ring.reader(latest=False)
+    out = np.empty(8, dtype=np.float32)
+    assert late.read_into(out) == 8
+    assert out.tolist() == list(range(17, 25))
+
+def tone(frequency, rate, seconds=0.5):
+    t = np.arange(int(rate * seconds)) / rate
+    return (0.5 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+def rms(samples):
+    return float(np.sqrt(np.mean(samples.astype(np.float64) ** 2)))
+
+def resample_blocks(samples, resampler, block_size):
+    return np.concatenate([resampler.process(samples[i:i + block_size]).copy()
+                           for i in range(0, len(samples), block_size)])
+
+def test_resampler_removes_content_above_target_nyquist():
+    # 12 kHz at 44.1 kHz would fold back to 4 kHz without the low-pass
+    speech = resample_blocks(tone(1000, 44100), Resampler(44100, 16000), 1024)
+    alias = resample_blocks(tone(12000, 44100), Resampler(44100, 16000), 1024)
+    assert abs(rms(speech[100:-100]) / rms(tone(1000, 44100)) - 1) < 0.01
+    assert rms(alias[100:-100]) < 0.001 * rms(tone(12000, 44100))
+
+def test_resampler_output_does_not_depend_on_block_size():
+    samples = np.random.default_rng(0).standard_normal(20000).astype(np.float32)
+    whole = Resampler(44100, 16000).process(samples).copy()
+    for block_size in (1024, 333, 7):
+        blocks = resample_blocks(samples, Resampler(44100, 16000), block_size)
+        assert len(blocks) == len(whole)
+        assert np.allclose(blocks, whole, atol=1e-6)
+
+def test_tap_is_removed_with_its_last_reader():
+    capture = CaptureService(SyntheticSource(realtime=False))
+    first = capture.reader(16000, np.int16)
+    second = capture.reader(16000, np.int16)
+    assert len(capture.active_taps) == 1
+    capture.remove_reader(first)
+    assert len(capture.active_taps) == 1
+    capture.remove_reader(second)
+    assert capture.taps == {} and capture.active_taps == ()
+    # Native readers have no tap to remove
+    capture.remove_reader(capture.reader())
@@ -0,0 +1,26 @@
+import json
+
+import numpy as np
+
+from audio.capture import CaptureService, SyntheticSource
+from audio.noise_floor import NoiseFloorMonitor, NoiseFloorStore
+
+def test_malformed_store_entries_count_as_missing(tmp_path):
+    path = tmp_path / 'noise_floor.json'
+    path.write_text(json.dumps({'number': 5, 'list': [1], 'text': {'floor': 'x'},
+                                'flag': {'floor': True}, 'good': {'floor': 120.5}}))
+    store = NoiseFloorStore(str(path))
+    assert [store.get(device) for device in ('number', 'list', 'text', 'flag', 'missing')] == [None] * 5
+    assert store.get('good') == 120.5
+    path.write_text('[1, 2]')
+    assert NoiseFloorStore(str(path)).get('good') is None
+
+def test_switching_to_an_unknown_device_drops_the_old_energies(tmp_path):
+    monitor = NoiseFloorMonitor(CaptureService(SyntheticSource(realtime=False)),
+                                NoiseFloorStore(str(tmp_path / 'noise_floor.json')))
+    monitor.select_device('first')
+    for _ in range(monitor.estimator.update_every):
+        monitor.estimator.add_block(np.full(1024, 0.01, dtype=np.float32))
+    assert monitor.estimator.ready
+    assert not monitor.select_device('second')
+    assert monitor.estimator.floor is None and not monitor.estimator.energies
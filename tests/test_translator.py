@@ -0,0 +1,37 @@
+from language_processing.translator import translate_and_analyze
+
+def corrections(text):
+    return {item['token']: item for item in translate_and_analyze(text)[1]['corrections']}
+
+def test_real_words_near_known_words_are_not_rewritten():
+    # Each of these is within an edit or two of a known word but means
+    # something else; they are reported as suggestions and left alone
+    for text, word in [("i hate you", "hate"), ("i want bread", "bread"),
+                       ("the dog is here", "here"), ("i hear noise", "noise")]:
+        malay, analysis = translate_and_analyze(text)
+        assert word in analysis['tokens']
+        assert not corrections(text)[word]['applied']
+    assert translate_and_analyze("i want bread")[0] == "i want bread"
+
+def test_misspellings_that_make_the_sentence_translate_are_corrected():
+    assert translate_and_analyze("i want watr")[0] == "i want air"
+    assert corrections("i want watr")['watr']['applied']
+    assert translate_and_analyze("i like my frend")[0] == "i like kawan saya"
+
+def test_bare_noun_phrases_are_translated_in_malay_order():
+    assert translate_and_analyze("my book")[0] == "buku saya"
+    assert translate_and_analyze("your big house")[0] == "rumah besar awak"
+    malay, analysis = translate_and_analyze("big book")
+    assert malay == "buku besar" and analysis['type'] == 'phrase' and analysis['valid']
+    # Phrases are not a licence for any word salad
+    assert translate_and_analyze("book my")[1]['valid'] is False
+
+def test_cached_results_cannot_be_changed_by_callers():
+    malay, analysis = translate_and_analyze("i like my frend")
+    analysis['tokens'].append('extra')
+    analysis['corrections'][0]['applied'] = False
+    analysis['valid'] = False
+    again = translate_and_analyze("i like my frend")[1]
+    assert again['tokens'] == ['i', 'like', 'my', 'friend']
+    assert again['corrections'][0]['applied'] and again['valid']
+    assert again is not translate_and_analyze("i like my frend")[1]
@@ -0,0 +1,410 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import signal
+import struct
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+# Only the translation core is used here, never PyQt5, so the service runs on
+# headless machines. HTTP/1.1 and WebSocket are handled directly on asyncio
+# streams to avoid extra dependencies.
+from language_processing.translator import translate_batch
+
+WEBSOCKET_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+MAX_BODY = 1 << 20
+MAX_HEADER = 16 << 10
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+def translate_texts(texts):
+    # Runs in a worker process: one call into the core for a whole batch
+    return translate_batch(texts)
+
+class MicroBatcher:
+    def __init__(self, process, executor, max_batch_size=64, max_wait=0.002, max_in_flight=4):
+        # Gathers texts from concurrent requests into batches of up to
+        # max_batch_size, waiting at most max_wait seconds for a batch to fill,
+        # and runs each batch as one process(texts) call on the executor. Up to
+        # max_in_flight batches run at once; new ones form while they do.
+        self.process = process
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.full = asyncio.Event()
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.requests = 0
+        self.batches = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, text):
+        # Returns (translation, analysis) for one text
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((text, future))
+        if self.queue.qsize() >= self.max_batch_size:
+            self.full.set()
+        return await future
+
+    def stats(self):
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+            'queued': self.queue.qsize()
+        }
+
+    async def _run(self):
+        while True:
+            batch = [await self.queue.get()]
+            if self.queue.qsize() + 1 < self.max_batch_size and self.max_wait > 0:
+                self.full.clear()
+                try:
+                    await asyncio.wait_for(self.full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self.slots.acquire()
+            asyncio.get_running_loop().create_task(self._run_batch(batch))
+
+    async def _run_batch(self, batch):
+        try:
+            # Requests whose client went away are not worth translating
+            batch = [(text, future) for text, future in batch if not future.cancelled()]
+            if not batch:
+                return
+            self.requests += len(batch)
+            self.batches += 1
+            loop = asyncio.get_running_loop()
+            try:
+                results = await loop.run_in_executor(self.executor, self.process, [text for text, _ in batch])
+            except Exception as error:
+                if len(batch) == 1:
+                    if not batch[0][1].done():
+                        batch[0][1].set_exception(error)
+                    return
+                # Run each text on its own, so one bad request fails alone
+                # rather than taking every request in its batch down with it
+                await asyncio.gather(*(self._run_one(text, future) for text, future in batch))
+                return
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self.slots.release()
+
+    async def _run_one(self, text, future):
+        try:
+            result = (await asyncio.get_running_loop().run_in_executor(self.executor, self.process, [text]))[0]
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+            return
+        if not future.done():
+            future.set_result(result)
+
+class HttpError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+class TranslationServer:
+    def __init__(self, batcher):
+        # Endpoints:
+        #   POST /translate  {"text": ...} or {"texts": [...]}  -> Malay text
+        #   POST /analyze    {"text": ...} or {"texts": [...]}  -> analysis
+        #   GET  /translate?text=...  and  GET /analyze?text=...
+        #   GET  /health, GET /stats
+        #   GET  /ws  WebSocket; send {"id", "op", "text"} (or plain text) and
+        #        get {"id", "malay", "analysis"} back for each, as they finish
+        self.batcher = batcher
+        self.started = time.time()
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return
+                except asyncio.LimitOverrunError:
+                    await self.send_json(writer, 413, {'error': 'headers too large'}, close=True)
+                    return
+                try:
+                    method, target, headers = self.parse_head(head)
+                except HttpError as error:
+                    await self.send_json(writer, error.status, {'error': str(error)}, close=True)
+                    return
+                if headers.get('upgrade', '').lower() == 'websocket':
+                    path = urlsplit(target).path
+                    if path != '/ws':
+                        await self.send_json(writer, 404, {'error': f"no WebSocket endpoint at {path}"}, close=True)
+                        return
+                    await self.handle_websocket(reader, writer, headers)
+                    return
+
+                try:
+                    length = self.content_length(method, headers)
+                except HttpError as error:
+                    await self.send_json(writer, error.status, {'error': str(error)}, close=True)
+                    return
+                if length > MAX_BODY:
+                    await self.send_json(writer, 413, {'error': 'request body too large'}, close=True)
+                    return
+                body = await reader.readexactly(length) if length else b''
+                close = headers.get('connection', '').lower() == 'close'
+                try:
+                    status, payload = 200, await self.route(method, target, body)
+                except HttpError as error:
+                    status, payload = error.status, {'error': str(error)}
+                except Exception as error:
+                    status, payload = 500, {'error': str(error)}
+                await self.send_json(writer, status, payload, close=close)
+                if close:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def parse_head(self, head):
+        lines = head.decode('latin-1').split('\r\n')
+        parts = lines[0].split(' ')
+        if len(parts) != 3:
+            raise HttpError(400, "malformed request line")
+        headers = {}
+        for line in lines[1:]:
+            if ':' in line:
+                name, value = line.split(':', 1)
+                headers[name.strip().lower()] = value.strip()
+        return parts[0].upper(), parts[1], headers
+
+    def content_length(self, method, headers):
+        value = headers.get('content-length')
+        if value is None:
+            if method == 'POST':
+                raise HttpError(400, "Content-Length is required")
+            return 0
+        try:
+            length = int(value)
+        except ValueError:
+            raise HttpError(400, "Content-Length must be a number")
+        if length < 0:
+            raise HttpError(400, "Content-Length must be a number")
+        return length
+
+    async def route(self, method, target, body):
+        url = urlsplit(target)
+        if url.path == '/health':
+            return {'status': 'ok', 'uptime': time.time() - self.started}
+        if url.path == '/stats':
+            return self.batcher.stats()
+        if url.path not in ('/translate', '/analyze'):
+            raise HttpError(404, f"no such endpoint: {url.path}")
+
+        if method == 'GET':
+            texts = parse_qs(url.query).get('text', [])
+            single = len(texts) == 1
+        elif method == 'POST':
+            try:
+                request = json.loads(body or b'{}')
+            except ValueError:
+                raise HttpError(400, "body must be JSON")
+            if not isinstance(request, dict):
+                raise HttpError(400, "body must be a JSON object")
+            single = 'texts' not in request
+            texts = [request.get('text', '')] if single else request['texts']
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise HttpError(400, "text must be a string and texts a list of strings")
+        else:
+            raise HttpError(405, f"{method} not allowed")
+
+        results = await asyncio.gather(*(self.batcher.submit(text) for text in texts))
+        key = 'malay' if url.path == '/translate' else 'analysis'
+        payloads = [{key: result[0] if key == 'malay' else result[1]} for result in results]
+        if single and payloads:
+            return payloads[0]
+        return {'results': payloads}
+
+    async def send_json(self, writer, status, payload, close=False):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + body)
+        await writer.drain()
+
+    async def handle_websocket(self, reader, writer, headers):
+        key = headers.get('sec-websocket-key', '').encode('latin-1')
+        accept = base64.b64encode(hashlib.sha1(key + WEBSOCKET_GUID).digest()).decode('ascii')
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\n"
+                      "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode('latin-1'))
+        await writer.drain()
+
+        # Each message is answered as soon as its batch finishes, so replies
+        # can arrive out of order; clients match them up by id
+        tasks = set()
+        messages = MessageReader(reader)
+        try:
+            while True:
+                opcode, payload = await messages.read()
+                if opcode == 0x8:
+                    writer.write(encode_frame(0x8, payload[:2]))
+                    await writer.drain()
+                    return
+                if opcode == 0x9:
+                    writer.write(encode_frame(0xA, payload))
+                    continue
+                if opcode != 0x1:
+                    continue
+                task = asyncio.get_running_loop().create_task(self.answer_message(writer, payload))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def answer_message(self, writer, payload):
+        text = payload.decode('utf-8', errors='replace')
+        message = {'text': text}
+        if text.lstrip().startswith('{'):
+            try:
+                message = json.loads(text)
+            except ValueError:
+                pass
+        # Bad messages get an error frame, like a 400 on the HTTP side, and
+        # never reach the batcher
+        if not isinstance(message.get('text', ''), str):
+            reply = {'id': message.get('id'), 'error': "text must be a string"}
+        else:
+            try:
+                malay, analysis = await self.batcher.submit(message.get('text', ''))
+            except Exception as error:
+                reply = {'id': message.get('id'), 'error': str(error)}
+            else:
+                reply = {'id': message.get('id'), 'malay': malay}
+                if message.get('op', 'translate') == 'analyze':
+                    reply['analysis'] = analysis
+        writer.write(encode_frame(0x1, json.dumps(reply, ensure_ascii=False).encode('utf-8')))
+        await writer.drain()
+
+class MessageReader:
+    def __init__(self, reader):
+        # Reads WebSocket messages, joining fragments. A part-received message
+        # is kept here, since control frames may arrive between its fragments.
+        self.reader = reader
+        self.opcode = None
+        self.chunks = []
+        self.size = 0
+
+    async def read(self):
+        # The next whole message or control frame: (opcode, payload)
+        while True:
+            first, second = await self.reader.readexactly(2)
+            length = second & 0x7F
+            if length == 126:
+                length = struct.unpack('>H', await self.reader.readexactly(2))[0]
+            elif length == 127:
+                length = struct.unpack('>Q', await self.reader.readexactly(8))[0]
+            if self.size + length > MAX_BODY:
+                raise ConnectionError("WebSocket message too large")
+            mask = await self.reader.readexactly(4) if second & 0x80 else None
+            data = await self.reader.readexactly(length)
+            if mask is not None:
+                data = apply_mask(data, mask)
+            opcode = first & 0x0F
+            if opcode >= 0x8:
+                return opcode, data
+            if self.opcode is None:
+                self.opcode = opcode
+            self.chunks.append(data)
+            self.size += length
+            if first & 0x80:
+                message = self.opcode, b''.join(self.chunks)
+                self.opcode, self.chunks, self.size = None, [], 0
+                return message
+
+def encode_frame(opcode, payload, mask=None):
+    # Server frames are unmasked; clients pass a 4-byte mask
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if mask is not None else 0
+    if len(payload) < 126:
+        header.append(mask_bit | len(payload))
+    elif len(payload) < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack('>H', len(payload))
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack('>Q', len(payload))
+    if mask is None:
+        return bytes(header) + payload
+    return bytes(header) + mask + apply_mask(payload, mask)
+
+def apply_mask(data, mask):
+    # XOR with the repeated 4-byte mask, done as one big-integer operation
+    repeated = (mask * (len(data) // 4 + 1))[:len(data)]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(repeated, 'big')).to_bytes(len(data), 'big')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serve English-Malay translation over HTTP and WebSocket")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes; 0 translates on a thread in this process")
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help="longest a request waits for its batch to fill")
+    return parser.parse_args(argv)
+
+async def serve(args):
+    if args.workers > 0:
+        executor = ProcessPoolExecutor(args.workers)
+    else:
+        executor = ThreadPoolExecutor(1)
+    batcher = MicroBatcher(translate_texts, executor, max_batch_size=args.max_batch_size,
+                           max_wait=args.max_wait_ms / 1000, max_in_flight=max(args.workers, 1) * 2)
+    batcher.start()
+    app = TranslationServer(batcher)
+    server = await asyncio.start_server(app.handle_connection, args.host, args.port, limit=MAX_HEADER)
+    try:
+        # Stop cleanly on SIGTERM too, so the worker processes are shut down
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, server.close)
+    except NotImplementedError:
+        pass
+    print(f"Serving on http://{args.host}:{args.port} (ws://{args.host}:{args.port}/ws)", file=sys.stderr)
+    try:
+        async with server:
+            await server.serve_forever()
+    except asyncio.CancelledError:
+        pass
+    finally:
+        await batcher.stop()
+        executor.shutdown(cancel_futures=True)
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(serve(parse_args()))
+    except KeyboardInterrupt:
+        pass
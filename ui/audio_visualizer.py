@@ -1,11 +1,33 @@
 import numpy as np
-import pyaudio
 from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QFrame
-from PyQt5.QtGui import QPainter, QColor, QFont, QPen
+from PyQt5.QtGui import QPainter, QFont, QImage
 from PyQt5.QtCore import Qt, QTimer
 
+from audio.capture import default_service
+from audio.spectrum import SpectrumAnalyzer
+from instrumentation import METRICS
+
+NUM_BANDS = 64
+
+# Frame background, as 0xAARRGGBB for the bar image
+BACKGROUND = 0xFF1A1A1A
+
+# Visible bar width as a fraction of the space each band gets
+BAR_FILL = 0.8
+
+# Corner radius of the visualizer frame in pixels
+FRAME_RADIUS = 8
+
+def bar_colors(max_height):
+    # 0xAARRGGBB color of a bar for every height in pixels from 0 to
+    # max_height: green for quiet bands to red for loud ones
+    height = np.arange(max_height + 1)
+    red = np.clip((height * 2.55).astype(np.int64), 0, 255)
+    green = np.clip((255 - height * 1.2).astype(np.int64), 0, 255)
+    return (0xFF000000 | (red << 16) | (green << 8) | 100).astype(np.uint32)
+
 class AudioVisualizerDialog(QDialog):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, capture=None):
         super().__init__(parent)
         self.setWindowTitle("Audio Visualizer")
         self.setFixedSize(500, 300)
@@ -14,21 +36,58 @@ class AudioVisualizerDialog(QDialog):
         # Set up the UI
         self.setup_ui()
         
-        # Audio data
-        self.audio_data = np.zeros(128)
+        # Audio comes from the shared capture service, which the recognizer
+        # reads from too, so only one input stream is ever open
+        self.capture = capture or default_service()
+        self.reader = None
         
-        # Start the visualizer timer
+        # Spectrum analyzer; audio_data is its smoothed band levels (0-100),
+        # updated in place as audio is processed
+        self.analyzer = SpectrumAnalyzer(sample_rate=self.capture.rate, num_bands=NUM_BANDS)
+        self.audio_data = self.analyzer.levels
+        self.audio_block = np.zeros(self.analyzer.fft_size, dtype=np.float32)
+        
+        # The visualizer timer only runs while listening with the dialog
+        # shown; see sync_timer()
         self.timer = QTimer(self)
+        self.timer.setInterval(30)  # 30ms refresh rate
         self.timer.timeout.connect(self.update_visualizer)
-        self.timer.start(30)  # 30ms refresh rate
+        
+        # Bars are drawn into this image, which is rebuilt only when new audio
+        # was processed since the last paint (frame_dirty) and blitted in one
+        # call. Its pixel buffers are allocated for the frame size in
+        # prepare_render() and reused.
+        self.frame_image = None
+        self.frame_dirty = True
+        self.render_size = None
         
         # Setup for audio capture
         self.is_listening = False
-        self.stream = None
-        self.p = pyaudio.PyAudio()
+    
+    def sync_timer(self):
+        # Nothing changes on screen unless audio is coming in, so the timer
+        # stops while the dialog is hidden or not listening
+        if self.is_listening and self.isVisible():
+            if not self.timer.isActive():
+                self.timer.start()
+        else:
+            self.timer.stop()
     
     def update_visualizer(self):
-        self.update()  # Triggers repaint to show updated data
+        # Pull whatever the capture service produced since the last tick and
+        # repaint the bars, and only the bars, if any of it arrived
+        if not self.is_listening or self.reader is None:
+            return
+        pushed = False
+        count = self.reader.read_into(self.audio_block)
+        while count:
+            self.analyzer.push(self.audio_block[:count])
+            pushed = True
+            count = self.reader.read_into(self.audio_block)
+        if pushed:
+            self.analyzer.compute()
+            self.frame_dirty = True
+            self.update(self.visualizer_frame.geometry())
 
         
     def setup_ui(self):
@@ -44,7 +103,9 @@ class AudioVisualizerDialog(QDialog):
         # Visualizer frame
         self.visualizer_frame = QFrame()
         self.visualizer_frame.setFrameShape(QFrame.StyledPanel)
-        self.visualizer_frame.setStyleSheet("background-color: #1a1a1a; border-radius: 8px;")
+        # The frame only reserves the space: the dialog paints its background
+        # and the bars underneath it, so it must not paint over them
+        self.visualizer_frame.setStyleSheet("background-color: transparent;")
         self.visualizer_frame.setMinimumHeight(180)
         layout.addWidget(self.visualizer_frame)
         
@@ -78,88 +139,127 @@ class AudioVisualizerDialog(QDialog):
         self.status_label.setText("Listening... Speak something in English")
         self.status_label.setStyleSheet("color: #2ecc71; font-weight: bold; margin: 10px;")
         
-        # Start audio stream
-        self.stream = self.p.open(
-            format=pyaudio.paFloat32,
-            channels=1,
-            rate=44100,
-            input=True,
-            frames_per_buffer=1024,
-            stream_callback=self.audio_callback
-        )
-        self.stream.start_stream()
+        # Start reading the shared capture stream from a silent spectrum
+        if self.reader is None:
+            try:
+                self.capture.acquire()
+            except Exception as error:
+                # No usable input device; the recognition worker reports it too
+                self.is_listening = False
+                self.status_label.setText(f"Could not open the microphone: {error}")
+                self.status_label.setStyleSheet("color: #e74c3c; margin: 10px;")
+                self.sync_timer()
+                return
+            self.analyzer.reset()
+            self.reader = self.capture.reader()
+        self.frame_dirty = True
+        self.sync_timer()
         
     def stop_listening(self):
         self.is_listening = False
         self.status_label.setText("Stopped listening")
         self.status_label.setStyleSheet("color: #e74c3c; margin: 10px;")
         
-        # Stop audio stream
-        if self.stream:
-            self.stream.stop_stream()
-            self.stream.close()
+        # Let go of the shared capture stream
+        if self.reader is not None:
+            self.reader = None
+            self.capture.release()
+        self.sync_timer()
+        # Clear the bars
+        self.update(self.visualizer_frame.geometry())
+        
+    def process_audio(self, samples):
+        # The analyzer copies the float32 samples into its ring buffer and
+        # computes the spectrum into preallocated arrays, so nothing here
+        # allocates array memory.
+        self.analyzer.process(samples)
+        self.frame_dirty = True
+    
+    def prepare_render(self, width, height):
+        # Allocate the bar image and everything render_bars() needs for a
+        # frame of this size; only called again if the frame is resized
+        num_bars = min(NUM_BANDS, len(self.audio_data))
+        bar_width = width / num_bars
         
-    def audio_callback(self, in_data, frame_count, time_info, status):
-        # Convert audio data to numpy array
-        audio_data = np.frombuffer(in_data, dtype=np.float32)
+        # Which bar every pixel column belongs to, with the gaps between bars
+        # pointing at an extra always-empty bar at index num_bars
+        centers = (np.arange(width) + 0.5) // bar_width
+        offset = np.abs(np.arange(width) + 0.5 - (centers + 0.5) * bar_width)
+        self.column_bar = np.where(offset < bar_width * BAR_FILL / 2, centers, num_bars).astype(np.intp)
         
-        # Get the magnitude of the audio data
-        magnitude = np.abs(audio_data)
+        # A bar's color depends only on its height, so every possible pixel
+        # column is precomputed: column_pixels[:, h] is a bar h pixels high
+        rows_up = np.arange(height - 1, -1, -1)[:, None]
+        heights = np.arange(height + 1)[None, :]
+        self.column_pixels = np.where(rows_up < heights, bar_colors(height)[None, :],
+                                      np.uint32(BACKGROUND)).astype(np.uint32)
         
-        # Normalize and scale for visualization
-        magnitude = magnitude * 500
+        self.bar_scale = height / 100
+        self.bar_levels = np.zeros(num_bars)
+        self.bar_heights = np.zeros(num_bars + 1, dtype=np.intp)
+        self.column_heights = np.zeros(width, dtype=np.intp)
+        self.pixels = np.zeros((height, width), dtype=np.uint32)
+        self.frame_image = QImage(self.pixels.data, width, height, width * 4,
+                                  QImage.Format_ARGB32_Premultiplied)
         
-        # Downsample to 128 points (for visualization)
-        if len(magnitude) >= 128:
-            self.audio_data = magnitude[:128]
-        else:
-            # Pad with zeros if not enough data
-            self.audio_data = np.pad(magnitude, (0, 128 - len(magnitude)), 'constant')
-                    
-        return (in_data, pyaudio.paContinue)
+        # The frame's rounded corners stay transparent: a view of each corner
+        # of the image with the mask of its pixels outside the rounding
+        y, x = np.ogrid[:height, :width]
+        nearest_x = np.clip(x, FRAME_RADIUS, width - 1 - FRAME_RADIUS)
+        nearest_y = np.clip(y, FRAME_RADIUS, height - 1 - FRAME_RADIUS)
+        outside = (x - nearest_x) ** 2 + (y - nearest_y) ** 2 > FRAME_RADIUS ** 2
+        self.corners = []
+        for rows in (slice(0, FRAME_RADIUS), slice(height - FRAME_RADIUS, height)):
+            for columns in (slice(0, FRAME_RADIUS), slice(width - FRAME_RADIUS, width)):
+                self.corners.append((self.pixels[rows, columns], outside[rows, columns].copy()))
+        
+        # The empty frame, shown when not listening
+        self.background = np.where(outside, 0, BACKGROUND).astype(np.uint32)
+        self.background_image = QImage(self.background.data, width, height, width * 4,
+                                       QImage.Format_ARGB32_Premultiplied)
+        self.render_size = (width, height)
+        self.frame_dirty = True
+    
+    def render_bars(self):
+        # Write the current levels into the bar image. Every step fills a
+        # preallocated array, so a frame allocates no array memory.
+        num_bars = len(self.bar_levels)
+        np.multiply(self.audio_data[:num_bars], self.bar_scale, out=self.bar_levels)
+        np.clip(self.bar_levels, 0, self.render_size[1], out=self.bar_levels)
+        self.bar_heights[:num_bars] = self.bar_levels
+        np.take(self.bar_heights, self.column_bar, out=self.column_heights, mode='clip')
+        np.take(self.column_pixels, self.column_heights, axis=1, out=self.pixels, mode='clip')
+        for corner, outside in self.corners:
+            np.copyto(corner, 0, where=outside)
+        self.frame_dirty = False
     
     def paintEvent(self, event):
-        if not self.is_listening:
-            # Just call the base class implementation if not listening
-            super().paintEvent(event)
-            return
-            
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.Antialiasing)
-        
-        # Get the geometry of the visualizer frame
+        super().paintEvent(event)
         rect = self.visualizer_frame.geometry()
+        if self.render_size != (rect.width(), rect.height()):
+            self.prepare_render(rect.width(), rect.height())
         
-        # Draw on the visualizer frame
-        painter.fillRect(rect, QColor('#1a1a1a'))
-        
-        # Number of bars in the visualizer
-        num_bars = min(64, len(self.audio_data))
-        
-        # Calculate bar width
-        bar_width = rect.width() / num_bars
-        
-        # Draw each bar
-        for i in range(num_bars):
-            # Calculate bar height (clamped to maximum height)
-            height = min(self.audio_data[i] * rect.height() / 100, rect.height())
-            
-            # Calculate color based on height (green to red gradient)
-            r = min(255, int(height * 2.55))
-            g = min(255, int(255 - height * 1.2))
-            b = 100
-            
-            # Set the pen color
-            pen = QPen(QColor(r, g, b))
-            pen.setWidth(int(bar_width * 0.8))
-            painter.setPen(pen)
-            
-            # Calculate x position
-            x = rect.left() + i * bar_width + bar_width / 2
+        painter = QPainter(self)
+        if not self.is_listening:
+            # Just the empty frame when not listening
+            painter.drawImage(rect.topLeft(), self.background_image)
+            painter.end()
+            return
             
-            # Draw the bar
-            y_start = rect.bottom() - height
-            painter.drawLine(int(x), int(rect.bottom()), int(x), int(y_start))
+        with METRICS.stage('visualizer_paint'):
+            if self.frame_dirty:
+                self.render_bars()
+            # One blit for the background and every bar
+            painter.drawImage(rect.topLeft(), self.frame_image)
+            painter.end()
+    
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.sync_timer()
+    
+    def hideEvent(self, event):
+        super().hideEvent(event)
+        self.sync_timer()
     
     def closeEvent(self, event):
         self.stop_listening()
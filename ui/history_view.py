@@ -0,0 +1,170 @@
+import bisect
+import time
+from collections import OrderedDict
+
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtSignal
+from PyQt5.QtWidgets import QAbstractItemView, QHeaderView, QTableView
+
+from history import search_query
+
+class HistoryModel(QAbstractListModel):
+    # Roles for the fields of an entry, beyond the display text
+    EnglishRole = Qt.UserRole + 1
+    MalayRole = Qt.UserRole + 2
+    CreatedRole = Qt.UserRole + 3
+    SourceRole = Qt.UserRole + 4
+
+    # Connect HistoryStore.on_commit here; the store calls it on its writer
+    # thread and Qt delivers it on the GUI thread
+    entries_committed = pyqtSignal(int)
+
+    def __init__(self, store, page_size=256, cached_pages=8, parent=None):
+        # The history store, shown newest first. The view grows the row count
+        # a page at a time through canFetchMore/fetchMore as it scrolls down.
+        # Only the row count and where each page starts are kept for every
+        # page; the entries themselves are held for the last cached_pages
+        # pages used and read back from the store when needed again, so
+        # memory stays flat however far the user scrolls.
+        super().__init__(parent)
+        self.store = store
+        self.page_size = page_size
+        self.cached_pages = cached_pages
+        self.search = None
+        self.entries_committed.connect(self.refresh)
+        self._reset()
+
+    def _reset(self):
+        # Pages are [first row, id of the first entry, id of the last entry,
+        # row count], top to bottom; firsts holds their first rows for bisect
+        self.pages = []
+        self.firsts = []
+        self.cache = OrderedDict()
+        self.rows = 0
+        self.exhausted = False
+        # Entries above top_id are picked up by refresh(), the rest by fetchMore()
+        self.top_id = self.store.last_id()
+
+    def set_search(self, text):
+        # Show only the entries matching text, or everything if text is blank
+        search = search_query(text)
+        if search == self.search:
+            return
+        self.beginResetModel()
+        self.search = search
+        self._reset()
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.rows
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and not self.exhausted
+
+    def fetchMore(self, parent):
+        if parent.isValid() or self.exhausted:
+            return
+        before = self.pages[-1][2] if self.pages else self.top_id + 1
+        entries = self.store.page(before=before, limit=self.page_size, search=self.search)
+        if len(entries) < self.page_size:
+            self.exhausted = True
+        if not entries:
+            return
+        self.beginInsertRows(QModelIndex(), self.rows, self.rows + len(entries) - 1)
+        self._add_page(len(self.pages), self.rows, entries)
+        self.rows += len(entries)
+        self.endInsertRows()
+
+    def refresh(self, count=0):
+        # Put entries committed since the last refresh at the top
+        if not self.pages:
+            if self.exhausted:
+                # Nothing matched so far; let fetchMore start over from the top
+                self.top_id = self.store.last_id()
+                self.exhausted = False
+                self.fetchMore(QModelIndex())
+            return
+        entries = self.store.newer(self.top_id, search=self.search)
+        if not entries:
+            return
+        self.top_id = entries[0][0]
+        count = len(entries)
+        self.beginInsertRows(QModelIndex(), 0, count - 1)
+        for page in self.pages:
+            page[0] += count
+        self.firsts = [first + count for first in self.firsts]
+        first_page = self.pages[0]
+        if first_page[3] + count <= self.page_size:
+            # A few new entries join the first page rather than starting a
+            # page of their own
+            cached = self.cache.pop(first_page[1], None)
+            first_page[0] = 0
+            first_page[1] = entries[0][0]
+            first_page[3] += count
+            self.firsts[0] = 0
+            if cached is not None:
+                self._cache(first_page[1], entries + cached)
+        else:
+            for index, start in enumerate(range(0, count, self.page_size)):
+                self._add_page(index, start, entries[start:start + self.page_size])
+        self.rows += count
+        self.endInsertRows()
+
+    def _add_page(self, index, first, entries):
+        self.pages.insert(index, [first, entries[0][0], entries[-1][0], len(entries)])
+        self.firsts.insert(index, first)
+        self._cache(entries[0][0], entries)
+
+    def _cache(self, key, entries):
+        self.cache[key] = entries
+        self.cache.move_to_end(key)
+        while len(self.cache) > self.cached_pages:
+            self.cache.popitem(last=False)
+
+    def entry(self, row):
+        # (id, created, english, malay, source) for a row, reading its page
+        # back from the store if it is no longer cached
+        page = self.pages[bisect.bisect_right(self.firsts, row) - 1]
+        entries = self.cache.get(page[1])
+        if entries is None:
+            entries = self.store.page(before=page[1] + 1, limit=page[3], search=self.search)
+            self._cache(page[1], entries)
+        else:
+            self.cache.move_to_end(page[1])
+        return entries[row - page[0]]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self.rows:
+            return None
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole, self.EnglishRole, self.MalayRole,
+                        self.CreatedRole, self.SourceRole):
+            return None
+        _, created, english, malay, source = self.entry(index.row())
+        if role == Qt.DisplayRole:
+            return f"{english}  →  {malay}"
+        if role == Qt.ToolTipRole:
+            return f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created))} ({source})"
+        if role == self.EnglishRole:
+            return english
+        if role == self.MalayRole:
+            return malay
+        if role == self.CreatedRole:
+            return created
+        return source
+
+class HistoryView(QTableView):
+    def __init__(self, parent=None):
+        # A one-column table showing a HistoryModel as a list. A QListView
+        # lays out every row again whenever rows are added, which takes
+        # hundreds of milliseconds at 100k entries; a table with fixed row
+        # heights only ever looks at the rows on screen.
+        super().__init__(parent)
+        self.horizontalHeader().hide()
+        self.horizontalHeader().setStretchLastSection(True)
+        self.verticalHeader().hide()
+        self.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.setShowGrid(False)
+        self.setWordWrap(False)
+        self.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.setSelectionMode(QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
@@ -1,35 +1,166 @@
+import os
 import threading
-import speech_recognition as sr
 from PyQt5.QtWidgets import (QMainWindow, QPushButton, QVBoxLayout, QHBoxLayout, 
-                            QWidget, QTextEdit, QLabel)
-from PyQt5.QtGui import QFont
-from PyQt5.QtCore import Qt, pyqtSignal
+                            QWidget, QTextEdit, QLabel, QCheckBox, QLineEdit)
+from PyQt5.QtGui import QFont, QTextCursor
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 
-from language_processing.translator import translate_to_malay, analyze_text
-from ui.audio_visualizer import AudioVisualizerDialog
+from app_data import data_path
+from history import HistoryStore
+from instrumentation import METRICS, METRICS_FILE_ENV_VAR
+from language_processing.earley import format_tree
+from language_processing.incremental import IncrementalTranslator
+from language_processing.translator import translate_and_analyze, configure_cache, save_cache
+from ui.history_view import HistoryModel, HistoryView
+
+# The audio and recognition stacks (numpy, speech_recognition, pyaudio) are
+# not imported here: typing does not need them, and they take most of the
+# startup time. load_speech() brings them in after the window first paints.
 
 class TranslatorApp(QMainWindow):
     update_translation_signal = pyqtSignal(str, str, dict)
     
+    # Startup milestones, used by main.py --startup-timing
+    first_painted = pyqtSignal()
+    speech_loaded = pyqtSignal()
+    
+    # Emitted by the background preload thread once the speech modules are
+    # imported; delivered on the GUI thread
+    speech_modules_imported = pyqtSignal()
+    
     def __init__(self):
         super().__init__()
         
         # Set up window properties
         self.setWindowTitle("English-Malay Translator")
-        self.setMinimumSize(800, 600)
+        self.setMinimumSize(1100, 600)
         
         # Initialize the UI components
         self.setup_ui()
         
+        # The recognizer, capture stream, recognition pool, worker and audio
+        # visualizer dialog are built by load_speech(), after first paint or
+        # on the first speech recognition, whichever comes first
+        self.recognition_worker = None
+        self.audio_dialog = None
+        self.painted = False
+        self.speech_modules_imported.connect(self.load_speech)
+        
+        # Start with the translations remembered from the last session
+        self.cache_path = data_path("translation_cache.json")
+        configure_cache(path=self.cache_path)
+        
+        self.update_translation_signal.connect(self.update_translation)
+        
+        # Every translation shown is appended to the history database on a
+        # background thread; the list reads it back a page at a time
+        self.history = HistoryStore(data_path("history.sqlite3"))
+        self.history_model = HistoryModel(self.history, parent=self)
+        self.history.on_commit = self.history_model.entries_committed.emit
+        self.history_view.setModel(self.history_model)
+        self.recognized = None
+        self.history_timer = QTimer(self)
+        self.history_timer.setSingleShot(True)
+        self.history_timer.setInterval(150)
+        self.history_timer.timeout.connect(self.on_history_search)
+        self.history_search.textChanged.connect(self.history_timer.start)
+        
+        # Live mode translates as the user types, once typing pauses, and only
+        # redoes the sentences around each edit
+        self.live_translator = IncrementalTranslator(translate_and_analyze)
+        self.live_synced = False
+        self.setting_english = False
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(200)
+        self.live_timer.timeout.connect(self.on_live_translate)
+        self.english_text.document().contentsChange.connect(self.on_english_changed)
+        self.live_check.toggled.connect(self.on_live_toggled)
+        
+        # With SPEECH_TRANSLATOR_METRICS set, show stage latencies in the status bar
+        if METRICS.enabled:
+            self.metrics_timer = QTimer(self)
+            self.metrics_timer.timeout.connect(self.update_metrics_overlay)
+            self.metrics_timer.start(1000)
+        
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.painted:
+            # The window is on screen; load the speech stack once the event
+            # loop is idle again
+            self.painted = True
+            self.first_painted.emit()
+            QTimer.singleShot(0, self.preload_speech)
+    
+    def preload_speech(self):
+        if self.recognition_worker is None:
+            threading.Thread(target=self.import_speech_modules, name='preload-speech', daemon=True).start()
+    
+    def import_speech_modules(self):
+        # Runs on a background thread: the imports and opening the audio
+        # system take the bulk of the startup time. Widgets and the worker
+        # thread are then created on the GUI thread by load_speech().
+        import speech_recognition
+        import audio.microphone
+        import audio.noise_floor
+        import audio.streaming
+        import recognition.pool
+        import ui.audio_visualizer
+        import ui.recognition_worker
+        from audio.capture import default_service
+        try:
+            # Creates the PyAudio instance and finds the input device
+            default_service().device_name()
+        except Exception:
+            # No usable input device; reported when the user starts listening
+            pass
+        self.speech_modules_imported.emit()
+    
+    def load_speech(self):
+        # Build the speech stack. Does nothing if it is already built; if
+        # the background imports are still running, the imports below wait
+        # for them.
+        if self.recognition_worker is not None:
+            return
+        import speech_recognition as sr
+        from audio.capture import default_service
+        from audio.noise_floor import NoiseFloorMonitor, NoiseFloorStore
+        from recognition.backends import BACKEND_ENV_VAR, make_backend
+        from recognition.pool import RecognitionPool
+        from ui.audio_visualizer import AudioVisualizerDialog
+        from ui.recognition_worker import RecognitionWorker
+        
         # Initialize the recognizer
         self.recognizer = sr.Recognizer()
         
-        # Initialize audio visualizer dialog
-        self.audio_dialog = None
+        # One capture stream, shared by the visualizer and the recognizer
+        self.capture = default_service()
         
-        # Connect signal
-        self.update_translation_signal.connect(self.update_translation)
+        # Background noise floor, tracked continuously and kept per device
+        self.noise_floor = NoiseFloorMonitor(self.capture, NoiseFloorStore(data_path("noise_floor.json")))
+        
+        # Recognition requests run on a pool with deadlines, retries and
+        # hedging; SPEECH_TRANSLATOR_RECOGNIZER=fake uses the offline stand-in
+        self.recognition = RecognitionPool(make_backend(os.environ.get(BACKEND_ENV_VAR, 'google')),
+                                           hedge_after=3.0)
+        
+        # One long-lived worker does all listening and recognition
+        self.recognition_worker = RecognitionWorker(self.recognizer, self.capture,
+                                                    self.noise_floor, self.recognition, parent=self)
+        
+        # Connect signals; the worker only talks to the UI through them
+        self.recognition_worker.result_ready.connect(self.update_translation_signal)
+        self.recognition_worker.result_ready.connect(self.on_recognition_result)
+        self.recognition_worker.status_changed.connect(self.set_status)
+        self.recognition_worker.processing_started.connect(self.on_recognition_processing)
+        self.recognition_worker.job_finished.connect(self.on_recognition_finished)
+        self.recognition_worker.start()
         
+        # Audio visualizer dialog, built now so the first click shows it at once
+        self.audio_dialog = AudioVisualizerDialog(self, capture=self.capture)
+        self.audio_dialog.close_button.clicked.connect(self.recognition_worker.cancel_current)
+        self.speech_loaded.emit()
+    
     def setup_ui(self):
         # Main widget and layout
         main_widget = QWidget()
@@ -188,6 +319,50 @@ class TranslatorApp(QMainWindow):
         
         main_layout.addLayout(button_layout)
         
+        options_layout = QHBoxLayout()
+        options_layout.addStretch()
+        
+        # Live mode: translate while typing
+        self.live_check = QCheckBox("Translate as you type")
+        self.live_check.setFont(QFont("Arial", 10))
+        self.live_check.setStyleSheet("color: #7f8c8d;")
+        options_layout.addWidget(self.live_check)
+        
+        # Streaming mode: translate each phrase as soon as the speaker pauses
+        self.streaming_check = QCheckBox("Show partial translations while speaking")
+        self.streaming_check.setFont(QFont("Arial", 10))
+        self.streaming_check.setStyleSheet("color: #7f8c8d;")
+        options_layout.addWidget(self.streaming_check)
+        
+        # N-best mode: translate all of the recognizer's hypotheses and keep
+        # the one that parses and translates best
+        self.n_best_check = QCheckBox("Pick the best of the recognizer's alternatives")
+        self.n_best_check.setFont(QFont("Arial", 10))
+        self.n_best_check.setStyleSheet("color: #7f8c8d;")
+        options_layout.addWidget(self.n_best_check)
+        
+        # Full noise calibration on demand; otherwise the running estimate is used
+        self.recalibrate_btn = QPushButton("Recalibrate Microphone")
+        self.recalibrate_btn.setFont(QFont("Arial", 10))
+        self.recalibrate_btn.setStyleSheet("""
+            QPushButton {
+                background-color: transparent;
+                color: #7f8c8d;
+                border: 1px solid #bdc3c7;
+                border-radius: 4px;
+                padding: 4px 10px;
+            }
+            QPushButton:hover {
+                color: #2c3e50;
+                border-color: #7f8c8d;
+            }
+        """)
+        self.recalibrate_btn.clicked.connect(self.on_recalibrate)
+        options_layout.addWidget(self.recalibrate_btn)
+        
+        options_layout.addStretch()
+        main_layout.addLayout(options_layout)
+        
         # Status label
         self.status_label = QLabel("Ready")
         self.status_label.setAlignment(Qt.AlignCenter)
@@ -195,7 +370,53 @@ class TranslatorApp(QMainWindow):
         self.status_label.setStyleSheet("color: #7f8c8d; margin-top: 10px;")
         main_layout.addWidget(self.status_label)
         
-        main_widget.setLayout(main_layout)
+        # History section, beside the rest
+        history_layout = QVBoxLayout()
+        history_layout.setContentsMargins(0, 20, 20, 20)
+        history_layout.setSpacing(10)
+        
+        history_label = QLabel("History:")
+        history_label.setFont(QFont("Arial", 12, QFont.Bold))
+        history_label.setStyleSheet("color: #2c3e50;")
+        history_layout.addWidget(history_label)
+        
+        self.history_search = QLineEdit()
+        self.history_search.setFont(QFont("Arial", 11))
+        self.history_search.setPlaceholderText("Search English or Malay...")
+        self.history_search.setClearButtonEnabled(True)
+        self.history_search.setStyleSheet("""
+            QLineEdit {
+                background-color: #ecf0f1;
+                border: 2px solid #bdc3c7;
+                border-radius: 6px;
+                padding: 6px;
+                color: #2c3e50;
+            }
+            QLineEdit:focus {
+                border: 2px solid #3498db;
+            }
+        """)
+        history_layout.addWidget(self.history_search)
+        
+        self.history_view = HistoryView()
+        self.history_view.setFont(QFont("Arial", 11))
+        self.history_view.setStyleSheet("""
+            QTableView {
+                background-color: #fdfefe;
+                border: 2px solid #d5dbdb;
+                border-radius: 8px;
+                padding: 4px;
+                color: #2c3e50;
+            }
+        """)
+        self.history_view.activated.connect(self.on_history_activated)
+        history_layout.addWidget(self.history_view)
+        
+        page_layout = QHBoxLayout()
+        page_layout.setContentsMargins(0, 0, 0, 0)
+        page_layout.addLayout(main_layout, 3)
+        page_layout.addLayout(history_layout, 2)
+        main_widget.setLayout(page_layout)
         self.setCentralWidget(main_widget)
     
     def on_manual_translate(self):
@@ -205,22 +426,21 @@ class TranslatorApp(QMainWindow):
             self.status_label.setStyleSheet("color: #e74c3c;")
             return
             
-        # Translate
-        malay_translation = translate_to_malay(english_text)
-        
-        # Update analysis
-        analysis_dict = analyze_text(english_text)
+        # Translate and analyze in a single pass
+        malay_translation, analysis_dict = translate_and_analyze(english_text)
         
         # Update UI
         self.update_translation(english_text, malay_translation, analysis_dict)
+        self.history.add(english_text, malay_translation, source='text')
         self.status_label.setText("Translation completed")
         self.status_label.setStyleSheet("color: #27ae60;")
     
     def on_speech_recognition(self):
-        # Create and show audio visualizer dialog
-        if not self.audio_dialog:
-            self.audio_dialog = AudioVisualizerDialog(self)
+        from ui.recognition_worker import RecognitionJob
         
+        # Show the audio visualizer dialog, building the speech stack first if
+        # this click came before the background load finished
+        self.load_speech()
         self.audio_dialog.show()
         self.audio_dialog.start_listening()
         
@@ -228,59 +448,65 @@ class TranslatorApp(QMainWindow):
         self.status_label.setText("Listening for speech...")
         self.status_label.setStyleSheet("color: #2ecc71;")
         
-        # Start recognition in a separate thread
-        threading.Thread(target=self.recognize_speech, daemon=True).start()
+        # Hand the job to the recognition worker; a click while a listen is
+        # already queued or running joins that one instead of starting another
+        self.recognition_worker.submit(RecognitionJob(streaming=self.streaming_check.isChecked(),
+                                                      n_best=self.n_best_check.isChecked()))
     
-    def recognize_speech(self):
-        try:
-            # Use the microphone as source for input
-            with sr.Microphone() as source:
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                
-                # Listen for the user's input
-                audio = self.recognizer.listen(source)
-                
-                # Stop visualizer's listening status
-                if self.audio_dialog and self.audio_dialog.isVisible():
-                    self.audio_dialog.status_label.setText("Processing speech...")
-                
-                try:
-                    # Using Google Speech Recognition to convert audio to text
-                    english_text = self.recognizer.recognize_google(audio)
-                    
-                    # Translate the English text to Malay
-                    malay_translation = translate_to_malay(english_text)
-                    
-                    # Generate analysis
-                    analysis_dict = analyze_text(english_text)
-                    
-                    # Update UI using signal (thread-safe)
-                    self.update_translation_signal.emit(english_text, malay_translation, analysis_dict)
-                    
-                except sr.UnknownValueError:
-                    self.update_translation_signal.emit("", "", {})
-                    # Update status
-                    self.status_label.setText("Could not understand audio")
-                    self.status_label.setStyleSheet("color: #e74c3c;")
-                    
-                except sr.RequestError:
-                    self.update_translation_signal.emit("", "", {})
-                    # Update status
-                    self.status_label.setText("Could not request results; check your internet connection")
-                    self.status_label.setStyleSheet("color: #e74c3c;")
-                    
-        finally:
-            # Close audio dialog when finished
-            if self.audio_dialog and self.audio_dialog.isVisible():
-                self.audio_dialog.stop_listening()
+    def on_recognition_processing(self):
+        if self.audio_dialog and self.audio_dialog.isVisible():
+            self.audio_dialog.status_label.setText("Processing speech...")
+    
+    def on_recognition_result(self, english_text, malay_translation, analysis_dict):
+        # Streaming sends the whole utterance so far with every phrase; only
+        # the last result goes into the history, once the job finishes
+        self.recognized = (english_text, malay_translation) if english_text else None
+    
+    def on_recognition_finished(self):
+        if self.recognized is not None:
+            self.history.add(*self.recognized, source='speech')
+            self.recognized = None
+        
+        # Close audio dialog when finished
+        if self.audio_dialog and self.audio_dialog.isVisible():
+            self.audio_dialog.stop_listening()
+    
+    def on_recalibrate(self):
+        self.load_speech()
+        self.noise_floor.request_recalibration()
+        self.set_status("The microphone will be recalibrated on the next recognition", "#7f8c8d")
+    
+    def set_status(self, text, color):
+        self.status_label.setText(text)
+        self.status_label.setStyleSheet(f"color: {color};")
     
     def update_translation(self, english_text, malay_translation, analysis_dict):
-        # Update text fields
+        with METRICS.stage('ui_update'):
+            self.show_translation(english_text, malay_translation, analysis_dict)
+            if METRICS.enabled:
+                # Paint now rather than on the next event loop pass, so the
+                # repaint is part of what gets timed
+                self.repaint()
+    
+    def show_translation(self, english_text, malay_translation, analysis_dict):
+        # Update text fields; setting the English text here must not look like
+        # an edit to live mode, which starts over from this text instead
+        self.setting_english = True
         self.english_text.setText(english_text)
+        self.setting_english = False
+        self.live_translator.reset()
+        self.live_synced = False
         self.malay_text.setText(malay_translation)
         
         # Update analysis field
+        self.show_analysis(analysis_dict)
+            
+        # Update status
+        if english_text and malay_translation:
+            self.status_label.setText("Translation completed")
+            self.status_label.setStyleSheet("color: #27ae60;")
+    
+    def show_analysis(self, analysis_dict):
         if analysis_dict:
             analysis_html = f"""
                 <b>Tokens:</b> {', '.join(analysis_dict.get('tokens', []))}
@@ -289,16 +515,119 @@ class TranslatorApp(QMainWindow):
                 <br><br>
                 <b>Sentence type:</b> {analysis_dict.get('type', 'unknown')}
                 <br><br>
+                <b>Parse tree:</b> {format_tree(analysis_dict['tree']) if analysis_dict.get('tree') else 'none'}
+                <br><br>
                 <b>DFA validation:</b> {'Valid' if analysis_dict.get('valid', False) else 'Invalid'}
             """
+            corrections = analysis_dict.get('corrections') or []
+            applied = [item for item in corrections if item.get('applied', True)]
+            suggested = [item for item in corrections if not item.get('applied', True)]
+            if applied:
+                # Near-misses from the recognizer that were read as known words
+                analysis_html += "<br><br><b>Corrections:</b> " + ', '.join(
+                    f"{item['token']} → {item['correction']} ({item['score']:.2f})" for item in applied)
+            if suggested:
+                # Close to a known word, but left as it was
+                analysis_html += "<br><br><b>Did you mean:</b> " + ', '.join(
+                    f"{item['correction']} for {item['token']} ({item['score']:.2f})" for item in suggested)
+            alternatives = analysis_dict.get('alternatives')
+            if alternatives:
+                # Recognizer hypotheses in the order rescoring ranked them
+                analysis_html += "<br><br><b>Alternatives:</b> " + ', '.join(
+                    f"{item['text']} ({item['score']:.2f})" for item in alternatives)
             self.analysis_text.setHtml(analysis_html)
         else:
             self.analysis_text.clear()
+    
+    def on_english_changed(self, position, removed, added):
+        # Note what changed and restart the debounce timer on every keystroke
+        if self.live_check.isChecked() and not self.setting_english:
+            self.live_translator.note_edit(position, removed, added)
+            self.live_timer.start()
+    
+    def on_live_toggled(self, checked):
+        if checked:
+            self.live_translator.reset()
+            self.live_synced = False
+            self.live_timer.start()
+        else:
+            self.live_timer.stop()
+    
+    def on_live_translate(self):
+        with METRICS.stage('live_update'):
+            count = len(self.live_translator.sentences)
+            document = self.english_text.document()
+            first, removed, results = self.live_translator.refresh(self.english_slice, document.characterCount() - 1)
+            if not self.live_synced:
+                # First pass after a reset: one line per sentence from scratch
+                self.malay_text.setPlainText('\n'.join(self.live_translator.lines()))
+                self.live_synced = True
+            elif removed or results:
+                lines = [self.live_translator.line(index) for index in range(first, first + len(results))]
+                self.replace_lines(self.malay_text, first, removed, lines, count)
             
-        # Update status
-        if english_text and malay_translation:
-            self.status_label.setText("Translation completed")
-            self.status_label.setStyleSheet("color: #27ae60;")
+            # The analysis follows the sentence that was just edited
+            if results:
+                self.show_analysis(results[-1][1])
+            elif not self.live_translator.sentences:
+                self.analysis_text.clear()
+        self.set_status(f"Live translation: {len(self.live_translator.sentences)} sentences", "#27ae60")
+    
+    def english_slice(self, start, end):
+        cursor = QTextCursor(self.english_text.document())
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        # Qt marks line breaks in a selection with paragraph separators
+        return cursor.selectedText().replace('\u2029', '\n').replace('\u2028', '\n')
+    
+    def replace_lines(self, edit, first, removed, lines, count):
+        # Replace lines first to first + removed of a plain text edit holding
+        # count lines, leaving the rest of the document as it is
+        if removed == count:
+            edit.setPlainText('\n'.join(lines))
+            return
+        document = edit.document()
+        if removed:
+            start_block = document.findBlockByNumber(first)
+            end_block = document.findBlockByNumber(first + removed - 1)
+            start = start_block.position()
+            end = end_block.position() + end_block.length() - 1
+            text = '\n'.join(lines)
+            if not lines:
+                # Take one line break along with the removed lines
+                if first + removed < count:
+                    end += 1
+                else:
+                    start -= 1
+        elif first < count:
+            start = end = document.findBlockByNumber(first).position()
+            text = '\n'.join(lines) + '\n'
+        else:
+            last_block = document.findBlockByNumber(count - 1)
+            start = end = last_block.position() + last_block.length() - 1
+            text = '\n' + '\n'.join(lines)
+        cursor = QTextCursor(document)
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(text)
+    
+    def on_history_search(self):
+        self.history_model.set_search(self.history_search.text())
+    
+    def on_history_activated(self, index):
+        # Show a past translation again, with a fresh analysis of its English
+        english_text = index.data(HistoryModel.EnglishRole)
+        _, analysis_dict = translate_and_analyze(english_text)
+        self.show_translation(english_text, index.data(HistoryModel.MalayRole), analysis_dict)
+        self.set_status("Showing a translation from the history", "#7f8c8d")
+    
+    def update_metrics_overlay(self):
+        summary = METRICS.summary()
+        parts = [f"{stage} {summary[stage]['p50_ms']:.1f}/{summary[stage]['p95_ms']:.1f}/{summary[stage]['p99_ms']:.1f}"
+                 for stage in ('utterance', 'calibrate', 'listen', 'recognize', 'translate',
+                               'cfg_parse', 'dfa_process', 'ui_update') if stage in summary]
+        if parts:
+            self.statusBar().showMessage("p50/p95/p99 ms: " + " | ".join(parts))
     
     def on_clear(self):
         self.english_text.clear()
@@ -308,7 +637,31 @@ class TranslatorApp(QMainWindow):
         self.status_label.setStyleSheet("color: #7f8c8d;")
     
     def closeEvent(self, event):
-        # Close audio dialog when main window is closed
-        if self.audio_dialog:
+        if self.recognition_worker is not None:
+            # Stop the recognition worker before the capture stream goes away
+            self.recognition_worker.stop()
+            
+            # Close audio dialog when main window is closed
             self.audio_dialog.close()
+            try:
+                self.noise_floor.save()
+            except OSError:
+                pass
+            self.capture.close()
+            self.recognition.shutdown()
+        
+        # Store the history entries still queued
+        self.history.close()
+        
+        # Keep the translation cache warm for the next session
+        try:
+            save_cache(self.cache_path)
+        except OSError:
+            pass
+        
+        if METRICS.enabled and os.environ.get(METRICS_FILE_ENV_VAR):
+            try:
+                METRICS.export(os.environ[METRICS_FILE_ENV_VAR])
+            except OSError:
+                pass
         event.accept()
\ No newline at end of file
@@ -0,0 +1,205 @@
+import queue
+import threading
+from concurrent.futures import wait
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from audio.microphone import ListenCancelled, SharedMicrophone
+from audio.streaming import StreamingTranscriber
+from instrumentation import METRICS
+from language_processing.rescoring import best_hypothesis
+from language_processing.translator import translate_and_analyze
+from recognition.backends import PcmAudio, RecognitionError, UnrecognizedSpeech
+
+class RecognitionJob:
+    def __init__(self, streaming=False, n_best=False):
+        # One press of "Start Speech Recognition". Jobs with the same key are
+        # interchangeable, so a repeated click is folded into the one already
+        # queued or running instead of stacking another listen. With n_best
+        # every recognizer hypothesis is translated and the best one kept.
+        self.streaming = streaming
+        self.n_best = n_best
+        self.key = ('listen', streaming, n_best)
+        self.cancelled = threading.Event()
+
+    def cancel(self):
+        self.cancelled.set()
+
+class RecognitionWorker(QThread):
+    # Everything the worker wants shown goes through these signals, which Qt
+    # delivers on the GUI thread; the worker never touches a widget itself
+    result_ready = pyqtSignal(str, str, dict)
+    status_changed = pyqtSignal(str, str)
+    processing_started = pyqtSignal()
+    job_finished = pyqtSignal()
+
+    # What to do with a new job when max_pending jobs are already waiting
+    COALESCE = 'coalesce'        # keep the queued job if it is equivalent, else drop the new one
+    DROP_OLDEST = 'drop_oldest'  # replace the oldest queued job with the new one
+    DROP_NEWEST = 'drop_newest'  # drop the new job
+
+    def __init__(self, recognizer, capture, noise_floor, recognition,
+                 max_pending=1, policy=COALESCE, parent=None):
+        super().__init__(parent)
+        self.recognizer = recognizer
+        self.capture = capture
+        self.noise_floor = noise_floor
+        self.recognition = recognition
+        self.policy = policy
+        self.jobs = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.current = None
+
+    def submit(self, job):
+        # Returns the job that will run: job itself, or the equivalent one it
+        # was coalesced into. Returns None if the job was dropped.
+        with self.lock:
+            if self.policy == self.COALESCE:
+                if self.current is not None and self.current.key == job.key:
+                    return self.current
+                for pending in list(self.jobs.queue):
+                    if pending.key == job.key:
+                        return pending
+            try:
+                self.jobs.put_nowait(job)
+            except queue.Full:
+                if self.policy != self.DROP_OLDEST:
+                    return None
+                dropped = self.jobs.get_nowait()
+                dropped.cancel()
+                self.jobs.put_nowait(job)
+            return job
+
+    def cancel_current(self):
+        # Abort the job that is listening or recognizing right now
+        with self.lock:
+            if self.current is not None:
+                self.current.cancel()
+
+    def stop(self):
+        # Cancel everything and let run() return
+        with self.lock:
+            while True:
+                try:
+                    self.jobs.get_nowait().cancel()
+                except queue.Empty:
+                    break
+            if self.current is not None:
+                self.current.cancel()
+        self.jobs.put(None)
+        self.wait()
+
+    def run(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            with self.lock:
+                self.current = job
+            try:
+                if not job.cancelled.is_set():
+                    with METRICS.utterance():
+                        self.listen(job)
+            except ListenCancelled:
+                self.status_changed.emit("Listening cancelled", "#7f8c8d")
+            except Exception as error:
+                # An exception escaping run() aborts the whole app; report it
+                # (no input device, encoder failure, ...) and take the next job
+                self.result_ready.emit("", "", {})
+                self.status_changed.emit(f"Speech recognition failed: {error}", "#e74c3c")
+            finally:
+                with self.lock:
+                    self.current = None
+                self.job_finished.emit()
+
+    def listen(self, job):
+        # Use the shared microphone stream as source for input
+        with SharedMicrophone(self.capture, cancel_event=job.cancelled) as source:
+            if self.noise_floor.select_device(self.capture.device_name()):
+                # Start listening straight away with the running noise estimate
+                self.recognizer.energy_threshold = self.noise_floor.threshold
+            else:
+                # New device or recalibration requested: measure ambient noise
+                with METRICS.stage('calibrate'):
+                    self.recognizer.adjust_for_ambient_noise(source, duration=1)
+                self.noise_floor.calibrated(self.recognizer.energy_threshold)
+
+            if job.streaming:
+                self.listen_streaming(job, source)
+                return
+
+            # Listen for the user's input
+            with METRICS.stage('listen'):
+                audio = self.recognizer.listen(source)
+
+        self.processing_started.emit()
+        try:
+            # Convert audio to text with the configured recognizer backend
+            with METRICS.stage('recognize'):
+                future = self.recognition.submit(audio, n_best=job.n_best)
+                while not future.done():
+                    if job.cancelled.is_set():
+                        future.cancel()
+                        raise ListenCancelled()
+                    wait([future], timeout=0.1)
+                recognized = future.result()
+
+            if job.n_best:
+                # Translate every hypothesis and keep the one that parses and
+                # translates best; the ranking goes along with the analysis
+                with METRICS.stage('rescore'):
+                    best, ranked = best_hypothesis(recognized)
+                if best is None:
+                    raise UnrecognizedSpeech("no usable hypothesis")
+                english_text, malay_translation = best['text'], best['malay']
+                analysis_dict = dict(best['analysis'], alternatives=[
+                    {'text': item['text'], 'score': item['score']} for item in ranked])
+            else:
+                english_text = recognized
+                # Translate the English text to Malay and generate analysis
+                malay_translation, analysis_dict = translate_and_analyze(english_text)
+            self.result_ready.emit(english_text, malay_translation, analysis_dict)
+
+        except UnrecognizedSpeech:
+            self.result_ready.emit("", "", {})
+            self.status_changed.emit("Could not understand audio", "#e74c3c")
+
+        except RecognitionError:
+            self.result_ready.emit("", "", {})
+            self.status_changed.emit("Could not request results; check your internet connection", "#e74c3c")
+
+    def listen_streaming(self, job, source):
+        # Cut the audio at pauses and recognize and translate each phrase while
+        # the user keeps talking; partial results are appended as they arrive.
+        # Phrases are recognized on the transcriber's executor threads, which
+        # record their stages in this thread's utterance trace.
+        trace = METRICS.current_trace()
+
+        def recognize(pcm, sample_rate, sample_width):
+            with METRICS.attach(trace):
+                try:
+                    with METRICS.stage('recognize'):
+                        recognized = self.recognition.recognize(PcmAudio(pcm, sample_rate, sample_width),
+                                                                n_best=job.n_best)
+                except UnrecognizedSpeech:
+                    return None
+                if not job.n_best:
+                    return recognized
+                # The transcriber translates the chosen text again, from the cache
+                with METRICS.stage('rescore'):
+                    best, _ = best_hypothesis(recognized)
+                return best['text'] if best is not None else None
+
+        def on_error(error):
+            if isinstance(error, RecognitionError):
+                self.status_changed.emit("Could not request results; check your internet connection", "#e74c3c")
+
+        transcriber = StreamingTranscriber(
+            recognize, translate_and_analyze, self.result_ready.emit,
+            on_error=on_error, sample_rate=source.SAMPLE_RATE,
+            threshold=self.recognizer.energy_threshold)
+        english_text, _ = transcriber.run(source.stream.reader, stop_event=job.cancelled)
+        if job.cancelled.is_set():
+            raise ListenCancelled()
+        if not english_text:
+            self.status_changed.emit("Could not understand audio", "#e74c3c")
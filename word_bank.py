@@ -19,5 +19,15 @@ WORD_BANK = {
     "sorry": "maaf",
     "please": "sila",
     "how are you": "apa khabar",
-    "goodbye": "selamat tinggal"
+    "goodbye": "selamat tinggal",
+    "my": "saya",
+    "your": "awak",
+    "this": "ini",
+    "that": "itu",
+    "good": "baik",
+    "bad": "buruk",
+    "happy": "gembira",
+    "sad": "sedih",
+    "big": "besar",
+    "small": "kecil"
 }
\ No newline at end of file